@@ -10,9 +10,13 @@ from nicegui import (
     ui
 )
 
-from isoplots.isonice import Config
+from isoplots.isonice import (
+    Config,
+    Loaders
+)
 from isoplots.isonice.tabs import Tabs
 from isoplots.isonice.utils import ports
+from isoplots.isonice.utils.wd import Overviews, ZarrCache
 
 
 Logger = logging.getLogger(__name__)
@@ -65,6 +69,12 @@ def launch(path=".", config=None, check=False, **kwargs):
         Logger.info(f"Reading config: {config}")
         Config.read(config)
 
+    # Opt-in conversion of ENVI products to Zarr, eg. [Cache] zarr = true
+    Loaders.zarr = ZarrCache.create(Config.get("Cache", "zarr", fallback=None))
+
+    # Opt-in overview pyramids for image display, eg. [Cache] overviews = true
+    Overviews.configure(Config.get("Cache", "overviews", fallback=None))
+
     Logger.info("Launching")
     ui.run(**kwargs)
 
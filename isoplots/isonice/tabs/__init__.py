@@ -1,14 +1,21 @@
 import importlib
 import logging
 import pkgutil
-from asyncio import create_task
+from asyncio import (
+    create_task,
+    get_running_loop,
+    shield
+)
 
 from nicegui import (
     app,
     ui
 )
 
-from isoplots.isonice import WD
+from isoplots.isonice import (
+    Config,
+    WD
+)
 from isoplots.isonice.utils.resources import Resources
 
 
@@ -30,6 +37,8 @@ Modules = {
 
 class Tabs:
     disabled = False
+    watcher = None
+    queryTask = None
 
     def __init__(self):
         """
@@ -49,6 +58,8 @@ class Tabs:
                     self.res = Resources()
                     self.res.start()
                     app.on_shutdown(self.res.stop)
+                    app.on_shutdown(self.stopWatching)
+                    app.on_shutdown(WD.runner.shutdown)
 
             with splitter.after:
                 default = self.buttons[list(self.buttons)[0]]
@@ -64,15 +75,86 @@ class Tabs:
         """
         await self.tabs[event.value].resetTask
 
+    def queryTabs(self):
+        """
+        Starts a single batched WD query for the file lists of every tab that
+        declares a `query`, see IsofitWD.query
+        """
+        specs = {
+            name: obj.query
+            for name, obj in self.tabs.items()
+            if getattr(obj, "query", None)
+        }
+        self.queryTask = create_task(WD.aquery(specs))
+
+    async def files(self, name):
+        """
+        Retrieves a tab's file list from the latest batched query
+
+        Parameters
+        ----------
+        name : str
+            Name of the tab
+
+        Returns
+        -------
+        list
+            Result of the tab's query
+        """
+        # Shielded so that cancelling one tab does not cancel the query for the others
+        return (await shield(self.queryTask))[name]
+
     def resetTabs(self):
         """
         Resets all tabs by cancelling any running task and restarting
         """
+        if self.queryTask:
+            self.queryTask.cancel()
+        self.queryTabs()
+
         for tab, obj in self.tabs.items():
             if hasattr(obj, "resetTask"):
                 obj.resetTask.cancel()
             obj.resetTask = create_task(obj.reset())
 
+    def watch(self):
+        """
+        Starts watching the WD for changes, replacing any previous watcher. Changes
+        are passed to the update function of each tab that defines one
+        """
+        self.stopWatching()
+
+        # inotify misses writes from other hosts on NFS/Lustre, use polling there
+        mode = Config.get("Cache", "watch", fallback="auto")
+        try:
+            self.watcher = WD.watch(self.updateTabs, polling=mode, loop=get_running_loop())
+        except (ValueError, ImportError) as e:
+            Logger.error(f"Invalid [Cache] watch option, falling back to auto: {e}")
+            self.watcher = WD.watch(self.updateTabs, loop=get_running_loop())
+
+    def stopWatching(self):
+        """
+        Stops the active watcher, if any
+        """
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+
+    def updateTabs(self, delta):
+        """
+        Passes the changes of the WD to the tabs that support incremental updates
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to the WD path
+        """
+        self.queryTabs()
+
+        for name, obj in self.tabs.items():
+            if hasattr(obj, "update"):
+                create_task(obj.update(delta))
+
     def toggleTabs(self):
         """
         Toggles the disabled class of the tab buttons
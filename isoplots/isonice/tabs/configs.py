@@ -16,6 +16,9 @@ Disabled = True
 class Tab:
     data = None
 
+    # File options, gathered with the other tabs in one batched WD query
+    query = {"find": "config/.json", "all": True}
+
     def __init__(self, parent):
         """
         Parameters
@@ -32,7 +35,7 @@ class Tab:
         self.editor = ui.json_editor({'content': {'json': {}}, 'readOnly': True}).classes('w-full jse-theme-dark')
 
     async def reset(self, isofit=None):
-        configs = WD.find("config/.json", all=True)
+        configs = await self.parent.files(Name)
         self.select.set_options(configs, value=configs[0])
         # if isofit:
         #     self.isofit = isofit
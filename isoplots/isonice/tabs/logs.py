@@ -1,8 +1,11 @@
+import html
 import logging
 
+import numpy as np
 from nicegui import ui
 
 from isoplots.isonice import WD
+from isoplots.isonice.utils.wd import Logs
 
 
 Logger = logging.getLogger("Logs")
@@ -10,10 +13,14 @@ Logger = logging.getLogger("Logs")
 Name = "Logs"
 Icon = "density_small"
 Prio = 1
-Disabled = True
 
 
-class Tab:
+class Viewer:
+    """
+    Virtually scrolled view of the filtered rows of a Logs object. The client only
+    receives the lines of the visible window, which are read and formatted on the
+    server as the view scrolls
+    """
     colors = {
         "DEBUG"    : "grey",
         "INFO"     : "cyan",
@@ -22,7 +29,143 @@ class Tab:
         "EXCEPTION": "magenta"
     }
 
+    # Pixel height of a line, lines are kept to a single line so this is constant
+    height = 20
+
+    # Extra lines to render above and below the visible lines
+    overscan = 50
+
+    # Browsers cap the height of an element, beyond this the scroll is scaled
+    limit = 10_000_000
+
+    def __init__(self):
+        self.logs = None
+        self.rows = np.empty(0, dtype=np.int64)
+
+        # Rendered window of self.rows, [start, stop)
+        self.window = (0, 0)
+        self.visible = 0
+
+        with ui.scroll_area(on_scroll=self.scrolled).classes("nicegui-log w-full flex-1") as self.area:
+            with ui.element().classes("relative w-full") as self.spacer:
+                self.lines = ui.html().classes("absolute w-full")
+
+    @property
+    def scale(self):
+        """
+        Factor the scroll position is compressed by to stay under the height limit
+        """
+        return max(1, self.rows.size * self.height / self.limit)
+
+    def setRows(self, rows, keep=True):
+        """
+        Sets the filtered rows of the store to display
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Row indices of the store
+        keep : bool, default=True
+            Keep the current window, otherwise scroll back to the top
+        """
+        self.rows = rows
+        self.spacer.style(f"height: {self.rows.size * self.height / self.scale:.0f}px")
+
+        start = self.window[0] if keep else 0
+        self.window = (0, 0)
+        self.render(start)
+
+        if not keep:
+            self.area.scroll_to(pixels=0)
+
+    def scrolled(self, event):
+        """
+        Renders the lines around the scroll position if they are not already
+
+        Parameters
+        ----------
+        event : nicegui.events.ScrollEventArguments
+            Scroll event of the scroll area
+        """
+        first = int(event.vertical_position * self.scale / self.height)
+        self.visible = int(event.vertical_container_size / self.height) + 1
+
+        start, stop = self.window
+        if start <= first and first + self.visible <= stop:
+            return
+
+        self.render(first)
+
+    def render(self, first):
+        """
+        Builds the HTML of the lines around a row of self.rows
+
+        Parameters
+        ----------
+        first : int
+            Index into self.rows of the first visible line
+        """
+        if self.logs is None:
+            return
+
+        # Polls parse on a worker thread, wait for any chunk being added to the store
+        with self.logs.lock:
+            # The store may have been cleared if the file was rotated
+            rows = self.rows[self.rows < len(self.logs)]
+
+            first = min(max(0, first), max(0, rows.size - 1))
+            start = max(0, first - self.overscan)
+            stop = min(rows.size, first + max(self.visible, 50) + self.overscan)
+            self.window = (start, stop)
+
+            built = self.logs.levels.build(rows[start:stop])
+
+        lines = []
+        for ts, level, message in built:
+            color = self.colors.get(level.strip(), "white")
+            message = message.replace("\n", " ↵ ")
+            lines.append(
+                f'<div class="whitespace-nowrap overflow-hidden text-ellipsis" style="height: {self.height}px">'
+                f'<span class="text-orange">{html.escape(ts)}</span>'
+                f'<span class="text-{color} whitespace-pre">{html.escape(level)}</span>'
+                f'<span>{html.escape(message)}</span>'
+                '</div>'
+            )
+
+        top = first * self.height / self.scale - (first - start) * self.height
+        self.lines.style(f"top: {max(0, top):.0f}px")
+        self.lines.set_content("".join(lines))
+
+    def jump(self, row):
+        """
+        Scrolls to a row of the store, or the nearest filtered row after it
+
+        Parameters
+        ----------
+        row : int
+            Row index of the store
+        """
+        index = int(np.searchsorted(self.rows, row))
+        self.area.scroll_to(pixels=index * self.height / self.scale)
+        self.render(index)
+
+    def bottom(self):
+        """
+        Scrolls to the last line
+        """
+        self.area.scroll_to(percent=1)
+        self.render(self.rows.size - self.visible)
+
+
+class Tab:
+    # File options, gathered with the other tabs in one batched WD query
+    query = {"find": ".log", "all": True}
+
     logs = None
+    switches = {}
+
+    # Jump options of the filtered markers, {row: label}
+    options = {}
 
     def __init__(self, parent):
         """
@@ -35,61 +178,255 @@ class Tab:
 
         with ui.column().classes("h-screen w-full"):
             with ui.expansion("Settings & Stats", value=True).classes("w-full"):
-                ui.chip(
-                    "Logs are loaded on-demand as they can cause the UI to lag. It is recommended to toggle off each option when done.",
-                    icon  = "warning",
-                    color = "yellow"
-                ).props('outline square')
+                with ui.row().classes("w-full items-center"):
+                    self.select = ui.select(
+                        label = "Log File",
+                        options = [],
+                        on_change = lambda e: self.load(e.value)
+                    ).classes("flex-1")
 
-                self.levels = ui.card().classes("border")
+                    self.markerOnly = ui.switch("Markers Only", on_change=self.filter)
+                    self.follow = ui.switch("Follow", on_change=self.toggleFollow)
 
-            self.lines = ui.element().classes("nicegui-log h-full")
+                    self.jumps = ui.select(
+                        label = "Jump to Marker",
+                        options = {},
+                        on_change = lambda e: self.jump(e.value)
+                    ).classes("flex-1")
 
-    async def reset(self, isofit=None):
-        self.lines.clear()
-        self.levels.clear()
+                with ui.row().classes("w-full") as self.levels:
+                    pass
 
-        if isofit:
-            self.logs = isofit.logs
+                with ui.row().classes("w-full") as self.markers:
+                    pass
 
-        try:
-            self.logs.parse()
-            self.logs.filter(None)
-            self.logs.build()
+            self.viewer = Viewer()
+
+        self.timer = ui.timer(Logs.interval, self.poll, active=False)
+
+    async def reset(self, *_):
+        """
+        Resets the log file options when the WD changes and loads the first log
+        """
+        files = sorted(await self.parent.files(Name))
+
+        current = self.select.value
+        self.select.set_options(files, value=current if current in files else None)
+
+        if not files:
+            self.error("No log file found. If it is outside of the directory, place it somewhere inside with the extension .log")
+        elif current == files[0]:
+            await self.load(current)
+        else:
+            # Loads via the on_change
+            self.select.value = files[0]
+
+    async def update(self, delta):
+        """
+        Updates the log file options when the WD changes on disk
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to the WD path
+        """
+        files = sorted(await self.parent.files(Name))
+        if files != self.select.options:
+            self.select.set_options(files, value=self.select.value if self.select.value in files else None)
 
-            self.populateLogs()
-            self.populateLevels()
+    def error(self, message):
+        """
+        Clears the viewer and shows an error in its place
+        """
+        self.logs = None
+        self.viewer.logs = None
+        self.viewer.setRows(np.empty(0, dtype=np.int64), keep=False)
+        self.viewer.lines.set_content(
+            f'<div class="text-red">{html.escape(message)}</div>'
+        )
+
+    async def load(self, file):
+        """
+        Parses a log file and displays it
+
+        Parameters
+        ----------
+        file : str
+            Path of the log file relative to the WD
+        """
+        if not file:
+            return
+
+        try:
+            logs = Logs(WD.path / file)
+            await WD.arun(logs.read)
         except:
             Logger.exception(f"Failed to load logs")
+            self.error("Could not parse the log file, see the terminal for more information")
+            return
+
+        self.logs = logs
+        self.viewer.logs = logs
+
+        self.populateFilters()
+        self.filter(keep=False)
+
+    async def poll(self):
+        """
+        Parses the lines appended to the log file and shows them
+        """
+        if self.logs is None:
+            return
+
+        count = len(self.logs)
+        levels = len(self.logs.levels.labels)
+        markers = len(self.logs.markers.labels)
+
+        # Rows starting before the previous count means the file was reloaded
+        rows = await WD.arun(self.logs.update)
+        if not rows and rows.start == count:
+            return
+
+        if levels != len(self.logs.levels.labels) or markers != len(self.logs.markers.labels):
+            # New switches are needed, which refilters every row
+            self.populateFilters()
+            self.filter()
+        elif rows.start < count:
+            self.updateCounts()
+            self.filter(keep=False)
+        else:
+            # Only the new rows need to be filtered
+            self.updateCounts()
+            self.extend(rows.start)
+
+        self.viewer.bottom()
+
+    def toggleFollow(self, event):
+        """
+        Starts or stops following the log file as it is written
+        """
+        self.timer.active = event.value
+
+    def toggle(self, container, key, state):
+        """
+        Toggles a level, format or marker then refilters the lines
+
+        Parameters
+        ----------
+        container : Levels | Markers
+            Container of the key
+        key : str
+            Label to toggle
+        state : bool
+            Enabled state
+        """
+        container.toggle(key, state=state)
+        self.filter()
+
+    def filterRows(self, start=0):
+        """
+        Selects the rows matching the enabled levels and, if markers only is set, the
+        enabled markers
+
+        Parameters
+        ----------
+        start : int, default=0
+            First row of the store to select from
+
+        Returns
+        -------
+        rows : np.ndarray
+            Selected rows of the store
+        jumps : dict
+            Rows of the enabled markers mapped to their jump option labels
+        """
+        with self.logs.lock:
+            mask = self.logs.levels.mask(start)
+            markers = self.logs.markers.mask(start)
+            if self.markerOnly.value:
+                mask &= markers
+
+            store = self.logs.store
+            found = np.flatnonzero(markers) + start
+            labels = [self.logs.markers.labels[code] for code in store["marker"][found].tolist()]
+
+            jumps = {
+                row: f"{label} @ {ts}"
+                for row, label, ts in zip(found.tolist(), labels, store.timestamps(found))
+            }
+
+        return np.flatnonzero(mask) + start, jumps
+
+    def filter(self, *_, keep=True):
+        """
+        Filters every row of the store and resets the jump options
+        """
+        if self.logs is None:
+            return
+
+        rows, self.options = self.filterRows()
+
+        self.viewer.setRows(rows, keep=keep)
+        self.jumps.set_options(dict(self.options), value=None)
+
+    def extend(self, start):
+        """
+        Filters the newly parsed rows and appends them to the viewer. The jump options
+        are only sent to the client if new markers were found
+
+        Parameters
+        ----------
+        start : int
+            First newly parsed row of the store
+        """
+        rows, jumps = self.filterRows(start)
+
+        if rows.size:
+            self.viewer.setRows(np.concatenate([self.viewer.rows, rows]))
+
+        if jumps:
+            self.options.update(jumps)
+            self.jumps.set_options(dict(self.options))
+
+    def jump(self, row):
+        """
+        Scrolls the viewer to a marker
+
+        Parameters
+        ----------
+        row : int | None
+            Row of the marker in the store
+        """
+        if row is not None:
+            self.viewer.jump(row)
+
+    def updateCounts(self):
+        """
+        Updates the line counts shown on the level switches
+        """
+        for key, count in self.logs.levels.counts().items():
+            if (switch := self.switches.get(key)):
+                switch.text = f"{key} ({count:,})"
 
-            self.logs = None
-            with self.lines:
-                ui.chip(
-                    "No log file found or could not parse. If it is outside of the directory, place it somewhere inside with the extension .log",
-                    icon  = "error",
-                    color = "red"
-                ).classes("w-full")
+    def populateFilters(self):
+        """
+        Creates the switches of the formats, levels and markers
+        """
+        levels = self.logs.levels
+        markers = self.logs.markers
 
-    def toggle(self, event):
-        self.logs.toggle(event.sender.text, event.value)
-        self.logs.build()
-        self.populateLogs()
+        self.switches = {}
 
-    def populateLevels(self):
         self.levels.clear()
         with self.levels:
-            for key, value in self.logs.format.items():
-                ui.switch(key, value=value, on_change=self.toggle)
-            for level, value in self.logs.selected.items():
-                ui.switch(level, value=value, on_change=self.toggle)
-
-    def populateLogs(self):
-        self.lines.clear()
-        with self.lines:
-            for (ts, lvl, msg) in self.logs.lines:
-                # color = self.logs.colors[lvl]
-                color = self.colors.get(lvl.strip(), "white")
-                with ui.row():
-                    ui.label(ts).classes("text-orange")
-                    ui.label(lvl).classes(f"text-{color}")
-                    ui.label(msg)
+            for key, value in levels.formats.items():
+                ui.switch(key, value=value, on_change=lambda e, key=key: self.toggle(levels, key, e.value))
+            for key, level in levels.dataclass.items():
+                self.switches[key] = ui.switch(key, value=level.enabled, on_change=lambda e, key=key: self.toggle(levels, key, e.value))
+
+        self.markers.clear()
+        with self.markers:
+            for key, marker in markers.dataclass.items():
+                ui.switch(key, value=marker.enabled, on_change=lambda e, key=key: self.toggle(markers, key, e.value))
+
+        self.updateCounts()
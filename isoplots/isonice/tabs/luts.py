@@ -7,7 +7,6 @@ import plotly.graph_objects as go
 import xarray as xr
 from nicegui import (
     observables,
-    run,
     ui
 )
 
@@ -21,6 +20,7 @@ except:
 from isoplots.isonice import WD
 from isoplots.isonice.utils import plots
 from isoplots.isonice.utils.enhancedinput import EnhancedInput
+from isoplots.isonice.utils.lists import sync
 
 
 Logger = logging.getLogger(__name__)
@@ -139,7 +139,7 @@ class MultiPlotLUT:
             "select": None,
         }
 
-    def load(self, file):
+    async def load(self, file):
         """
         Loads a LUT dataset and stores it in the cache
 
@@ -160,12 +160,12 @@ class MultiPlotLUT:
         if file not in self.cache:
             if Path(file).exists():
                 try:
-                    self.cache[file] = luts.load(file, mode="r", stack=False)
+                    self.cache[file] = await WD.arun(luts.load, file, mode="r", stack=False)
                 except Exception as e:
                     Logger.exception(f"Failed to load via luts.py")
             else:
                 try:
-                    self.cache[file] = WD.load(path=file).unstack()
+                    self.cache[file] = (await WD.aload(path=file)).unstack()
                 except Exception as e:
                     Logger.exception(f"Failed to load via WD")
 
@@ -225,7 +225,7 @@ class MultiPlotLUT:
         file : str
             LUT file to load
         """
-        lut = await run.io_bound(self.load, file)
+        lut = await self.load(file)
         if lut is None:
             return
 
@@ -268,7 +268,7 @@ class MultiPlotLUT:
         self.quants.disable()
         self.dims.disable()
 
-        lut = await run.io_bound(self.load, file)
+        lut = await self.load(file)
         if lut is None:
             return
 
@@ -393,6 +393,9 @@ class MultiPlotLUT:
 
 
 class Tab:
+    # File options, gathered with the other tabs in one batched WD query
+    query = {"find": "lut/.nc", "all": True}
+
     def __init__(self, parent):
         """
         Parameters
@@ -466,5 +469,16 @@ class Tab:
         Resets the the file options when the WD changes
         """
         self.files.clear()
-        self.files += await run.io_bound(WD.find, "lut/.nc", all=True)
+        self.files += await self.parent.files(Name)
         self.files.sort()
+
+    async def update(self, delta):
+        """
+        Adds and removes file options as the WD changes
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to the WD path
+        """
+        sync(self.files, await self.parent.files(Name))
@@ -1,19 +1,18 @@
 import json
 import logging
 import os
+import re
 from asyncio import sleep
 from pathlib import Path
 
-from nicegui import (
-    run,
-    ui
-)
+from nicegui import ui
 
 from isoplots.isonice import (
     Config,
     WD
 )
 from isoplots.isonice.utils.enhancedinput import EnhancedInput
+from isoplots.isonice.utils.wd import FileInfo
 
 Logger = logging.getLogger(__name__)
 
@@ -22,15 +21,37 @@ Icon = "home"
 Prio = 0
 
 
+def placeholder(id):
+    """
+    Creates the child node shown for a directory whose contents have not been
+    retrieved yet, which also lets the directory be expanded
+
+    Parameters
+    ----------
+    id : str
+        ID of the directory node
+
+    Returns
+    -------
+    dict
+        Placeholder node
+    """
+    return {"id": f"{id}/...", "label": "Loading...", "desc": None}
+
+
 def toNiceGUITree(tree=None, *, path=None, nodes=None):
     """
     Recursively converts an IsofitWD tree (with info) into a NiceGUI-compatible data
     structure for the tree component
 
+    Directories whose contents were not retrieved ({name: None}) are marked as not
+    loaded and given a placeholder child so they can be fetched when expanded
+
     Parameters
     ----------
     tree : dict, default=None
-        Tree object created by IsofitWD.getTree(info=True)
+        Tree object created by IsofitWD.getTree(info=True). Defaults to the first
+        level of the WD
     nodes : list, default=None
         Converted nodes for the tree component, this likely should be left as the
         default
@@ -41,7 +62,7 @@ def toNiceGUITree(tree=None, *, path=None, nodes=None):
         Converted nodes for the tree component
     """
     if tree is None:
-        tree = WD.getTree(info=True)
+        tree = WD.getTree(info=True, depth=1)
 
     if nodes is None:
         nodes = [{"id": "root", "desc": None, "children": []}]
@@ -56,10 +77,14 @@ def toNiceGUITree(tree=None, *, path=None, nodes=None):
                         "desc"    : subdir.info,
                         "children": []
                     })
-                    toNiceGUITree(files,
-                        path  = nodes[-1]["id"],
-                        nodes = nodes[-1]["children"]
-                    )
+                    if files is None:
+                        nodes[-1]["loaded"] = False
+                        nodes[-1]["children"].append(placeholder(nodes[-1]["id"]))
+                    else:
+                        toNiceGUITree(files,
+                            path  = nodes[-1]["id"],
+                            nodes = nodes[-1]["children"]
+                        )
             else:
                 nodes.append({
                     "id"   : f"{path}/{file.name}",
@@ -70,6 +95,53 @@ def toNiceGUITree(tree=None, *, path=None, nodes=None):
     return nodes
 
 
+def filterTree(text, limit=1000):
+    """
+    Builds the NiceGUI tree nodes of only the WD files whose relative path contains
+    the filter text, searched against the WD file index
+
+    Parameters
+    ----------
+    text : str
+        Case-insensitive text to filter for
+    limit : int, default=1000
+        Maximum number of files to include
+
+    Returns
+    -------
+    nodes : list
+        Converted nodes for the tree component
+    total : int
+        Total number of matching files, which may exceed the limit
+    """
+    files = WD.index.sync().search(re.compile(re.escape(text), re.IGNORECASE))
+
+    # Nest the matching paths, None marking a file
+    nested = {}
+    for file in files[:limit]:
+        *dirs, name = Path(file).parts
+        level = nested
+        for dir in dirs:
+            level = level.setdefault(dir, {})
+        level[name] = None
+
+    def convert(level, path):
+        tree = []
+        for name, sub in level.items():
+            subpath = os.path.join(path, name)
+            name = FileInfo(name, WD.info(subpath))
+            if sub is None:
+                tree.append(name)
+            else:
+                tree.append({name: convert(sub, subpath)})
+        return tree
+
+    nodes = [{"id": "root", "label": str(WD.path), "desc": None, "children": []}]
+    toNiceGUITree(convert(nested, ""), path=".", nodes=nodes[-1]["children"])
+
+    return nodes, len(files)
+
+
 class EnhancedTree(ui.tree):
     @property
     def root(self):
@@ -196,6 +268,10 @@ class EnhancedTree(ui.tree):
 
 
 class Tab:
+    tree = None
+    nodes = None
+    expanded = None
+
     def __init__(self, parent):
         """
         Parameters
@@ -223,7 +299,7 @@ class Tab:
 
         self.preview = ui.column().classes("w-full")
 
-        self.filter = ui.input("filter").classes("w-full")
+        self.filter = ui.input("filter", on_change=self.filterTree).classes("w-full")
         self.filter.visible = False
         self.directoryTree = ui.scroll_area().classes("w-full h-full")
         self.stepper()
@@ -331,8 +407,7 @@ class Tab:
                     ui.label("Depending on the depth of the chosen directory, this may take a moment")
                 with ui.step("Building directory tree"):
                     ui.skeleton().classes("w-full")
-                    ui.label("This typically takes the longest to parse the directory tree into a readable format")
-                    ui.label("Please be patient, there is no progress indicator but it is working")
+                    ui.label("Only the top level of the directory tree is built, deeper levels are retrieved when expanded")
                     ui.label("If this takes more than two minutes, please open an issue on the repository with a copy of your terminal logs")
                 with ui.step("Rendering UI"):
                     ui.skeleton().classes("w-full")
@@ -357,15 +432,19 @@ class Tab:
         stepper = self.stepper()
         stepper.next() # Setting path, done
 
-        await run.io_bound(WD.reset, path, recursive=True)
+        # Opt-in persistent directory scans, eg. [Cache] scans = true
+        scans = Config.get("Cache", "scans", fallback=None)
+
+        await WD.areset(path, recursive=True, scan_cache=scans)
 
         # Set the path as the working directory for the overall Python instance
         os.chdir(path)
 
         self.parent.resetTabs()
+        self.parent.watch()
         stepper.next() # Recursively search, done
 
-        data = await run.io_bound(toNiceGUITree)
+        data = toNiceGUITree(await WD.agetTree(info=True, depth=1))
         data[0]["label"] = str(WD.path)
         stepper.next() # Building tree, done
 
@@ -382,7 +461,12 @@ class Tab:
                 # ui.label("Click on an output file below to jump to an interactive component for that file [Work in Progress]")
                 # ui.label("Detected paths:")
 
-                self.tree = EnhancedTree(data, on_select=lambda e: self.navToFile(e)) \
+                self.nodes = data
+                self.expanded = None
+                self.tree = EnhancedTree(data,
+                    on_select = self.navToFile,
+                    on_expand = self.expand
+                ) \
                 .classes("border h-full w-full") \
                 .props("no-transition dense")
 
@@ -394,12 +478,158 @@ class Tab:
                     <span :props="props">{{ props.node.desc }}</span>
                 ''')
 
+                self.filter.set_value("")
                 self.filter.visible = True
-                self.filter.bind_value_to(self.tree, "filter")
             else:
                 ui.icon("report_problem").tooltip("An error has occurred")
 
-    def navToFile(self, event):
+    def findLoaded(self, id, nodes=None):
+        """
+        Finds a directory node of the unfiltered tree whose contents were retrieved
+
+        Parameters
+        ----------
+        id : str
+            ID of the node to find
+        nodes : list, default=None
+            Nodes being searched, defaults to the root of the tree
+
+        Returns
+        -------
+        dict | None
+            The node if it is loaded
+        """
+        if nodes is None:
+            nodes = self.nodes
+
+        for node in nodes:
+            if not node.get("loaded", True) or "children" not in node:
+                continue
+
+            if node["id"] == id:
+                return node
+
+            # IDs are the paths of the nodes, only descend into the ancestors
+            if node["id"] == "root" or id.startswith(f"{node['id']}/"):
+                return self.findLoaded(id, node["children"])
+
+    async def loadNode(self, node):
+        """
+        Retrieves the contents of a directory node from the WD. Subdirectories that
+        were already loaded are kept as-is so their expansion is preserved
+
+        Parameters
+        ----------
+        node : dict
+            Directory node to load
+        """
+        id = node["id"]
+        path = "" if id == "root" else id[2:]
+
+        tree = await WD.agetSubtree(path, info=True)
+        children = toNiceGUITree(tree, path="." if id == "root" else id, nodes=[])
+
+        current = {child["id"]: child for child in node["children"]}
+        for i, child in enumerate(children):
+            if (old := current.get(child["id"])) and old.get("loaded", True) and "children" in old and "children" in child:
+                old["desc"] = child["desc"]
+                children[i] = old
+
+        node["children"] = children
+        node["loaded"] = True
+
+    async def expand(self, event):
+        """
+        Retrieves the contents of the newly expanded directories
+
+        Parameters
+        ----------
+        event : ValueChangeEventArguments
+            Event containing the IDs of the expanded nodes
+        """
+        if self.expanded is not None:
+            # Filtered trees are complete
+            return
+
+        loaded = False
+        for id in event.value:
+            node = self.tree.findNode(id)
+            if node and node.get("loaded", True) is False:
+                await self.loadNode(node)
+                loaded = True
+
+        if loaded:
+            self.tree.update()
+
+    async def filterTree(self, event):
+        """
+        Filters the directory tree on the server against the WD file index, only
+        sending the matching files to the browser
+
+        Parameters
+        ----------
+        event : ValueChangeEventArguments
+            Event containing the filter text
+        """
+        if self.tree is None:
+            return
+
+        text = event.value
+        if not text:
+            if self.expanded is not None:
+                self.tree.props["nodes"] = self.nodes
+                self.tree.props["expanded"] = self.expanded
+                self.expanded = None
+                self.tree.update()
+            return
+
+        nodes, total = await WD.arun(filterTree, text)
+
+        # The filter was changed while searching
+        if self.filter.value != text:
+            return
+
+        Logger.debug(f"Filter {text!r} matched {total} files")
+
+        if self.expanded is None:
+            self.expanded = list(self.tree.props.get("expanded", []))
+
+        self.tree.props["nodes"] = nodes
+        self.tree.props["expanded"] = [
+            node["id"] for node in self.tree.nodes() if "children" in node
+        ]
+        self.tree.update()
+
+    async def update(self, delta):
+        """
+        Reloads the directories of the tree affected by a change to the WD, leaving
+        the rest of the tree untouched. Directories that have not been loaded yet are
+        skipped as they will be retrieved when expanded
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to the WD path
+        """
+        if self.tree is None:
+            return
+
+        parents = {
+            os.path.dirname(path)
+            for path in delta.added + delta.removed
+        }
+
+        reloaded = False
+        for parent in sorted(parents):
+            id = f"./{parent}" if parent else "root"
+            if node := self.findLoaded(id):
+                await self.loadNode(node)
+                reloaded = True
+
+        if reloaded and self.expanded is None:
+            self.tree.update()
+
+    async def navToFile(self, event):
         """
         TODO
 
@@ -412,6 +642,9 @@ class Tab:
         # Find the source node clicked
         if node := self.tree.findNode(name):
             if "children" in node:
+                if node.get("loaded", True) is False:
+                    await self.loadNode(node)
+
                 siblings = self.tree.findSiblings(name)
 
                 self.tree.collapse(siblings)
@@ -19,6 +19,7 @@ from isoplots.isonice import (
 )
 from isoplots.isonice.utils import plots
 from isoplots.isonice.utils.enhancedinput import EnhancedInput
+from isoplots.isonice.utils.lists import sync
 
 
 Logger = logging.getLogger(__name__)
@@ -136,8 +137,9 @@ class Spectra:
                     spectra = data.isel(x=self.x, y=self.y)
                     spectra = spectra.rename(wavelength='Wavelength')
 
-                    # Remove minimum values
-                    if self.trim.value:
+                    # Fill values are masked by the backend, only fall back to removing
+                    # the minimum values when the product does not define one
+                    if self.trim.value and "_FillValue" not in data.encoding:
                         spectra = spectra.where(spectra != spectra.min())
 
                     spectra.name = "Reflectance"
@@ -252,6 +254,14 @@ class Spectra:
 class Tab:
     plot = None
 
+    # Display size in pixels used to pick the overview level of the image, and the
+    # decimation factor of the level currently shown
+    display = 1024
+    factor = 1
+
+    # File options, gathered with the other tabs in one batched WD query
+    query = {"find": "rfl", "all": True, "exc": ["hdr", "subs"]}
+
     def __init__(self, parent):
         """
         Parameters
@@ -423,12 +433,23 @@ class Tab:
         self.spectras.clear()
 
         self.files.clear()
-        self.files += await run.io_bound(WD.find, "rfl", all=True, exc=["hdr", "subs"])
+        self.files += await self.parent.files(Name)
         self.files.sort()
 
         if self.files:
             self.inputs[0]["select"].set_value(self.files[0])
 
+    async def update(self, delta):
+        """
+        Adds and removes file options as the WD changes
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to the WD path
+        """
+        sync(self.files, await self.parent.files(Name))
+
     async def resetImage(self):
         """
         Resets the image, deleting all annotations and spectra plots
@@ -439,7 +460,7 @@ class Tab:
 
         await self.createImage()
 
-    def load(self, path):
+    async def load(self, path):
         """
         TODO
 
@@ -452,13 +473,13 @@ class Tab:
         Logger.debug(f"Loading {path}")
         if Path(path).exists():
             try:
-                return Loaders.envi(path)
-            except:
+                return await WD.arun(Loaders.envi, path)
+            except Exception:
                 Logger.exception("Failed to load envi")
         else:
             try:
-                return WD.load(path=path)
-            except:
+                return await WD.aload(path=path)
+            except Exception:
                 Logger.exception("Failed to load via WD")
 
     async def loadFile(self, file, row):
@@ -478,7 +499,7 @@ class Tab:
 
         self.loading.visible = True
 
-        data = await run.io_bound(self.load, path=file)
+        data = await self.load(path=file)
 
         if data is None:
             Logger.error("No data available, returning")
@@ -543,7 +564,13 @@ class Tab:
         if self.active:
             try:
                 bands = [self.r.value, self.g.value, self.b.value]
-                rgb = self.active["data"].sel(band=bands).transpose("y", "x", "band")
+
+                # Read only the RGB bands from the file rather than the whole cube
+                file = Path(self.active["file"])
+                if not file.exists():
+                    file = WD.path / file
+                rgb = Loaders.bands(file, bands, size=self.display).transpose("y", "x", "band")
+                self.factor = rgb.attrs["factor"]
 
                 lower, upper = 2, 98
                 if self.brighten.value:
@@ -555,9 +582,9 @@ class Tab:
                 rgb = (rgb - vmin) / (vmax - vmin)
                 rgb = rgb.clip(0, 1)
 
-                # Convert to pixel coords for easier pixel selection
-                rgb["x"] = range(rgb.x.size)
-                rgb["y"] = range(rgb.y.size)
+                # Convert to full resolution pixel coords for easier pixel selection
+                rgb["x"] = np.arange(rgb.x.size) * self.factor
+                rgb["y"] = np.arange(rgb.y.size) * self.factor
 
                 fig = px.imshow(rgb, template="plotly_dark")
             except:
@@ -667,8 +694,9 @@ class Tab:
 
         # Clicked a pixel on the image
         if data["type"] == "image":
+            # Scale from the overview level to the full resolution
             y, x = point["pointIndex"]
-            await self.addAnotation(x, y)
+            await self.addAnotation(x * self.factor, y * self.factor)
 
         # Clicked an annotation
         elif self.annoDelClick.value and data["type"] == "scatter":
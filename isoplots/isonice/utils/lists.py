@@ -0,0 +1,21 @@
+def sync(current, new):
+    """
+    Updates a list in place to match the items of another, only removing and adding
+    the items that differ. For NiceGUI ObservableLists this limits the change events
+    to the actual changes instead of clearing and re-adding everything
+
+    Parameters
+    ----------
+    current : list
+        List to update
+    new : list
+        Items the list should contain
+    """
+    new = set(new)
+
+    for item in [item for item in current if item not in new]:
+        current.remove(item)
+
+    if added := new - set(current):
+        current += sorted(added)
+        current.sort()
@@ -4,14 +4,26 @@ ISOFIT Output Parser
 
 from __future__ import annotations
 
+import asyncio
+import bisect
+import hashlib
 import json
 import logging
 import os
 import re
-from collections import defaultdict
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import warnings
+from collections import OrderedDict, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime as dtt
-from functools import cached_property
+from datetime import timedelta
+from functools import cached_property, partial
 from pathlib import Path
 from types import SimpleNamespace
 
@@ -19,7 +31,8 @@ import numpy as np
 import pandas as pd
 import xarray as xr
 from spectral.io import envi as _envi
-from xarray.backends import BackendEntrypoint
+from xarray.backends import BackendArray, BackendEntrypoint
+from xarray.core import indexing
 
 try:
     # Isofit v3
@@ -28,11 +41,31 @@ except:
     # Isofit v4
     from isofit.luts import reader as luts
 
+try:
+    # Optional, enables inotify-based watching
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+try:
+    # Optional, enables the ZarrCache
+    import zarr
+except ImportError:
+    zarr = None
+
+try:
+    # Optional, enables chunked conversions and reads
+    import dask
+except ImportError:
+    dask = None
+
 
 class Loaders:
     """
     Collection of loader functions for common products of ISOFIT
     """
+    # Optional ZarrCache to serve ENVI products from, see ZarrCache.create
+    zarr = None
 
     @classmethod
     def text(cls, file):
@@ -75,7 +108,7 @@ class Loaders:
         return luts.load(file)
 
     @classmethod
-    def envi(cls, file):
+    def envi(cls, file, chunks=None, window=None, bands=None, cache=True):
         """
         Loads an ENVI file
 
@@ -83,18 +116,38 @@ class Loaders:
         ----------
         file : pathlib.Path
             Path to file to load
+        chunks : int | dict | str, default=None
+            Passed to xr.open_dataset to load as dask arrays. Use {} for the
+            interleave-aware chunks of the file, see EnviBackendArray.preferredChunks
+        window : tuple[int, int, int, int], default=None
+            Only read the pixel window (x0, y0, width, height), clipped to the extent
+            of the file. The x and y coordinates are the pixel indices of the file
+        bands : list[int], default=None
+            Only read these band labels, as used by .sel(band=...)
+        cache : bool, default=True
+            Serve from the Zarr cache if it is enabled, converting the product on its
+            first access. Disable to open the ENVI lazily without converting it
 
         Returns
         -------
         xr.Dataset | xr.DataArray
             Loaded xarray object from the ENVI. If the Dataset is only one variable,
-            returns the DataArray of that variable instead
+            returns the DataArray of that variable instead. Windowed reads always
+            return the DataArray, read into memory
         """
         file = Path(file)
         if file.suffix:
             file = file.with_suffix("")
 
-        ds = xr.open_dataset(file, engine="envi")
+        if window is not None or bands is not None:
+            return cls.window(file, window, bands)
+
+        ds = None
+        if cache and cls.zarr is not None:
+            ds = cls.zarr.open(file)
+
+        if ds is None:
+            ds = xr.open_dataset(file, engine="envi", chunks=chunks)
 
         # Return the DataArray if it is a dataset of one variable
         # Such as cases of `band_data`
@@ -103,955 +156,4755 @@ class Loaders:
         return ds
 
     @classmethod
-    def csv(cls, file, *args, **kwargs):
+    def bands(cls, file, bands, size=None, build=None):
         """
-        Loads a CSV file using Pandas
+        Reads only the requested bands of an ENVI file, such as for an RGB image,
+        using strided reads. See EnviBackendArray.readBands
 
         Parameters
         ----------
         file : pathlib.Path
             Path to file to load
-        *args : list, default=[]
-            Additional arguments to pass to pd.read_csv
-        **kargs : dict, default={}
-            Additional key-word arguments to pass to pd.read_csv
+        bands : list[int]
+            Band labels to read, as used by .sel(band=...)
+        size : int, default=None
+            Display size in pixels. If set, reads from the coarsest overview level
+            that still satisfies this size, see Overviews.select
+        build : bool, default=None
+            Build the overviews first if they do not exist yet. Defaults to
+            Overviews.enabled, see Overviews.configure
 
         Returns
         -------
-        pd.DataFrame
-            Pandas DataFrame of the CSV
+        xr.DataArray
+            Data of the bands with dimensions (band, y, x). The `factor` attribute is
+            the decimation factor of the level that was read, 1 for full resolution
         """
-        return pd.read_csv(file, *args, **kwargs)
+        file = Path(file)
+        if file.suffix:
+            file = file.with_suffix("")
 
+        factor = 1
+        if size:
+            if build is None:
+                build = Overviews.enabled
 
-class EnviBackendEntrypoint(BackendEntrypoint):
-    """
-    Uses spectral.io.envi to load ISOFIT output rasters
+            overviews = Overviews(file)
+            if build and not overviews.levels():
+                try:
+                    overviews.build()
+                except OSError:
+                    logging.getLogger("Loaders").exception(f"Failed to build overviews for {file}")
 
-    Accessible via engine="envi" after installing ISOFIT
+            file, factor = overviews.select(size)
 
-    Specifically structured to emulate the return of rasterio's engine for xarray to
-    ease switching between them
-    """
+        data, coords, meta = EnviBackendEntrypoint.parse(file)
+        meta["factor"] = factor
+
+        index, coords = cls.selectBands(coords, bands)
 
-    description = "Uses spectral.io.envi to load"
-    url = None
+        return xr.DataArray(EnviBackendEntrypoint.mask(data.readBands(index), meta),
+            name = "band_data",
+            dims = data.dims,
+            coords = coords,
+            attrs = meta
+        )
 
-    def open_dataset(self, filename_or_obj, *, drop_variables=None):
+    @classmethod
+    def window(cls, file, window=None, bands=None):
         """
+        Reads a pixel window and/or a subset of bands of an ENVI file directly from
+        its memmap, only reading the requested bytes
+
         Parameters
         ----------
-        filename_or_obj : str
-            String path to an ISOFIT output product
-        drop_variables : any, default=None
-            Unused required parameter
-        """
-        filename_or_obj = Path(filename_or_obj)
+        file : pathlib.Path
+            Path to the ENVI file, without the .hdr extension
+        window : tuple[int, int, int, int], default=None
+            Pixel window (x0, y0, width, height), clipped to the extent of the file.
+            Defaults to the whole extent
+        bands : list[int], default=None
+            Band labels to read, defaults to every band
 
-        envi = _envi.open(filename_or_obj.with_suffix(".hdr"))
-        data = envi.open_memmap()
-        meta = envi.metadata.copy()
+        Returns
+        -------
+        xr.DataArray
+            Data with dimensions (band, y, x) with the x and y coordinates as the
+            pixel indices of the file
+        """
+        data, coords, meta = EnviBackendEntrypoint.parse(file)
+        _, rows, cols = data.shape
+
+        if bands is None:
+            bands = list(coords["band"])
+        index, coords = cls.selectBands(coords, bands)
+
+        x0, y0, w, h = window or (0, 0, cols, rows)
+        x = range(max(0, x0), min(cols, x0 + w))
+        y = range(max(0, y0), min(rows, y0 + h))
+
+        key = indexing.OuterIndexer((
+            np.asarray(index),
+            slice(y.start, y.stop),
+            slice(x.start, x.stop),
+        ))
+
+        coords["y"] = np.asarray(y)
+        coords["x"] = np.asarray(x)
+
+        return xr.DataArray(EnviBackendEntrypoint.mask(data[key], meta),
+            name = "band_data",
+            dims = data.dims,
+            coords = coords,
+            attrs = meta
+        )
 
-        dims = ("y", "x", "band")
-        coords = {
-            "band": range(1, data.shape[-1] + 1)
-        }
+    @staticmethod
+    def selectBands(coords, bands):
+        """
+        Selects band labels from the coordinates of EnviBackendEntrypoint.parse
 
-        if "wavelength" in meta:
-            wl = np.array(meta.pop("wavelength")).astype(float)
-            fwhm = np.array(meta.pop("fwhm")).astype(float)
+        Parameters
+        ----------
+        coords : dict
+            Coordinates of the band dimension, the band labels under "band"
+        bands : list[int]
+            Band labels to select
 
-            # If the lengths match, tie these to the band dim
-            if len(wl) == data.shape[-1]:
-                coords["wavelength"] = ("band", wl)
-                coords["fwhm"] = ("band", fwhm)
-            else:
-                meta["wavelength"] = wl
-                meta["fwhm"] = fwhm
+        Returns
+        -------
+        index : list[int]
+            Indices of the selected bands
+        coords : dict
+            Coordinates of the selected bands
+        """
+        coords = dict(coords)
+        labels = list(coords.pop("band"))
+        index = [labels.index(band) for band in bands]
 
-        ds = xr.Dataset({"band_data": (dims, data)}, coords=coords, attrs=meta)
-        ds = ds.transpose("band", "y", "x")
+        coords = {
+            key: (dim, np.asarray(values)[index])
+            for key, (dim, values) in coords.items()
+        }
+        coords["band"] = list(bands)
 
-        ds["band_data"].attrs = meta
+        return index, coords
 
-        return ds
+    @classmethod
+    def csv(cls, file, *args, **kwargs):
+        """
+        Loads a CSV file using Pandas
 
+        Parameters
+        ----------
+        file : pathlib.Path
+            Path to file to load
+        *args : list, default=[]
+            Additional arguments to pass to pd.read_csv
+        **kargs : dict, default={}
+            Additional key-word arguments to pass to pd.read_csv
 
-@dataclass(frozen=True)
-class FileInfo:
-    name: str
-    info: Any
+        Returns
+        -------
+        pd.DataFrame
+            Pandas DataFrame of the CSV
+        """
+        return pd.read_csv(file, *args, **kwargs)
 
 
-class FileFinder:
-    """
-    Utility class to find files under a directory using various matching strategies
-    This must be subclassed and define the following:
-        function _load       - The loader for a passed file
-        attribute extensions - A list of extensions to retrieve
+@dataclass
+class EnviHeader:
     """
-    path = None
-    cache = None
-    patterns = {}
-    _compiled = []
-    extensions = []
+    Parsed ENVI header along with the parameters needed to read its binary file
 
-    def __init__(self, path=None, cache=True, extensions=[], patterns={}):
+    Headers are parsed by a fast parser that converts the common ISOFIT keys
+    directly, falling back to spectral for anything it cannot handle. Parsed headers
+    are cached process-wide by path and modification time via EnviHeader.read
+    """
+    path: str
+    filename: str
+    metadata: dict
+    shape: tuple
+    dtype: np.dtype
+    offset: int
+    interleave: str
+    wavelength: np.ndarray = None
+    fwhm: np.ndarray = None
+
+    # Process-wide cache of {path: (mtime, EnviHeader)}
+    cache = OrderedDict()
+    limit = 256
+    lock = threading.Lock()
+
+    @staticmethod
+    def parseText(text):
         """
+        Parses the text of an ENVI header into a metadata dict the same as
+        spectral.io.envi.read_envi_header: keys are lowercased, brace values are
+        split on commas except for the description
+
         Parameters
         ----------
-        path : str, default=None
-            Path to directory to operate on
-        cache : bool, default=True
-            Enable caching objects in the .load function
-        extensions : list, default=[]
-            File extensions to retrieve when searching
-        """
-        if path is not None:
-            self.path = Path(path)
-
-        if extensions:
-            self.extensions = extensions
-
-        if not self.extensions:
-            raise AttributeError("One or more extensions must be defined")
-
-        if patterns:
-            self.patterns = patterns
-
-        if self.patterns:
-            self._compiled = [(re.compile(p), desc) for p, desc in self.patterns.items()]
-
-        if cache:
-            self.cache = {}
+        text : str
+            Header text
 
-        self.log = logging.getLogger(str(self))
+        Returns
+        -------
+        dict
+            Header metadata
+        """
+        if not text.startswith("ENVI"):
+            raise ValueError("Not an ENVI header, missing the ENVI signature")
+
+        meta = {}
+        lines = text.splitlines()[1:]
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            i += 1
+
+            if "=" not in line:
+                continue
+
+            key, value = line.split("=", 1)
+            key = key.strip().lower()
+            value = value.strip()
+
+            if value.startswith("{"):
+                # Brace values may span many lines
+                parts = [value]
+                while not parts[-1].rstrip().endswith("}"):
+                    if i == len(lines):
+                        raise ValueError(f"Unterminated value for header key {key!r}")
+                    parts.append(lines[i].strip())
+                    i += 1
+
+                value = "\n".join(parts).strip()[1:-1].strip()
+                if key == "description":
+                    meta[key] = value
+                else:
+                    meta[key] = [item.strip() for item in value.split(",")]
+            else:
+                meta[key] = value
 
-    def __repr__(self):
-        return f"<{self.__class__.__name__} [{self.path}]>"
+        return meta
 
-    def info(self, file):
+    @classmethod
+    def parse(cls, path):
         """
-        Retrieves known information for a file if its name matches one of the set
-        patterns
+        Parses an ENVI header file
 
         Parameters
         ----------
-        file : str
-            File name to compare against the patterns dict keys
+        path : str
+            Path to the .hdr file
 
         Returns
         -------
-        any
-            Returns the value if a regex key in the patterns dict matches the file name
+        EnviHeader
         """
-        for pattern, desc in self._compiled:
-            if pattern.search(file):
-                return desc
+        path = str(path)
 
-    @cached_property
-    def files(self):
-        """
-        Passthrough attribute to calling getFlat()
-        """
-        return self.getFlat()
+        try:
+            with open(path) as f:
+                meta = cls.parseText(f.read())
+
+            dtype = np.dtype(_envi.envi_to_dtype[str(meta["data type"])])
+            if int(meta.get("byte order", 0)):
+                dtype = dtype.newbyteorder(">")
+            else:
+                dtype = dtype.newbyteorder("<")
+
+            header = cls(
+                path = path,
+                filename = cls.findData(path, meta.get("interleave", "")),
+                metadata = meta,
+                shape = (int(meta["bands"]), int(meta["lines"]), int(meta["samples"])),
+                dtype = dtype,
+                offset = int(meta.get("header offset", 0)),
+                interleave = meta.get("interleave", "bsq").lower(),
+            )
+        except (ValueError, KeyError):
+            logging.getLogger("EnviHeader").debug(f"Falling back to spectral to parse {path}")
+
+            envi = _envi.open(path)
+            meta = envi.metadata.copy()
+            header = cls(
+                path = path,
+                filename = envi.filename,
+                metadata = meta,
+                shape = (envi.nbands, envi.nrows, envi.ncols),
+                dtype = np.dtype(envi.dtype),
+                offset = envi.offset,
+                interleave = meta.get("interleave", "bsq").lower(),
+            )
+
+        # Convert the long spectral lists once
+        if "wavelength" in meta:
+            header.wavelength = np.array(meta["wavelength"], dtype=float)
+        if "fwhm" in meta:
+            header.fwhm = np.array(meta["fwhm"], dtype=float)
+
+        return header
 
-    def extMatches(self, file):
+    @staticmethod
+    def findData(path, interleave=""):
         """
-        Checks if a given file's extension matches in the list of extensions
-        Special extension cases include:
-            "*" = Match any file
-            ""  = Only match files with no extension
+        Finds the binary file of a header, which shares its name without the .hdr
+        extension or with one of the extensions known to spectral
 
         Parameters
         ----------
-        file : pathlib.Path
-            File path to check
+        path : str
+            Path to the .hdr file
+        interleave : str, default=""
+            Interleave of the file, also checked as an extension
 
         Returns
         -------
-        bool
-            True if it matches one of the extensions, False otherwise
+        str
+            Path to the binary file
         """
-        try:
-            if file.is_dir():
-                return False
+        base = os.path.splitext(path)[0]
 
-            if "*" in self.extensions:
-                return True
+        exts = [ext.lower() for ext in _envi.KNOWN_EXTS] + [interleave.lower()]
+        exts = [""] + exts + [ext.upper() for ext in exts]
+        for ext in exts:
+            if os.path.isfile(name := f"{base}.{ext}" if ext else base):
+                return name
 
-            return file.suffix in self.extensions
-        except:
-            self.log.exception(f"Failed to evaluate extension match: {file}")
+        raise ValueError(f"Unable to find the binary file for header: {path}")
 
-    def getTree(self, info=False, *, path=None, tree=None):
+    @classmethod
+    def read(cls, path):
         """
-        Recursively finds the files under a directory as a dict tree
+        Retrieves a parsed header from the process-wide cache, parsing it if it is
+        not cached or was modified since
 
         Parameters
         ----------
-        info : bool, default=False
-            Return the found files as objects with their respective info
-        path : pathlib.Path, default=None
-            Directory to search, defaults to self.path
-        tree : dict, default=None
-            Tree structure of discovered files
+        path : str
+            Path to the .hdr file
 
         Returns
         -------
-        tree : dict
-            Tree structure of discovered files. The keys are the directory names and
-            the list values are the found files
+        EnviHeader
         """
-        path = Path(path or self.path)
-        tree = tree if tree is not None else []
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
 
-        try:
-            with os.scandir(path) as scan:
-                for item in scan:
-                    name = item.name
-                    if info:
-                        name = FileInfo(name, self.info(name))
+        with cls.lock:
+            if (cached := cls.cache.get(path)) and cached[0] == mtime:
+                cls.cache.move_to_end(path)
+                return cached[1]
 
-                    if item.is_dir():
-                        subtree = []
-                        tree.append({name: subtree})
-                        self.getTree(info=info, path=item.path, tree=subtree)
+        header = cls.parse(path)
 
-                    elif self.extMatches(Path(item.path)):
-                        tree.append(name)
+        with cls.lock:
+            cls.cache[path] = (mtime, header)
+            cls.cache.move_to_end(path)
+            while len(cls.cache) > cls.limit:
+                cls.cache.popitem(last=False)
 
-        except Exception as e:
-            self.log.exception(f"Error reading path {path}")
+        return header
 
-        return tree
 
-    def getFlat(self, path=None):
+class EnviBackendArray(BackendArray):
+    """
+    Lazily indexed view of an ENVI binary file with the dimensions (band, y, x)
+
+    Nothing is read until the array is indexed, at which point a memmap of the file
+    is indexed in its source interleave so that only the requested bytes are read.
+    Supports xarray's basic, outer and vectorized indexing, the latter via outer
+    indexing followed by an in-memory step
+    """
+    dims = ("band", "y", "x")
+
+    # Axis order of the binary file for each interleave
+    layouts = {
+        "bsq": ("band", "y", "x"),
+        "bil": ("y", "band", "x"),
+        "bip": ("y", "x", "band"),
+    }
+
+    def __init__(self, filename, dtype, offset, shape, interleave):
         """
-        Finds all the files under a directory as a flat list with the base path removed
+        Parameters
+        ----------
+        filename : str
+            Path to the ENVI binary file
+        dtype : np.dtype
+            Data type of the file, including its byte order
+        offset : int
+            Header offset in bytes
+        shape : tuple[int, int, int]
+            Shape as (band, y, x)
+        interleave : str
+            One of "bsq", "bil", "bip"
+        """
+        self.filename = str(filename)
+        self.dtype = np.dtype(dtype)
+        self.offset = offset
+        self.shape = tuple(shape)
+        self.interleave = interleave.lower()
+        self.layout = self.layouts[self.interleave]
+
+    def preferredChunks(self, size):
+        """
+        Determines chunks that follow the interleave of the file so that each chunk is
+        a contiguous run of bytes, or close to it:
+            BSQ - One band per chunk
+            BIL - Blocks of whole lines
+            BIP - Blocks of whole pixels, as many lines as fit
 
         Parameters
         ----------
-        path : pathlib.Path or None
-            Root path to search, defaults to self.path
+        size : int
+            Target size of a chunk in bytes
 
         Returns
         -------
-        files : list[str]
-            Flat list of matching file paths relative to base
+        dict
+            Chunk size per dimension
         """
-        base = Path(path or self.path)
-        base_len = len(str(base)) + 1  # precompute for slicing
+        bands, rows, cols = self.shape
+        item = self.dtype.itemsize
 
-        files = []
-        try:
-            for root, _, filenames in os.walk(base):
-                for name in filenames:
-                    path = Path(root) / name
-                    if self.extMatches(path):
-                        files.append(str(path)[base_len:])
-        except:
-            self.log.exception(f"Error scanning directory tree: {base}")
+        if self.interleave == "bsq":
+            lines = max(1, min(rows, size // (cols * item)))
+            return {"band": 1, "y": lines, "x": cols}
 
-        return sorted(files)
+        line = bands * cols * item
+        if self.interleave == "bip" and line > size:
+            # A single line is too large, split it into blocks of whole pixels
+            return {"band": bands, "y": 1, "x": max(1, size // (bands * item))}
 
-    def ifin(self, name, all=False, exc=[]):
+        return {"band": bands, "y": max(1, min(rows, size // line)), "x": cols}
+
+    def memmap(self):
         """
-        Simple if name in filename match
+        Opens a read-only memmap of the file in its source interleave. Opening is
+        cheap, no data is read until it is indexed
+
+        Returns
+        -------
+        np.memmap
+        """
+        shape = tuple(self.shape[self.dims.index(dim)] for dim in self.layout)
+        return np.memmap(self.filename, dtype=self.dtype, mode="r", offset=self.offset, shape=shape)
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.OUTER, self._getitem
+        )
+
+    def _getitem(self, key):
+        """
+        Reads an outer-indexed selection
 
         Parameters
         ----------
-        name : str
-            String to check in the filename
-        all : bool, default=False
-            Return all files matched instead of the first instance
-        exc : str | list[str], default=[]
-            A string or list of strings to use to exclude files. If a file contains
-            one of the strings in its name, it will not be selected
+        key : tuple
+            An int, slice or int array per dimension of (band, y, x)
 
         Returns
         -------
-        str | list | None
-            First matched file if all is False, otherwise the full list
+        np.ndarray
+            Selected data, in (band, y, x) order minus the dimensions selected by int
         """
-        if isinstance(exc, str):
-            exc = [exc]
+        # Whole bands, such as .sel(band=[r, g, b]), use the strided band reads
+        band, y, x = key
+        if (
+            not isinstance(band, (int, np.integer, slice))
+            and all(isinstance(k, slice) and k.indices(n) == (0, n, 1) for k, n in zip((y, x), self.shape[1:]))
+        ):
+            return self.readBands([int(b) for b in band])
+
+        # Reorder the key to the source interleave
+        key = [key[self.dims.index(dim)] for dim in self.layout]
+
+        # Apply ints and slices first as these are views of the memmap
+        basic = tuple(
+            k if isinstance(k, (int, np.integer, slice)) else slice(None)
+            for k in key
+        )
+        data = self.memmap()[basic]
 
-        found = []
-        for file in self.getFlat():
-            if name in file:
-                if not any(ex in file for ex in exc):
-                    found.append(file)
+        dims = [dim for dim, k in zip(self.layout, key) if not isinstance(k, (int, np.integer))]
 
-        if not all and len(found) > 1:
-            self.log.warning(
-                "%d files matched pattern '%s'. Returning first match.", len(found), regex
-            )
+        # Each remaining array reads only the selected indices of that axis
+        for dim, k in zip(self.layout, key):
+            if not isinstance(k, (int, np.integer, slice)):
+                data = np.take(data, k, axis=dims.index(dim))
 
-        return found if all else (found[0] if found else None)
+        order = [dims.index(dim) for dim in self.dims if dim in dims]
+        return np.array(data.transpose(order))
 
-    def match(self, regex, all=False, exc=[]):
+    def readBands(self, bands, buffer=16 * 1024**2, gap=64 * 1024):
         """
-        Find files using a regex search
+        Reads a few whole bands, such as for an RGB quick-look, with strided reads
+        that follow the interleave of the file instead of paging in every band:
+            BSQ - Each band is one contiguous read
+            BIL - Per line, one read per run of nearby bands. Bands closer than `gap`
+                  bytes are merged into one read rather than seeking between them
+            BIP - Every band of a pixel is adjacent, so whole lines are read in
+                  blocks that fit the buffer
 
         Parameters
         ----------
-        regex : str
-            Regex pattern to search for
-        all : bool, default=False
-            Return all matches instead of first match
-        exc : str or list of str
-            Strings to exclude from results
+        bands : list[int]
+            Band indices (0-based) to read, in the order to return them
+        buffer : int, default=16 MB
+            Maximum number of bytes read into memory per read
+        gap : int, default=64 KB
+            BIL only, maximum number of unused bytes between two bands to read them
+            together
 
         Returns
         -------
-        str or list or None
-            File path(s) matching the pattern
+        np.ndarray
+            Array of shape (len(bands), y, x)
         """
-        if isinstance(exc, str):
-            exc = [exc]
-
-        try:
-            pattern = re.compile(regex)
-        except re.error:
-            self.log.exception("Invalid regex pattern: %s", regex)
-            raise
+        nbands, rows, cols = self.shape
+        item = self.dtype.itemsize
+
+        out = np.empty((len(bands), rows, cols), dtype=self.dtype)
+
+        with open(self.filename, "rb", buffering=0) as f:
+            def read(offset, view):
+                f.seek(self.offset + offset)
+                f.readinto(memoryview(view).cast("B"))
+
+            if self.interleave == "bsq":
+                plane = rows * cols
+                step = max(1, buffer // item)
+                for i, band in enumerate(bands):
+                    flat = out[i].reshape(-1)
+                    for start in range(0, plane, step):
+                        read((band * plane + start) * item, flat[start:start+step])
+
+            elif self.interleave == "bil":
+                # Only the selected bands are needed, keep the kernel from reading ahead
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_RANDOM)
+
+                # Group the bands into runs that are read together
+                merge = max(1, gap // (cols * item))
+                runs = []
+                for band in sorted(set(bands)):
+                    if runs and band - runs[-1][-1] <= merge:
+                        runs[-1].append(band)
+                    else:
+                        runs.append([band])
+
+                line = nbands * cols * item
+                for run in runs:
+                    start, stop = run[0], run[-1] + 1
+                    scratch = np.empty((stop - start, cols), dtype=self.dtype)
+                    index = [(i, band - start) for i, band in enumerate(bands) if start <= band < stop]
+
+                    for y in range(rows):
+                        read(y * line + start * cols * item, scratch)
+                        for i, j in index:
+                            out[i, y] = scratch[j]
 
-        found = []
-        for file in self.getFlat():
-            if pattern.search(file):
-                if not any(ex in file for ex in exc):
-                    found.append(file)
+            else:
+                line = nbands * cols
+                block = max(1, buffer // (line * item))
+                scratch = np.empty((block, cols, nbands), dtype=self.dtype)
+                for y in range(0, rows, block):
+                    n = min(block, rows - y)
+                    read(y * line * item, scratch[:n])
+                    out[:, y:y+n] = scratch[:n, :, bands].transpose(2, 0, 1)
 
-        if not all and len(found) > 1:
-            self.log.warning(
-                "%d files matched pattern '%s'. Returning first match.", len(found), regex
-            )
+        return out.astype(self.dtype.newbyteorder("="), copy=False)
 
-        return found if all else (found[0] if found else None)
 
-    def find(self, name, *args, **kwargs):
-        """
-        Smart search for a file based on partial path structure
+class EnviBackendEntrypoint(BackendEntrypoint):
+    """
+    Uses spectral.io.envi to load ISOFIT output rasters
+
+    Accessible via engine="envi" after installing ISOFIT
 
+    Specifically structured to emulate the return of rasterio's engine for xarray to
+    ease switching between them
+    """
+
+    description = "Open ISOFIT ENVI products in xarray using memory-mapped reads"
+    url = "https://github.com/isofit/isofit-plots"
+
+    open_dataset_parameters = ("filename_or_obj", "drop_variables", "mask_and_scale", "overview")
+
+    # Target size in bytes of the default chunks when opening with chunks={}
+    chunk_size = 64 * 1024**2
+
+    def open_dataset(self, filename_or_obj, *, drop_variables=None, mask_and_scale=True, overview=None):
+        """
         Parameters
         ----------
-        name : str
-            Path-like name to construct fuzzy regex search
-        *args, **kwargs : forwarded to match()
-
-        Returns
-        -------
-        str or list or None
-            Matched file(s)
+        filename_or_obj : str
+            String path to an ISOFIT output product
+        drop_variables : any, default=None
+            Unused required parameter
+        mask_and_scale : bool, default=True
+            Lazily replaces the `data ignore value` of the header with NaN. The
+            value is kept as the `_FillValue` of the variable's encoding
+        overview : int, default=None
+            Display size in pixels. If set and the product has overviews, opens the
+            coarsest level that satisfies this size instead, see Overviews.select.
+            The `factor` attribute is the decimation factor of the opened level
         """
-        # Escape user input to avoid accidental regex issues
-        regex_parts = [f".*{re.escape(part)}.*" for part in name.split("/")]
-        regex = "/".join(regex_parts)
-        return self.match(regex, *args, **kwargs)
+        factor = 1
+        if overview:
+            filename_or_obj, factor = Overviews(filename_or_obj).select(overview)
+
+        data, coords, meta = self.parse(filename_or_obj)
+        if overview:
+            meta["factor"] = factor
+
+        var = xr.Variable(data.dims, indexing.LazilyIndexedArray(data), attrs=meta.copy())
+
+        fill = self.fillValue(meta, data.dtype)
+        if fill is not None:
+            var.attrs["_FillValue"] = fill
+            var = xr.conventions.decode_cf_variable("band_data", var,
+                mask_and_scale = mask_and_scale,
+                decode_times = False,
+            )
 
-    def load(self, *, path=None, ifin=None, find=None, match=None, **kwargs):
+        var.encoding["preferred_chunks"] = data.preferredChunks(self.chunk_size)
+
+        return xr.Dataset({"band_data": var}, coords=coords, attrs=meta)
+
+    def guess_can_open(self, filename_or_obj):
         """
-        Loads a file based on one of several matching strategies
-        Only the first provided method is used
+        Detects ENVI products by sniffing the magic of the header beside the path so
+        that xr.open_dataset selects this backend without an engine. Accepts either
+        the binary file or the header itself
 
         Parameters
         ----------
-        path : str
-            Direct path to a file (absolute or relative to self.path)
-        ifin : str
-            Substring match against available files
-        find : str
-            Smart path-style fuzzy match
-        match : str
-            Regex match
+        filename_or_obj : any
+            Object passed to xr.open_dataset
 
         Returns
         -------
-        any
-            Loaded object from subclass's _load method
+        bool
+            True if the path has an ENVI header
         """
-        file = None
-        if path is not None:
-            file = path
-        elif ifin is not None:
-            file = self.ifin(ifin)
-        elif find is not None:
-            file = self.find(find)
-        elif match is not None:
-            file = self.match(match)
-        else:
-            raise AttributeError("One of the key-word arguments must be set")
-
-        if file is None:
-            raise FileNotFoundError("Cannot find file to load")
-
-        if not (p := Path(file)).exists():
-            p = self.path / file
-            if not p.exists():
-                raise FileNotFoundError("Cannot find file to load, attempted: %s", file)
+        if not isinstance(filename_or_obj, (str, os.PathLike)):
+            return False
 
-        if self.cache is not None:
-            if p not in self.cache:
-                self.log.debug("Loading file: %s", p)
-                data = self._load(p)
-                if data is not None:
-                    self.cache[p] = data
+        path = Path(filename_or_obj)
+        if path.suffix.lower() != ".hdr":
+            # Binary files are either extensionless or use one of the ENVI extensions
+            if path.suffix and path.suffix[1:].lower() not in (*_envi.KNOWN_EXTS, "bsq", "bil", "bip"):
+                return False
+            path = path.with_suffix(".hdr")
 
-            self.log.debug("Returning from cache: %s", p)
-            return self.cache.get(p)
+        try:
+            with open(path, "rb") as file:
+                return file.read(4) == b"ENVI"
+        except OSError:
+            return False
 
-        self.log.debug("Returning from load: %s", p)
-        return self._load(p, **kwargs)
+    @staticmethod
+    def fillValue(meta, dtype):
+        """
+        Retrieves the `data ignore value` of a header as the data type of its file
 
-    def _load(self, file, **kwargs):
-        raise NotImplementedError("Subclass must define this function")
+        Parameters
+        ----------
+        meta : dict
+            Header metadata
+        dtype : np.dtype
+            Data type of the binary file
 
+        Returns
+        -------
+        np.generic | None
+            The fill value, None if the header does not define one or it cannot be
+            represented by the data type
+        """
+        value = meta.get("data ignore value")
+        if value is None:
+            return
 
-class Config(FileFinder):
-    extensions = [".json"]
-    patterns = {
-        # Presolve
-        r"(.*_h2o.json)": "Presolve configuration produced by apply_oe",
-        r"(.*_h2o.json.tmpl)": "Presolve configuration template for developer purposes",
-        r"(.*_h2o_tpl.json)": "MODTRAN template configuration for the presolve run",
-        # Full
-        r"(.*_isofit.json)": "ISOFIT main configuration",
-        r"(.*_isofit.json.tmpl)": "ISOFIT main configuration template for developer purposes",
-        r"(.*_modtran_tpl.json)": "MODTRAN template configuration for ISOFIT",
-    }
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return
 
-    _load = Loaders.json
+        dtype = np.dtype(dtype)
+        if np.isnan(value):
+            if dtype.kind == "f":
+                return dtype.type(value)
+            return
 
+        fill = np.asarray(value).astype(dtype)
+        if fill != value:
+            return
 
-class Data(FileFinder):
-    extensions = [".mat", ".txt"]
-    patterns = {
-        r"(channelized_uncertainty.txt)": None,
-        r"(model_discrepancy.mat)": None,
-        r"(surface.mat)": None,
-        r"(wavelengths.txt)": None,
-    }
+        return fill[()]
 
-    def _load(self, file, **kwargs):
-        if file.suffix == ".csv":
-            return Loaders.csv(file, **kwargs)
+    @classmethod
+    def mask(cls, data, meta):
+        """
+        Replaces the `data ignore value` of an in-memory array with NaN
 
+        Parameters
+        ----------
+        data : np.ndarray
+            Data read from the binary file
+        meta : dict
+            Header metadata
 
-class LUT(FileFinder):
-    extensions = [".nc"]
-    patterns = {
-        r"(6S.lut.nc)": "LUT produced by the SixS radiative transfer model for sRTMnet",
-        r"(lut.nc)": "Look-Up-Table for the radiative transfer model",
-        r"(sRTMnet.predicts.nc)": "Output predicts of sRTMnet",
-    }
+        Returns
+        -------
+        np.ndarray
+            The data, promoted to float if a fill value was replaced
+        """
+        fill = cls.fillValue(meta, data.dtype)
+        if fill is None or np.isnan(fill):
+            return data
 
-    _load = Loaders.lut
+        missing = data == fill
+        if not missing.any():
+            return data
 
-    lut_regex = r"(\w+)-(\d*\.?\d+)_?"
+        data = data.astype(np.promote_types(data.dtype, np.float32))
+        data[missing] = np.nan
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        return data
 
-    def parseLutFiles(self, ext):
+    @staticmethod
+    def parse(filename):
         """
-        Parses LUT_*.{ext} file names for the LUT grid
+        Parses the header of an ENVI file
 
         Parameters
         ----------
-        ext : str
-            File extension to retrieve:
-                sixs    = inp
-                modtran = json
+        filename : str
+            Path to the ENVI binary file, the header is expected beside it with the
+            .hdr extension
 
         Returns
         -------
-        data : dict
-            Quantities to a set of their LUT values parsed from the file names
+        data : EnviBackendArray
+            Lazy array of the binary file
+        coords : dict
+            Coordinates of the band dimension
+        meta : dict
+            Remaining header metadata
         """
-        data = {}
-        for file in self.path.glob(f"*.{ext}"):
-            matches = re.findall(self.lut_regex, file.stem[4:])  # [4:] skips LUT_
-            for name, value in matches:
-                quant = data.setdefault(name, set())
-                quant.add(float(value))
+        header = EnviHeader.read(Path(filename).with_suffix(".hdr"))
+        meta = header.metadata.copy()
+        bands = header.shape[0]
+
+        data = EnviBackendArray(
+            filename = header.filename,
+            dtype = header.dtype,
+            offset = header.offset,
+            shape = header.shape,
+            interleave = header.interleave,
+        )
 
-        return data
+        coords = {
+            "band": range(1, bands + 1)
+        }
 
-    @cached_property
-    def sixs(self):
-        return self.parseLutFiles("inp")
+        if "wavelength" in meta:
+            meta.pop("wavelength")
+            meta.pop("fwhm")
+            wl = header.wavelength.copy()
+            fwhm = header.fwhm.copy()
 
-    @cached_property
-    def modtran(self):
-        return self.parseLutFiles("json")
+            # If the lengths match, tie these to the band dim
+            if len(wl) == bands:
+                coords["wavelength"] = ("band", wl)
+                coords["fwhm"] = ("band", fwhm)
+            else:
+                meta["wavelength"] = wl
+                meta["fwhm"] = fwhm
 
+        return data, coords, meta
 
-class Input(FileFinder):
-    extensions = [""]
 
-    _load = Loaders.envi
+def blockMean(data, factor):
+    """
+    Averages non-overlapping factor x factor blocks of the last two dimensions,
+    ignoring NaNs. Edge blocks that do not fill a whole block average what exists
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Array of shape (band, y, x)
+    factor : int
+        Block size
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (band, ceil(y / factor), ceil(x / factor))
+    """
+    bands, rows, cols = data.shape
+    ry, rx = -(-rows // factor), -(-cols // factor)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    padded = np.full((bands, ry * factor, rx * factor), np.nan, dtype=np.float32)
+    padded[:, :rows, :cols] = data
 
-        files = self.getFlat()
+    blocks = padded.reshape(bands, ry, factor, rx, factor)
 
-        for file in files:
-            if not (self.path / file).with_suffix(".hdr").exists():
-                raise FileNotFoundError(f"Missing .hdr file for {file}")
+    # All-NaN blocks legitimately produce NaN
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmean(blocks, axis=(2, 4))
 
 
-class Output(FileFinder):
-    extensions = [""]
-    patterns = {
-        # Presolve
-        r"(.*_subs_atm)": None,
-        r"(.*_subs_h2o)": None,
-        r"(.*_subs_rfl)": None,
-        r"(.*_subs_state)": None,
-        r"(.*_subs_uncert)": None,
-        # Full
-        r"(.*_atm_interp)": None,
-        r"(.*_rfl)": "Reflectance",
-        r"(.*_lbl)": None,
-        r"(.*_uncert)": None,
-    }
-    _load = Loaders.envi
+class Overviews:
+    """
+    Multi-resolution overview pyramid of an ENVI product, stored as a sidecar
+    directory under the overviews cache directory, unique per absolute path:
+        [directory]/[product]-[key].ovr/x2[.hdr], x4[.hdr], ...
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    Each level is a float32 BSQ ENVI file decimated by its factor using block
+    averaging, halving until the largest dimension is at most `minimum` pixels.
+    Levels older than the product are ignored
+    """
+    suffix = ".ovr"
 
-        files = self.getFlat()
+    # Stop decimating once the largest dimension is at most this many pixels
+    minimum = 256
 
-        self.name = None
-        for file in files:
-            if "subs" in file:
-                self.h2o = True
-            elif file.endswith("_rfl"):
-                self.name = file[:-4]
+    # Build the overviews on first display, see configure
+    enabled = False
 
-        if self.name is None:
-            self.log.warning(
-                "Could not find the full reflectance product and therefore could not parse the name. This may have downstream effects"
-            )
+    # Directory to store the sidecars in. Defaults to overviews under the user cache
+    # directory
+    directory = None
 
-        self.products = {file.replace(f"{self.name}_", ""): file for file in files}
+    def __init__(self, file, directory=None):
+        """
+        Parameters
+        ----------
+        file : str
+            Path to the ENVI product
+        directory : str, default=None
+            Directory to store the sidecar in. Defaults to the class attribute
+            `directory`, else overviews under the user cache directory
+        """
+        file = Path(file)
+        if file.suffix == ".hdr":
+            file = file.with_suffix("")
 
-        for file in files:
-            if not (self.path / file).with_suffix(".hdr").exists():
-                raise FileNotFoundError(f"Missing .hdr file for {file}")
+        directory = directory or self.directory or cacheDirectory() / "overviews"
+        key = hashlib.sha1(os.path.abspath(file).encode()).hexdigest()[:16]
 
-    def __getattr__(self, key):
-        if key in self.products:
-            return self.products[key]
-        return super().__getattr__(key)
+        self.file = file
+        self.path = Path(directory) / f"{file.name}-{key}{self.suffix}"
+        self.log = logging.getLogger(f"Overviews[{file.name}]")
 
-    def rgb(self, r=60, g=40, b=30):
+    @classmethod
+    def configure(cls, option):
         """
-        Returns the RGB data of the RFL product
+        Enables building overviews from a user option
 
         Parameters
         ----------
-        r : int, default=60
-            Red band
-        g : int, default=40
-            Green band
-        b : int, default=30
-            Blue band
+        option : None | bool | str
+            See cacheOption, a string is the directory to store the sidecars in
+        """
+        option = cacheOption(option)
+
+        cls.enabled = option is not None
+        if isinstance(option, (str, Path)):
+            cls.directory = option
+
+    def levels(self):
+        """
+        Retrieves the current overview levels
 
         Returns
         -------
-        xr.DataArray
+        dict
+            Decimation factor mapped to the path of the level, empty if no level is
+            newer than the product
         """
-        if not (file := self.find("rfl", exc="subs")):
-            self.log.error(
-                "Could not find the full reflectance product, does it exist?"
-            )
-            return
-
-        data = self.load(path=file)
+        try:
+            mtime = os.stat(self.file).st_mtime_ns
+        except OSError:
+            return {}
+
+        if not self.path.is_dir():
+            return {}
+
+        levels = {}
+        with os.scandir(self.path) as scan:
+            for entry in scan:
+                if (match := re.fullmatch(r"x(\d+)\.hdr", entry.name)):
+                    level = self.path / f"x{match[1]}"
+                    try:
+                        if level.exists() and entry.stat().st_mtime_ns >= mtime:
+                            levels[int(match[1])] = level
+                    except OSError:
+                        pass
+
+        return dict(sorted(levels.items()))
+
+    def select(self, size):
+        """
+        Selects the coarsest level whose largest dimension is still at least the
+        requested display size
 
-        # Retrieve the RGB subset
-        rgb = data.sel(band=[r, g, b]).transpose("y", "x", "band")
-        rgb /= rgb.max(["x", "y"])  # Brightens image
+        Parameters
+        ----------
+        size : int
+            Display size in pixels
 
-        # Convert to pixel coords for easier plotting
-        rgb["x"] = range(rgb.x.size)
-        rgb["y"] = range(rgb.y.size)
+        Returns
+        -------
+        path : pathlib.Path
+            Path to the selected level, or the product itself if no level suffices
+        factor : int
+            Decimation factor of the selected level, 1 for the product
+        """
+        levels = self.levels()
+        if not levels:
+            return self.file, 1
 
-        return rgb
+        data, _, _ = EnviBackendEntrypoint.parse(self.file)
+        _, rows, cols = data.shape
 
+        path, factor = self.file, 1
+        for level, file in levels.items():
+            if max(-(-rows // level), -(-cols // level)) >= size:
+                path, factor = file, level
 
-class Container:
-    """
-    Subclasses must contain the attributes:
+        return path, factor
 
-    data : list
-        Must be in the form of [(label[str], data[any])]
-    dataclass : dict
-        Must be in the form of {label[str]: dataclass}
+    def build(self, minimum=None):
+        """
+        Builds every overview level in one streaming pass over the product. Blocks of
+        lines aligned to the coarsest factor are read once and averaged down to each
+        level. The `data ignore value` of the product is excluded from the averages
 
-    The dataclass must have these attributes:
-        "enabled" : bool
-        "lines" : list
+        Parameters
+        ----------
+        minimum : int, default=None
+            Stop decimating once the largest dimension is at most this many pixels.
+            Defaults to the class attribute `minimum`
+
+        Returns
+        -------
+        dict
+            Decimation factor mapped to the path of the level
+        """
+        minimum = minimum or self.minimum
+
+        data, coords, meta = EnviBackendEntrypoint.parse(self.file)
+        bands, rows, cols = data.shape
+
+        factors = []
+        factor = 2
+        while max(rows, cols) / (factor / 2) > minimum:
+            factors.append(factor)
+            factor *= 2
+
+        if not factors:
+            self.log.debug("Product is small enough to not need overviews")
+            return {}
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        outputs = {}
+        for factor in factors:
+            shape = (bands, -(-rows // factor), -(-cols // factor))
+            outputs[factor] = np.memmap(self.path / f"x{factor}", dtype=np.float32, mode="w+", shape=shape)
+
+        self.log.info(f"Building overviews at factors {factors}")
+
+        block = factors[-1]
+        for y in range(0, rows, block):
+            key = indexing.BasicIndexer((slice(None), slice(y, y + block), slice(None)))
+            lines = EnviBackendEntrypoint.mask(np.asarray(data[key]), meta).astype(np.float32, copy=False)
+
+            for factor, out in outputs.items():
+                start = y // factor
+                reduced = blockMean(lines, factor)
+                out[:, start:start+reduced.shape[1]] = reduced
+
+        levels = {}
+        for factor, out in outputs.items():
+            out.flush()
+
+            header = {
+                "description": f"Overview of {self.file.name} decimated by {factor}",
+                "samples": out.shape[2],
+                "lines": out.shape[1],
+                "bands": bands,
+                "header offset": 0,
+                "file type": "ENVI Standard",
+                "data type": 4,
+                "interleave": "bsq",
+                "byte order": int(sys.byteorder == "big"),
+            }
+            for key in ("wavelength", "fwhm"):
+                if key in coords:
+                    header[key] = list(coords[key][1])
+                elif key in meta:
+                    header[key] = list(meta[key])
+
+            # The header is written last as it marks the level as complete
+            _envi.write_envi_header(str(self.path / f"x{factor}.hdr"), header)
+            levels[factor] = self.path / f"x{factor}"
+
+        del outputs
+
+        return levels
+
+
+class ZarrCache:
+    """
+    Optional cache of ENVI products converted to chunked, compressed Zarr stores
+
+    On first access a product is converted into a store under the cache directory,
+    later opens are served from the store. Chunks span a block of bands and pixels so
+    that both spectra and band images read few chunks regardless of the interleave of
+    the source. A store is reconverted when the modification time of the product or
+    its header changes
+
+    Requires the optional zarr package
+    """
+    chunks = {"band": 32, "y": 256, "x": 256}
+
+    def __init__(self, directory=None):
+        """
+        Parameters
+        ----------
+        directory : str, default=None
+            Directory to store the converted products in. Defaults to zarr under the
+            user cache directory ($XDG_CACHE_HOME/isoplots or ~/.cache/isoplots)
+        """
+        if zarr is None:
+            raise ImportError("The Zarr cache requires the zarr package, install it via `pip install zarr`")
+
+        if directory is None:
+            directory = cacheDirectory() / "zarr"
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.log = logging.getLogger(str(self))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} [{self.directory}]>"
+
+    @classmethod
+    def create(cls, option):
+        """
+        Creates a ZarrCache from a user option
+
+        Parameters
+        ----------
+        option : None | bool | str | ZarrCache
+            See cacheOption, a string is the cache directory. ZarrCache objects are
+            passed through
+
+        Returns
+        -------
+        ZarrCache | None
+        """
+        if isinstance(option, cls):
+            return option
+
+        if (option := cacheOption(option)) is None:
+            return
+
+        try:
+            if option is True:
+                return cls()
+            return cls(option)
+        except:
+            logging.getLogger(cls.__name__).exception(f"Failed to create the Zarr cache: {option}")
+
+    def store(self, file):
+        """
+        Determines the store path of a product, unique per absolute path
+
+        Parameters
+        ----------
+        file : pathlib.Path
+            Path to the ENVI product
+
+        Returns
+        -------
+        pathlib.Path
+        """
+        key = hashlib.sha1(str(file).encode()).hexdigest()[:16]
+        return self.directory / f"{file.name}-{key}.zarr"
+
+    def open(self, file):
+        """
+        Opens a product from its store, converting it first if the store is missing
+        or out of date
+
+        Parameters
+        ----------
+        file : pathlib.Path
+            Path to the ENVI product, without the .hdr extension
+
+        Returns
+        -------
+        xr.Dataset | None
+            The dataset, or None if the product could not be served from the cache
+        """
+        file = Path(file).absolute()
+        try:
+            header = EnviHeader.read(file.with_suffix(".hdr"))
+            mtime = [os.stat(header.filename).st_mtime_ns, os.stat(header.path).st_mtime_ns]
+        except (OSError, ValueError):
+            self.log.exception(f"Unable to read the source of {file}")
+            return
+
+        store = self.store(file)
+        with self.lock:
+            if store.exists():
+                try:
+                    ds = xr.open_zarr(store)
+                    if ds.attrs.get("source_mtime") == mtime:
+                        self.log.debug(f"Serving from the Zarr cache: {file}")
+                        return ds
+                except Exception:
+                    self.log.exception(f"Failed to open the cached store, reconverting: {store}")
+
+            try:
+                self.convert(file, store, mtime)
+            except Exception:
+                self.log.exception(f"Failed to convert to Zarr: {file}")
+                return
+
+        return xr.open_zarr(store)
+
+    def convert(self, file, store, mtime):
+        """
+        Converts a product to a Zarr store. The store is written to a temporary path
+        first so that an interrupted conversion never appears complete
+
+        Parameters
+        ----------
+        file : pathlib.Path
+            Path to the ENVI product
+        store : pathlib.Path
+            Path of the store to write
+        mtime : list[int]
+            Modification times of the product and its header to record
+        """
+        self.log.info(f"Converting to Zarr: {file}")
+
+        # Stream chunk by chunk with dask, otherwise the product is read into memory
+        ds = xr.open_dataset(file, engine=EnviBackendEntrypoint, chunks=self.chunks if dask else None)
+        ds.attrs = {"source": str(file), "source_mtime": mtime}
+
+        for name, var in ds.data_vars.items():
+            var.attrs = {
+                key: value.tolist() if isinstance(value, np.ndarray) else value
+                for key, value in var.attrs.items()
+            }
+            var.encoding = {}
+            if dask is None:
+                var.encoding["chunks"] = tuple(
+                    min(self.chunks.get(dim, size), size)
+                    for dim, size in var.sizes.items()
+                )
+
+        tmp = store.with_suffix(".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        ds.to_zarr(tmp, mode="w")
+
+        shutil.rmtree(store, ignore_errors=True)
+        os.replace(tmp, store)
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    name: str
+    info: Any
+
+
+def literalPrefix(regex):
+    """
+    Extracts the literal prefix of an anchored regex, eg. "^lut/LUT_.*" -> "lut/LUT_"
+
+    Parameters
+    ----------
+    regex : str
+        Regex pattern string
+
+    Returns
+    -------
+    str
+        The literal characters every match must start with. Empty if the pattern is
+        not anchored to the start of the string
+    """
+    if regex.startswith("^"):
+        regex = regex[1:]
+    elif regex.startswith(r"\A"):
+        regex = regex[2:]
+    else:
+        return ""
+
+    # Alternations may match without the prefix
+    if "|" in regex:
+        return ""
+
+    prefix = ""
+    for char in regex:
+        if char in ".^$*+?{}[]\\|()":
+            # A quantifier makes the previous character optional
+            if char in "*?{" and prefix:
+                prefix = prefix[:-1]
+            break
+        prefix += char
+
+    return prefix
+
+
+class Classifier:
+    """
+    Matches names against an ordered dict of regex patterns in a single pass
+
+    The patterns are compiled into one alternation of named lookahead groups anchored
+    at the start of the name. The alternatives are tried in order, so the first
+    pattern that matches anywhere in the name wins just as if each pattern was
+    searched in turn. Results are memoized per name
+    """
+    def __init__(self, patterns):
+        """
+        Parameters
+        ----------
+        patterns : dict
+            Regex pattern strings mapped to the value to return on a match
+        """
+        self.values = list(patterns.values())
+        self.memo = {}
+
+        self.regex = None
+        self.sequential = None
+        if patterns:
+            try:
+                self.regex = re.compile(r"\A(?:" + "|".join(
+                    f"(?P<p{i}>(?=.*?(?:{pattern})))"
+                    for i, pattern in enumerate(patterns)
+                ) + ")", re.DOTALL)
+            except re.error:
+                # Patterns using global flags or numbered backreferences cannot be
+                # combined, fall back to searching each in turn
+                self.sequential = [re.compile(pattern) for pattern in patterns]
+
+    def _classify(self, name):
+        if self.regex is not None:
+            if match := self.regex.match(name):
+                return self.values[int(match.lastgroup[1:])]
+
+        elif self.sequential is not None:
+            for pattern, value in zip(self.sequential, self.values):
+                if pattern.search(name):
+                    return value
+
+    def classify(self, name):
+        """
+        Retrieves the value of the first pattern matching a name
+
+        Parameters
+        ----------
+        name : str
+            Name to compare against the patterns
+
+        Returns
+        -------
+        any
+            The value of the first matching pattern, None if none match
+        """
+        if name not in self.memo:
+            self.memo[name] = self._classify(name)
+        return self.memo[name]
+
+
+@dataclass(frozen=True)
+class Entry:
+    name: str
+    isdir: bool
+    size: int
+    mtime: int
+
+
+@dataclass
+class Listing:
+    mtime: int
+    entries: List[Entry]
+    names: Dict[str, Entry] = field(default=None, repr=False, compare=False)
+
+    def get(self, name):
+        """
+        Retrieves an entry of this directory by name
+
+        Parameters
+        ----------
+        name : str
+            Name of the entry
+
+        Returns
+        -------
+        Entry | None
+        """
+        if self.names is None:
+            self.names = {entry.name: entry for entry in self.entries}
+        return self.names.get(name)
+
+
+def isSidecar(name):
+    """
+    Checks if a directory entry is a sidecar of generated files such as Overviews,
+    which are hidden from every listing as they are not products themselves
+
+    Parameters
+    ----------
+    name : str
+        Name of the entry
+
+    Returns
+    -------
+    bool
+    """
+    return name.endswith(Overviews.suffix)
+
+
+def scanDirectory(path):
+    """
+    Lists a single directory with the size and modification time of each entry.
+    Sidecars are skipped, see isSidecar
+
+    Parameters
+    ----------
+    path : str
+        Directory to scan
+
+    Returns
+    -------
+    list[Entry]
+        Entries of the directory sorted by name
+    """
+    entries = []
+    with os.scandir(path) as scan:
+        for item in scan:
+            if isSidecar(item.name):
+                continue
+
+            try:
+                stat = item.stat()
+                entries.append(Entry(item.name, item.is_dir(), stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                # Broken symlinks and files removed mid-scan
+                entries.append(Entry(item.name, False, 0, 0))
+
+    return sorted(entries, key=lambda entry: entry.name)
+
+
+def cacheDirectory():
+    """
+    Retrieves the user cache directory of isoplots
+
+    Returns
+    -------
+    pathlib.Path
+        $XDG_CACHE_HOME/isoplots or ~/.cache/isoplots
+    """
+    base = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(base) / "isoplots"
+
+
+def cacheOption(option):
+    """
+    Normalizes a cache option given in code or read from the config
+
+    Parameters
+    ----------
+    option : None | bool | str
+        False, None or a false-like string disables the cache. True or a true-like
+        string enables it at the default location. Any other string is a path
+
+    Returns
+    -------
+    None | True | str
+    """
+    if option is None or option is False:
+        return
+
+    if isinstance(option, str):
+        value = option.strip().lower()
+        if value in ("", "0", "false", "no", "off"):
+            return
+        if value in ("1", "true", "yes", "on"):
+            return True
+
+    return option
+
+
+class ScanCache:
+    """
+    Persistent SQLite cache of directory listings so that reopening a working
+    directory only rescans the subdirectories whose modification time changed
+
+    Directories are keyed by their absolute path, so a single cache file can be
+    shared by every FileFinder and working directory
+    """
+    schema = """
+        CREATE TABLE IF NOT EXISTS dirs (
+            path   TEXT PRIMARY KEY,
+            mtime  INTEGER,
+            finder TEXT
+        );
+        CREATE TABLE IF NOT EXISTS entries (
+            dir   TEXT,
+            name  TEXT,
+            isdir INTEGER,
+            size  INTEGER,
+            mtime INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS entries_dir ON entries (dir);
+    """
+
+    def __init__(self, file=None):
+        """
+        Parameters
+        ----------
+        file : str, default=None
+            Path to the SQLite file. Defaults to scans.sqlite under the user cache
+            directory ($XDG_CACHE_HOME/isoplots or ~/.cache/isoplots)
+        """
+        if file is None:
+            file = cacheDirectory() / "scans.sqlite"
+
+        self.file = Path(file)
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.log = logging.getLogger(str(self))
+
+        with self.connect() as db:
+            db.executescript(self.schema)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} [{self.file}]>"
+
+    @classmethod
+    def create(cls, option):
+        """
+        Creates a ScanCache from a user option
+
+        Parameters
+        ----------
+        option : None | bool | str | ScanCache
+            False, None or a false-like string disables the cache. True or a true-like
+            string uses the default location. Any other string is the path to the
+            SQLite file. ScanCache objects are passed through
+
+        Returns
+        -------
+        ScanCache | None
+        """
+        if isinstance(option, cls):
+            return option
+
+        if (option := cacheOption(option)) is None:
+            return
+
+        try:
+            if option is True:
+                return cls()
+            return cls(option)
+        except:
+            logging.getLogger(cls.__name__).exception(f"Failed to open the scan cache: {option}")
+
+    @contextmanager
+    def connect(self):
+        """
+        Opens a connection to the cache that commits and closes on exit
+        """
+        db = sqlite3.connect(self.file, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _subtree(root):
+        """
+        SQL condition and parameters selecting a directory and everything beneath it
+        """
+        return "{0} = ? OR ({0} >= ? AND {0} < ?)", (
+            root, root + os.sep, root + chr(ord(os.sep) + 1)
+        )
+
+    def load(self, root):
+        """
+        Loads the cached listings of a directory tree
+
+        Parameters
+        ----------
+        root : str
+            Absolute path to the root directory
+
+        Returns
+        -------
+        listings : dict[str, Listing]
+            Absolute directory paths to their cached listing
+        """
+        cond, params = self._subtree(root)
+
+        listings = {}
+        try:
+            with self.connect() as db:
+                for path, mtime in db.execute(f"SELECT path, mtime FROM dirs WHERE {cond.format('path')}", params):
+                    listings[path] = Listing(mtime, [])
+
+                for dir, name, isdir, size, mtime in db.execute(
+                    f"SELECT dir, name, isdir, size, mtime FROM entries WHERE {cond.format('dir')} ORDER BY dir, name", params
+                ):
+                    if dir in listings and not isSidecar(name):
+                        listings[dir].entries.append(Entry(name, bool(isdir), size, mtime))
+        except:
+            self.log.exception(f"Failed to load cached scans for {root}")
+            return {}
+
+        return listings
+
+    def save(self, listings, removed=[]):
+        """
+        Writes directory listings to the cache
+
+        Parameters
+        ----------
+        listings : dict[str, Listing]
+            Absolute directory paths to their new listing
+        removed : list[str], default=[]
+            Absolute directory paths that no longer exist
+        """
+        if not listings and not removed:
+            return
+
+        try:
+            with self.connect() as db:
+                for path in list(removed) + list(listings):
+                    db.execute("DELETE FROM dirs WHERE path = ?", (path,))
+                    db.execute("DELETE FROM entries WHERE dir = ?", (path,))
+
+                db.executemany("INSERT INTO dirs (path, mtime) VALUES (?, ?)", [
+                    (path, listing.mtime) for path, listing in listings.items()
+                ])
+                db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?)", [
+                    (path, entry.name, entry.isdir, entry.size, entry.mtime)
+                    for path, listing in listings.items()
+                    for entry in listing.entries
+                ])
+        except:
+            self.log.exception("Failed to save scans")
+
+    def getFinder(self, path):
+        """
+        Retrieves the FileFinder class name detected for a directory
+
+        Parameters
+        ----------
+        path : str
+            Absolute directory path
+
+        Returns
+        -------
+        str | None
+            Class name if one was saved since the directory last changed
+        """
+        try:
+            with self.connect() as db:
+                row = db.execute("SELECT finder FROM dirs WHERE path = ?", (path,)).fetchone()
+        except:
+            self.log.exception(f"Failed to retrieve the finder for {path}")
+            return
+
+        if row:
+            return row[0]
+
+    def setFinders(self, finders):
+        """
+        Saves the FileFinder class names detected for directories
+
+        Parameters
+        ----------
+        finders : dict[str, str]
+            Absolute directory paths to class names
+        """
+        try:
+            with self.connect() as db:
+                db.executemany("UPDATE dirs SET finder = ? WHERE path = ?", [
+                    (name, path) for path, name in finders.items()
+                ])
+        except:
+            self.log.exception("Failed to save finders")
+
+
+@dataclass
+class Delta:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    def relative(self, census):
+        """
+        Converts the paths of this delta to be relative to a census view, dropping
+        any outside of it
+
+        Parameters
+        ----------
+        census : Census
+            Census to convert to
+
+        Returns
+        -------
+        Delta
+        """
+        convert = lambda paths: [
+            path for path in map(census.relative, paths) if path is not None
+        ]
+        return Delta(
+            added = convert(self.added),
+            removed = convert(self.removed),
+            modified = convert(self.modified),
+        )
+
+    def within(self, subdir):
+        """
+        Converts the paths of this delta to be relative to one of its subdirectories,
+        dropping any outside of it
+
+        Parameters
+        ----------
+        subdir : str
+            Subdirectory, relative to the same directory as this delta
+
+        Returns
+        -------
+        Delta
+        """
+        prefix = subdir + os.sep
+        convert = lambda paths: [
+            path[len(prefix):] for path in paths if path.startswith(prefix)
+        ]
+        return Delta(
+            added = convert(self.added),
+            removed = convert(self.removed),
+            modified = convert(self.modified),
+        )
+
+
+class Census:
+    """
+    Single-pass record of a directory tree: the name, type, size and modification time
+    of every entry, grouped by directory
+
+    Each directory is read with one os.scandir call, concurrently, and the result is
+    shared by the FileIndex queries, getFlat, getTree and .hdr validation. Child
+    FileFinders of an IsofitWD receive a view of their parent's census so the same
+    inodes are never scanned twice. Refreshing only rescans the directories whose
+    modification time changed
+
+    If a ScanCache is provided, the listings of unchanged directories are read from
+    it instead of the filesystem and the changed listings are written back
+
+    Each rescan produces a Delta of the added, removed and modified entries which is
+    passed to the subscribers and kept for a short history so consumers such as the
+    FileIndex can apply the changes incrementally
+    """
+    history = 16
+
+    # Seconds a refresh is considered current for, later refreshes of the same
+    # directories within this time are skipped unless forced
+    interval = 2
+
+    def __init__(self, path=None, scans=None, workers=8, *, base=None, prefix=""):
+        """
+        Parameters
+        ----------
+        path : str, default=None
+            Root directory of the census
+        scans : ScanCache, default=None
+            Persistent cache of the directory listings
+        workers : int, default=8
+            Number of threads used to scan directories concurrently
+        base : Census, default=None
+            Census this is a view of, see Census.view
+        prefix : str, default=""
+            Subdirectory of the base census this is a view of
+        """
+        if base is not None:
+            path = os.path.join(base.root, prefix)
+            scans = base.scans
+            workers = base.workers
+
+        self.root = os.path.abspath(path) if path is not None else None
+        self.scans = scans
+        self.workers = workers
+        self.base = base or self
+        self.prefix = prefix
+
+        self.built = False
+        self.lock = threading.RLock()
+        self.deltas = {}
+        self.subscribers = []
+        self._version = 0
+
+        # Shared by every scan and refresh of the base census, see executor()
+        self.pool = None
+
+        # Monotonic time each prefix was last refreshed at
+        self.checked = {}
+
+        self._listings = {}
+        self._view = (None, {})
+
+        self.log = logging.getLogger(str(self))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} [{self.root}]>"
+
+    @property
+    def version(self):
+        """
+        Incremented by the base census each time its listings change
+        """
+        return self.base._version
+
+    def view(self, subdir):
+        """
+        Creates a census for a subdirectory that shares this census' listings
+
+        Parameters
+        ----------
+        subdir : str
+            Subdirectory relative to this census' root
+
+        Returns
+        -------
+        Census
+        """
+        return Census(base=self.base, prefix=os.path.join(self.prefix, subdir))
+
+    @property
+    def listings(self):
+        """
+        Directory listings keyed by the path relative to this census' root, sorted
+        """
+        if self.base is self:
+            return self._listings
+
+        version, listings = self._view
+        if version != self.version:
+            prefix = self.prefix + os.sep
+            size = len(prefix)
+            listings = {}
+            for subdir, listing in self.base.listings.items():
+                if subdir == self.prefix:
+                    listings[""] = listing
+                elif subdir.startswith(prefix):
+                    listings[subdir[size:]] = listing
+
+            self._view = (self.version, listings)
+
+        return listings
+
+    def listing(self, subdir=""):
+        """
+        Retrieves the listing of a directory
+
+        Parameters
+        ----------
+        subdir : str, default=""
+            Directory relative to this census' root
+
+        Returns
+        -------
+        Listing | None
+        """
+        if subdir in ("", "."):
+            subdir = self.prefix
+        elif self.prefix:
+            subdir = os.path.join(self.prefix, subdir)
+        return self.base._listings.get(subdir)
+
+    def entry(self, path):
+        """
+        Retrieves the entry for a path
+
+        Parameters
+        ----------
+        path : str
+            Path relative to this census' root
+
+        Returns
+        -------
+        Entry | None
+        """
+        subdir, name = os.path.split(os.path.normpath(path))
+        if listing := self.listing(subdir):
+            return listing.get(name)
+
+    def exists(self, path):
+        """
+        Checks if a path exists as of the last scan
+
+        Parameters
+        ----------
+        path : str
+            Path relative to this census' root
+
+        Returns
+        -------
+        bool
+        """
+        if os.path.normpath(path) == ".":
+            return self.listing() is not None
+        return self.entry(path) is not None
+
+    def executor(self):
+        """
+        Retrieves the thread pool of the base census, creating it on first use
+
+        Returns
+        -------
+        ThreadPoolExecutor
+        """
+        base = self.base
+        with base.lock:
+            if base.pool is None:
+                base.pool = ThreadPoolExecutor(base.workers, thread_name_prefix="Census")
+            return base.pool
+
+    def close(self):
+        """
+        Shuts down the thread pool of the base census. It is recreated if needed again
+        """
+        base = self.base
+        with base.lock:
+            if base.pool is not None:
+                base.pool.shutdown(wait=False)
+                base.pool = None
+
+    def _path(self, subdir):
+        """
+        Absolute path for a directory key of the base census
+        """
+        return os.path.join(self.base.root, subdir) if subdir else self.base.root
+
+    def _drop(self, listings, subdir, delta):
+        """
+        Removes a directory and everything beneath it from a listings dict
+
+        Parameters
+        ----------
+        listings : dict[str, Listing]
+            Listings keyed by the base census directory keys
+        subdir : str
+            Directory key to remove
+        delta : Delta
+            Records the files of the removed directories
+
+        Returns
+        -------
+        removed : list[str]
+            Absolute paths of the removed directories
+        """
+        prefix = subdir + os.sep
+        removed = [key for key in listings if key == subdir or key.startswith(prefix)]
+        for key in removed:
+            for entry in listings.pop(key).entries:
+                delta.removed.append(os.path.join(key, entry.name))
+        return [self._path(key) for key in removed]
+
+    def _scan(self, dirs, cached=None):
+        """
+        Scans directories of the base census concurrently, including any newly
+        discovered subdirectories, and merges them into the base listings
+
+        Parameters
+        ----------
+        dirs : list[str]
+            Directory keys of the base census to scan
+        cached : dict[str, Listing], default=None
+            Listings loaded from the ScanCache. Entries are popped as they are visited
+            so the leftovers are the directories that no longer exist
+
+        Returns
+        -------
+        changed : dict[str, Listing]
+            Absolute paths to the listings that were scanned from the filesystem
+        removed : list[str]
+            Absolute paths of the directories that no longer exist
+        delta : Delta
+            Entries added, removed and modified relative to the previous listings
+        """
+        if cached is None:
+            cached = {}
+
+        # Work on a copy that is swapped in at the end so readers never see a
+        # partially merged state
+        listings = dict(self.base._listings)
+        changed = {}
+        removed = []
+        delta = Delta()
+
+        def scan(subdir):
+            path = self._path(subdir)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+
+                listing = cached.get(path)
+                if listing is None or listing.mtime != mtime:
+                    listing = changed[path] = Listing(mtime, scanDirectory(path))
+
+                return listing
+            except FileNotFoundError:
+                self.log.debug(f"Directory was removed: {path}")
+            except:
+                self.log.exception(f"Error scanning directory tree: {path}")
+
+        # Directories are scanned concurrently as they are discovered
+        pool = self.executor()
+        pending = {pool.submit(scan, subdir): subdir for subdir in dirs}
+        queued = set(dirs)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdir = pending.pop(future)
+                cached.pop(self._path(subdir), None)
+
+                if (listing := future.result()) is None:
+                    if subdir in listings:
+                        removed += self._drop(listings, subdir, delta)
+                    continue
+
+                old = listings.get(subdir)
+                listings[subdir] = listing
+
+                previous = {entry.name: entry for entry in old.entries} if old else {}
+                for entry in listing.entries:
+                    name = os.path.join(subdir, entry.name)
+
+                    if (last := previous.pop(entry.name, None)) is None:
+                        delta.added.append(name)
+                    elif not entry.isdir and (entry.size, entry.mtime) != (last.size, last.mtime):
+                        delta.modified.append(name)
+
+                    if entry.isdir and name not in listings and name not in queued:
+                        pending[pool.submit(scan, name)] = name
+                        queued.add(name)
+
+                # Entries that disappeared since the last scan
+                for entry in previous.values():
+                    name = os.path.join(subdir, entry.name)
+                    delta.removed.append(name)
+                    if entry.isdir and name in listings:
+                        removed += self._drop(listings, name, delta)
+
+        # Merge deterministically regardless of the order the scans completed
+        self.base._listings = dict(sorted(listings.items()))
+
+        return changed, removed, delta
+
+    def _update(self, dirs):
+        """
+        Rescans directory keys of the base census, saves the changes to the ScanCache
+        and notifies the subscribers
+
+        Parameters
+        ----------
+        dirs : list[str]
+            Directory keys of the base census to rescan
+
+        Returns
+        -------
+        delta : Delta
+            Changes discovered by the rescan
+        """
+        base = self.base
+
+        self.log.debug(f"Rescanning {len(dirs)} modified directories")
+        changed, removed, delta = self._scan(dirs)
+
+        if base.scans:
+            base.scans.save(changed, removed=removed)
+
+        if delta:
+            base._version += 1
+            base.deltas[base._version] = delta
+
+            # Only keep a short history for incremental consumers such as FileIndex
+            while len(base.deltas) > self.history:
+                base.deltas.pop(next(iter(base.deltas)))
+
+            for func in list(base.subscribers):
+                try:
+                    func(delta)
+                except:
+                    self.log.exception(f"Subscriber failed to process changes: {func}")
+
+        return delta
+
+    def build(self):
+        """
+        Scans the entire tree of the base census
+        """
+        base = self.base
+        if base.root is None:
+            return
+
+        with base.lock:
+            cached = base.scans.load(base.root) if base.scans else {}
+
+            base._listings = {}
+            changed, removed, _ = self._scan([""], cached)
+
+            if "" not in base._listings:
+                self.log.error(f"Error scanning directory tree: {base.root}")
+
+            # Anything left over in the cache no longer exists
+            if base.scans:
+                base.scans.save(changed, removed=removed + list(cached))
+
+            base.built = True
+            base._version += 1
+            base.deltas.clear()
+
+    def ensure(self):
+        """
+        Builds the base census if it has not been, without revalidating an existing
+        one. Queries use this so that they follow the census version, which changes
+        on demand via refresh or when a Watcher delivers changes
+
+        Returns
+        -------
+        self : Census
+        """
+        base = self.base
+        if base.root is not None and not base.built:
+            with base.lock:
+                if not base.built:
+                    self.build()
+                    base.checked[self.prefix] = time.monotonic()
+
+        return self
+
+    def fresh(self):
+        """
+        Checks if this census, or a census containing it, was refreshed within the
+        last `interval` seconds
+
+        Returns
+        -------
+        bool
+        """
+        now = time.monotonic()
+        prefix = self.prefix
+        while True:
+            if now - self.base.checked.get(prefix, -np.inf) < self.interval:
+                return True
+            if not prefix:
+                return False
+            prefix = os.path.dirname(prefix)
+
+    def refresh(self, force=False):
+        """
+        Rescans the directories of this census whose modification time changed since
+        the last scan, building the base census first if it has not been. Skipped if
+        the directories were already checked within the last `interval` seconds
+
+        Parameters
+        ----------
+        force : bool, default=False
+            Check the modification times even if they were recently checked
+
+        Returns
+        -------
+        self : Census
+        """
+        base = self.base
+        if base.root is None:
+            return self
+
+        with base.lock:
+            if not base.built:
+                self.build()
+                base.checked[self.prefix] = time.monotonic()
+                return self
+
+            if not force and self.fresh():
+                return self
+
+            dirs = list(self.listings)
+            keys = [os.path.join(self.prefix, subdir) if subdir else self.prefix for subdir in dirs]
+
+            def mtime(key):
+                try:
+                    return os.stat(self._path(key)).st_mtime_ns
+                except OSError:
+                    return None
+
+            mtimes = list(self.executor().map(mtime, keys))
+
+            stale = [
+                key for key, current in zip(keys, mtimes)
+                if current != base._listings[key].mtime
+            ]
+
+            if stale:
+                self._update(stale)
+
+            base.checked[self.prefix] = time.monotonic()
+
+        return self
+
+    def rescan(self, paths):
+        """
+        Rescans specific directories, such as those reported by a filesystem event,
+        without checking the modification time of every other directory
+
+        Parameters
+        ----------
+        paths : list[str]
+            Absolute paths of directories to rescan. Paths outside of the census or
+            not yet known to it are replaced by their closest known parent
+
+        Returns
+        -------
+        delta : Delta
+            Changes discovered by the rescan
+        """
+        base = self.base
+        if base.root is None:
+            return Delta()
+
+        with base.lock:
+            if not base.built:
+                self.build()
+                return Delta()
+
+            keys = set()
+            for path in paths:
+                key = os.path.relpath(path, base.root)
+                if key.startswith(os.pardir):
+                    continue
+                if key == ".":
+                    key = ""
+
+                while key and key not in base._listings:
+                    key = os.path.dirname(key)
+                keys.add(key)
+
+            if keys:
+                return self._update(sorted(keys))
+
+        return Delta()
+
+    def subscribe(self, func):
+        """
+        Registers a function to be called with the Delta of every change to the base
+        census
+
+        Parameters
+        ----------
+        func : function
+            Called as func(delta). Paths of the delta are relative to the base census
+        """
+        self.base.subscribers.append(func)
+
+    def unsubscribe(self, func):
+        """
+        Removes a function registered by subscribe
+
+        Parameters
+        ----------
+        func : function
+            Function to remove
+        """
+        if func in self.base.subscribers:
+            self.base.subscribers.remove(func)
+
+    def relative(self, path):
+        """
+        Converts a path relative to the base census to one relative to this census
+
+        Parameters
+        ----------
+        path : str
+            Path relative to the base census
+
+        Returns
+        -------
+        str | None
+            Path relative to this census or None if it is outside of it
+        """
+        if not self.prefix:
+            return path
+
+        prefix = self.prefix + os.sep
+        if path.startswith(prefix):
+            return path[len(prefix):]
+
+    def walk(self):
+        """
+        Iterates over every entry of the census
+
+        Yields
+        ------
+        subdir : str
+            Directory of the entry relative to this census' root
+        entry : Entry
+            The entry
+        """
+        for subdir, listing in self.listings.items():
+            for entry in listing.entries:
+                yield subdir, entry
+
+
+class FileIndex:
+    """
+    In-memory index of the files under a FileFinder's path
+
+    The index is derived from the finder's Census and only rebuilt when the census
+    changes. Files are kept as a sorted list of relative paths so that prefix lookups
+    are a bisection, and the results of substring and regex queries are memoized
+    until the next rebuild
+
+    The files and their memoized queries are kept together as one snapshot that is
+    replaced, never modified, when the census changes. Queries read a snapshot once,
+    so a query running on another thread during an update neither sees a partially
+    updated list nor memoizes a stale result into the new snapshot
+    """
+    def __init__(self, finder):
+        """
+        Parameters
+        ----------
+        finder : FileFinder
+            Finder to index. Its extMatches decides which files of its census are kept
+        """
+        self.finder = finder
+        self.census = finder.census
+        self.version = None
+
+        # (files, queries) replaced as a whole on every change
+        self.snapshot = ([], {})
+
+        self.log = finder.log
+
+    def __len__(self):
+        return len(self.files)
+
+    def __iter__(self):
+        return iter(self.files)
+
+    @property
+    def files(self):
+        """
+        Sorted relative paths of the indexed files
+        """
+        return self.snapshot[0]
+
+    def build(self):
+        """
+        Rebuilds the index from the census
+        """
+        self.snapshot = (sorted(
+            os.path.join(subdir, entry.name)
+            for subdir, entry in self.census.walk()
+            if not entry.isdir
+            and self.finder.extMatches(Path(entry.name), isdir=False)
+        ), {})
+        self.version = self.census.version
+
+    def apply(self, delta):
+        """
+        Applies the changes of a census Delta to a copy of the files, which then
+        replaces the snapshot
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to this index's census
+        """
+        files = list(self.files)
+
+        for file in delta.removed:
+            i = bisect.bisect_left(files, file)
+            if i < len(files) and files[i] == file:
+                files.pop(i)
+
+        for file in delta.added:
+            if self.finder.extMatches(Path(file), isdir=file in self.census.listings):
+                i = bisect.bisect_left(files, file)
+                if i == len(files) or files[i] != file:
+                    files.insert(i, file)
+
+        self.snapshot = (files, {})
+
+    def refresh(self, force=False):
+        """
+        Refreshes the census then syncs the index, see Census.refresh
+
+        Parameters
+        ----------
+        force : bool, default=False
+            Passed to Census.refresh
+
+        Returns
+        -------
+        self : FileIndex
+        """
+        self.census.refresh(force)
+        return self.sync()
+
+    def sync(self):
+        """
+        Updates the index if the census changed, without revalidating the census
+        against the filesystem. If the deltas since the last update are still
+        available they are applied incrementally, otherwise the index is rebuilt
+
+        Returns
+        -------
+        self : FileIndex
+        """
+        self.census.ensure()
+        if self.version == self.census.version:
+            return self
+
+        with self.census.base.lock:
+            if self.version != (version := self.census.version):
+                deltas = self.census.base.deltas
+                missing = self.version is None or any(
+                    v not in deltas for v in range(self.version + 1, version + 1)
+                )
+
+                if missing:
+                    self.log.debug("Rebuilding file index")
+                    self.build()
+                else:
+                    for v in range(self.version + 1, version + 1):
+                        self.apply(deltas[v].relative(self.census))
+                    self.version = version
+
+        return self
+
+    def _memoize(self, key, func):
+        """
+        Returns a memoized query result, computing it on the first call. The result
+        is computed from and memoized in the same snapshot
+
+        Parameters
+        ----------
+        key : tuple
+            Unique key for the query
+        func : function
+            Called with the files of the snapshot to produce the result if it is not
+            memoized
+
+        Returns
+        -------
+        list[str]
+            Query result
+        """
+        files, queries = self.snapshot
+        if key not in queries:
+            queries[key] = func(files)
+        return queries[key]
+
+    def prefix(self, prefix, files=None):
+        """
+        Retrieves the files starting with a given prefix
+
+        Parameters
+        ----------
+        prefix : str
+            Relative path prefix, eg. "output/" or "lut_full/LUT_"
+        files : list[str], default=None
+            Sorted files to search, defaults to the current files
+
+        Returns
+        -------
+        list[str]
+            Matching files, sorted
+        """
+        if files is None:
+            files = self.files
+
+        i = bisect.bisect_left(files, prefix)
+        j = i
+        while j < len(files) and files[j].startswith(prefix):
+            j += 1
+        return files[i:j]
+
+    def contains(self, name):
+        """
+        Retrieves the files containing a substring
+
+        Parameters
+        ----------
+        name : str
+            Substring to search for
+
+        Returns
+        -------
+        list[str]
+            Matching files, sorted
+        """
+        return self._memoize(("in", name),
+            lambda files: [file for file in files if name in file]
+        )
+
+    def search(self, pattern):
+        """
+        Retrieves the files matching a regex via pattern.search. If the pattern is
+        anchored, only the files sharing its literal prefix are tested
+
+        Parameters
+        ----------
+        pattern : str | re.Pattern
+            Regex to search with
+
+        Returns
+        -------
+        list[str]
+            Matching files, sorted
+        """
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern)
+
+        def func(files):
+            if not pattern.flags & re.IGNORECASE:
+                if prefix := literalPrefix(pattern.pattern):
+                    files = self.prefix(prefix, files)
+            return [file for file in files if pattern.search(file)]
+
+        return self._memoize(("re", pattern.pattern, pattern.flags), func)
+
+    def batch(self, tests):
+        """
+        Answers several queries in a single pass over the files, memoizing each so
+        that later prefix, contains or search calls reuse the result
+
+        Parameters
+        ----------
+        tests : dict
+            Memoization keys, eg. ("in", name) or ("re", pattern, flags), mapped to a
+            function that returns True if a file matches
+
+        Returns
+        -------
+        dict
+            The keys mapped to their matching files, sorted
+        """
+        files, queries = self.snapshot
+        pending = {key: test for key, test in tests.items() if key not in queries}
+
+        if pending:
+            found = {key: [] for key in pending}
+            for file in files:
+                for key, test in pending.items():
+                    if test(file):
+                        found[key].append(file)
+            queries.update(found)
+
+        return {key: queries[key] for key in tests}
+
+
+def residentSize(array):
+    """
+    Estimates the bytes of an array that are held in memory. Lazy arrays, such as
+    memmaps, dask arrays and xarray's lazy indexing adapters over a backend, count as
+    0 until they are loaded
+
+    Parameters
+    ----------
+    array : any
+        Array, or the data of an xarray Variable
+
+    Returns
+    -------
+    int
+        Size in bytes
+    """
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return 0
+        if isinstance(array, np.ndarray):
+            return array.nbytes
+        if isinstance(array, pd.Index):
+            return int(array.memory_usage())
+
+        # Unwrap xarray's indexing adapters
+        inner = getattr(array, "array", None)
+        if inner is array:
+            break
+        array = inner
+
+    return 0
+
+
+def estimateSize(data):
+    """
+    Estimates the memory footprint of a loaded object. xarray objects only count the
+    data that is in memory, not the logical size of lazily opened variables
+
+    Parameters
+    ----------
+    data : any
+        Loaded object, eg. an xarray object, a DataFrame, or a JSON dict
+
+    Returns
+    -------
+    int
+        Estimated size in bytes
+    """
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(deep=True).sum())
+
+    if isinstance(data, xr.Variable):
+        return residentSize(data._data)
+
+    if isinstance(data, xr.DataArray):
+        return estimateSize(data.variable) + sum(map(estimateSize, data.coords.variables.values()))
+
+    if isinstance(data, xr.Dataset):
+        return sum(map(estimateSize, data.variables.values()))
+
+    if isinstance(data, np.memmap):
+        return 0
+
+    if (nbytes := getattr(data, "nbytes", None)) is not None:
+        return int(nbytes)
+
+    if isinstance(data, dict):
+        return sys.getsizeof(data) + sum(
+            estimateSize(key) + estimateSize(value) for key, value in data.items()
+        )
+
+    if isinstance(data, (list, tuple, set)):
+        return sys.getsizeof(data) + sum(estimateSize(item) for item in data)
+
+    return sys.getsizeof(data)
+
+
+class LoadCache:
+    """
+    Memory-bounded least-recently-used cache for FileFinder.load
+
+    Each object is stored with its estimated size and the modification time of its
+    file. Once the byte budget is exceeded, the least recently used objects are
+    evicted. Objects whose file was overwritten since they were loaded are treated
+    as a miss and reloaded
+
+    Lazily opened xarray objects only hold the data that has been read, which grows
+    after they are cached, eg. once .values is accessed. Their sizes are measured
+    again on every get and put so that the eviction follows the resident size
+    """
+    budget = 2 * 1024**3
+
+    def __init__(self, budget=None):
+        """
+        Parameters
+        ----------
+        budget : int, default=None
+            Maximum total estimated size in bytes. Defaults to the class attribute
+            `budget` (2 GB)
+        """
+        if budget is not None:
+            self.budget = budget
+
+        self.data = OrderedDict()
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+        self.log = logging.getLogger(self.__class__.__name__)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, file):
+        return file in self.data
+
+    @classmethod
+    def create(cls, option):
+        """
+        Creates a LoadCache from a user option
+
+        Parameters
+        ----------
+        option : bool | int | LoadCache
+            False disables the cache, True uses the default budget, an int is the
+            budget in bytes. LoadCache objects are passed through
+
+        Returns
+        -------
+        LoadCache | None
+        """
+        if isinstance(option, cls):
+            return option
+        if option is True:
+            return cls()
+        if option:
+            return cls(option)
+
+    @property
+    def stats(self):
+        """
+        Counters of the cache's effectiveness
+
+        Returns
+        -------
+        dict
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.data),
+            "size": self.size,
+            "budget": self.budget,
+        }
+
+    def _mtime(self, file):
+        try:
+            return os.stat(file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _pop(self, file):
+        """
+        Removes an object, updating the total size
+        """
+        _, size, _ = self.data.pop(file)
+        self.size -= size
+
+    def _measure(self):
+        """
+        Measures the xarray objects again, updating the total size
+        """
+        for file, (data, size, mtime) in list(self.data.items()):
+            if isinstance(data, (xr.Dataset, xr.DataArray, xr.Variable)):
+                resident = estimateSize(data)
+                if resident != size:
+                    self.data[file] = (data, resident, mtime)
+                    self.size += resident - size
+
+    def _evict(self, size=0):
+        """
+        Evicts the least recently used objects until another `size` bytes fit in the
+        budget
+        """
+        while self.data and self.size + size > self.budget:
+            evicted = next(iter(self.data))
+            self.log.debug(f"Evicting from cache: {evicted}")
+            self._pop(evicted)
+            self.evictions += 1
+
+    def get(self, file):
+        """
+        Retrieves an object if it is cached and its file has not changed since
+
+        Parameters
+        ----------
+        file : pathlib.Path
+            Path to the loaded file
+
+        Returns
+        -------
+        any | None
+            The cached object, or None on a miss
+        """
+        mtime = self._mtime(file)
+
+        with self.lock:
+            if file in self.data:
+                data, _, loaded = self.data[file]
+                if loaded == mtime:
+                    self.data.move_to_end(file)
+                    self.hits += 1
+
+                    self._measure()
+                    self._evict()
+
+                    return data
+
+                self.log.debug(f"File changed since it was cached, reloading: {file}")
+                self._pop(file)
+
+            self.misses += 1
+
+    def put(self, file, data):
+        """
+        Caches an object, evicting the least recently used objects if the budget is
+        exceeded
+
+        Parameters
+        ----------
+        file : pathlib.Path
+            Path to the loaded file
+        data : any
+            Loaded object
+        """
+        size = estimateSize(data)
+        if size > self.budget:
+            self.log.warning(f"Not caching {file} as its estimated size ({size} bytes) exceeds the budget ({self.budget} bytes)")
+            return
+
+        mtime = self._mtime(file)
+
+        with self.lock:
+            if file in self.data:
+                self._pop(file)
+
+            self._measure()
+            self._evict(size)
+
+            self.data[file] = (data, size, mtime)
+            self.size += size
+
+    def clear(self):
+        """
+        Removes every object from the cache
+        """
+        with self.lock:
+            self.data.clear()
+            self.size = 0
+
+
+class AsyncRunner:
+    """
+    Runs blocking WD calls for asyncio callers on a dedicated, bounded thread pool so
+    that they do not contend with the event loop's default executor
+
+    Duplicate requests, identified by a key, share the same in-flight call. Awaiting
+    callers may be cancelled independently; once every caller of a request has been
+    cancelled the call is cancelled too if it has not started yet. A call that is
+    already running finishes in the background and its result is discarded
+    """
+    workers = 4
+
+    def __init__(self, workers=None):
+        """
+        Parameters
+        ----------
+        workers : int, default=None
+            Maximum number of threads, defaults to the class attribute `workers`
+        """
+        if workers:
+            self.workers = workers
+
+        self.pool = None
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Retrieves the in-flight future of a request, starting the call if there is
+        none
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies duplicate requests
+        func : function
+            Blocking function to call
+        *args, **kwargs
+            Passed to the function
+
+        Returns
+        -------
+        request : SimpleNamespace
+            The shared future and the number of callers waiting on it
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), key)
+
+        if (request := self.inflight.get(key)) is None:
+            with self.lock:
+                if self.pool is None:
+                    self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="IsofitWD")
+
+            future = loop.run_in_executor(self.pool, partial(func, *args, **kwargs))
+            request = SimpleNamespace(future=future, waiting=0)
+            self.inflight[key] = request
+
+            def done(_):
+                if self.inflight.get(key) is request:
+                    del self.inflight[key]
+            future.add_done_callback(done)
+
+        return request
+
+    async def run(self, key, func, *args, **kwargs):
+        """
+        Awaits the result of a blocking call, sharing it with any duplicate request
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies duplicate requests
+        func : function
+            Blocking function to call
+        *args, **kwargs
+            Passed to the function
+
+        Returns
+        -------
+        any
+            Return of the function
+        """
+        request = self.submit(key, func, *args, **kwargs)
+        request.waiting += 1
+        try:
+            return await asyncio.shield(request.future)
+        except asyncio.CancelledError:
+            if request.waiting == 1:
+                request.future.cancel()
+            raise
+        finally:
+            request.waiting -= 1
+
+    def shutdown(self):
+        """
+        Shuts down the thread pool, cancelling any call that has not started
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+class FileFinder:
+    """
+    Utility class to find files under a directory using various matching strategies
+    This must be subclassed and define the following:
+        function _load       - The loader for a passed file
+        attribute extensions - A list of extensions to retrieve
+    """
+    path = None
+    cache = None
+    scans = None
+    workers = 8
+    runner = AsyncRunner()
+    patterns = {}
+    classifier = None
+    extensions = []
+
+    def __init__(self, path=None, cache=True, extensions=[], patterns={}, scan_cache=None, workers=None, census=None):
+        """
+        Parameters
+        ----------
+        path : str, default=None
+            Path to directory to operate on
+        cache : bool | int | LoadCache, default=True
+            Enable caching objects in the .load function, see LoadCache.create. An int
+            sets the byte budget of the cache
+        extensions : list, default=[]
+            File extensions to retrieve when searching
+        scan_cache : bool | str | ScanCache, default=None
+            Persist directory scans to disk, see ScanCache.create for the options
+        workers : int, default=None
+            Number of threads used to scan directories concurrently. Defaults to the
+            class attribute `workers`
+        census : Census, default=None
+            Census of the path to share, such as a view of a parent's census. If not
+            provided, creates one for the path
+        """
+        if path is not None:
+            self.path = Path(path)
+
+        if extensions:
+            self.extensions = extensions
+
+        if not self.extensions:
+            raise AttributeError("One or more extensions must be defined")
+
+        if patterns:
+            self.patterns = patterns
+
+        self.classifier = Classifier(self.patterns)
+
+        self.cache = LoadCache.create(cache)
+
+        self.scans = ScanCache.create(scan_cache)
+
+        if workers:
+            self.workers = workers
+
+        self.log = logging.getLogger(str(self))
+
+        if census is None:
+            census = Census(self.path, scans=self.scans, workers=self.workers)
+        self.census = census
+
+        self.index = FileIndex(self)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} [{self.path}]>"
+
+    def info(self, file):
+        """
+        Retrieves known information for a file if its name matches one of the set
+        patterns
+
+        Parameters
+        ----------
+        file : str
+            File name to compare against the patterns dict keys. Only the basename of
+            a path is compared
+
+        Returns
+        -------
+        any
+            Returns the value if a regex key in the patterns dict matches the file name
+        """
+        return self.classifier.classify(os.path.basename(file))
+
+    @property
+    def files(self):
+        """
+        Passthrough attribute to the file index as of the current census version
+        """
+        return self.index.sync().files
+
+    def refresh(self, force=False):
+        """
+        Revalidates the census against the filesystem on demand. Queries otherwise
+        only see changes delivered by a Watcher or a previous refresh
+
+        Parameters
+        ----------
+        force : bool, default=False
+            Passed to Census.refresh
+
+        Returns
+        -------
+        self : FileFinder
+        """
+        self.census.refresh(force)
+        return self
+
+    def extMatches(self, file, isdir=None):
+        """
+        Checks if a given file's extension matches in the list of extensions
+        Special extension cases include:
+            "*" = Match any file
+            ""  = Only match files with no extension
+
+        Parameters
+        ----------
+        file : pathlib.Path
+            File path to check
+        isdir : bool, default=None
+            Whether the file is a directory, if already known. Skips the stat call
+
+        Returns
+        -------
+        bool
+            True if it matches one of the extensions, False otherwise
+        """
+        try:
+            if isdir is None:
+                isdir = file.is_dir()
+
+            if isdir:
+                return False
+
+            if "*" in self.extensions:
+                return True
+
+            return file.suffix in self.extensions
+        except:
+            self.log.exception(f"Failed to evaluate extension match: {file}")
+
+    def getTree(self, info=False, *, path=None, tree=None, depth=None):
+        """
+        Recursively finds the files under a directory as a dict tree
+
+        Parameters
+        ----------
+        info : bool, default=False
+            Return the found files as objects with their respective info
+        path : pathlib.Path, default=None
+            Directory to search, defaults to self.path
+        tree : dict, default=None
+            Tree structure of discovered files
+        depth : int, default=None
+            Maximum number of directory levels to descend. Directories beyond this are
+            returned as {name: None} to signal their contents were not retrieved.
+            Defaults to no limit
+
+        Returns
+        -------
+        tree : dict
+            Tree structure of discovered files. The keys are the directory names and
+            the list values are the found files
+        """
+        tree = tree if tree is not None else []
+
+        subdir = ""
+        if path is not None:
+            subdir = os.path.relpath(path, self.path)
+            if subdir == ".":
+                subdir = ""
+
+        listings = self.census.ensure().listings
+        if subdir not in listings:
+            self.log.error(f"Error reading path {path}, it is not under {self.path}")
+            return tree
+
+        def build(subdir, tree, depth):
+            for entry in listings[subdir].entries:
+                name = entry.name
+                if info:
+                    name = FileInfo(name, self.info(name))
+
+                if entry.isdir:
+                    if depth == 1:
+                        tree.append({name: None})
+                        continue
+
+                    subtree = []
+                    tree.append({name: subtree})
+                    if (child := os.path.join(subdir, entry.name)) in listings:
+                        build(child, subtree, depth and depth - 1)
+
+                elif self.extMatches(Path(entry.name), isdir=False):
+                    tree.append(name)
+
+        build(subdir, tree, depth)
+
+        return tree
+
+    def getFlat(self, path=None):
+        """
+        Finds all the files under a directory as a flat list with the base path removed
+
+        Parameters
+        ----------
+        path : pathlib.Path or None
+            Root path to search, defaults to self.path
+
+        Returns
+        -------
+        files : list[str]
+            Flat list of matching file paths relative to base
+        """
+        if path is None:
+            return list(self.files)
+
+        base = Path(path)
+
+        # Answer from the census if the path is beneath this finder
+        if self.path is not None:
+            subdir = os.path.relpath(base, self.path)
+            if not subdir.startswith(os.pardir):
+                census = self.census.ensure()
+                if subdir != ".":
+                    census = census.view(subdir)
+
+                return sorted(
+                    os.path.join(subdir, entry.name)
+                    for subdir, entry in census.walk()
+                    if not entry.isdir and self.extMatches(Path(entry.name), isdir=False)
+                )
+        base_len = len(str(base)) + 1  # precompute for slicing
+
+        files = []
+        try:
+            for root, _, filenames in os.walk(base):
+                for name in filenames:
+                    path = Path(root) / name
+                    if self.extMatches(path):
+                        files.append(str(path)[base_len:])
+        except:
+            self.log.exception(f"Error scanning directory tree: {base}")
+
+        return sorted(files)
+
+    def ifin(self, name, all=False, exc=[]):
+        """
+        Simple if name in filename match
+
+        Parameters
+        ----------
+        name : str
+            String to check in the filename
+        all : bool, default=False
+            Return all files matched instead of the first instance
+        exc : str | list[str], default=[]
+            A string or list of strings to use to exclude files. If a file contains
+            one of the strings in its name, it will not be selected
+
+        Returns
+        -------
+        str | list | None
+            First matched file if all is False, otherwise the full list
+        """
+        if isinstance(exc, str):
+            exc = [exc]
+
+        found = [
+            file for file in self.index.sync().contains(name)
+            if not any(ex in file for ex in exc)
+        ]
+
+        if not all and len(found) > 1:
+            self.log.warning(
+                "%d files matched pattern '%s'. Returning first match.", len(found), name
+            )
+
+        return found if all else (found[0] if found else None)
+
+    def match(self, regex, all=False, exc=[]):
+        """
+        Find files using a regex search
+
+        Parameters
+        ----------
+        regex : str | re.Pattern
+            Regex pattern to search for. Anchored patterns (eg. "^output/") only test
+            the files sharing the literal prefix
+        all : bool, default=False
+            Return all matches instead of first match
+        exc : str or list of str
+            Strings to exclude from results
+
+        Returns
+        -------
+        str or list or None
+            File path(s) matching the pattern
+        """
+        if isinstance(exc, str):
+            exc = [exc]
+
+        try:
+            pattern = re.compile(regex)
+        except re.error:
+            self.log.exception("Invalid regex pattern: %s", regex)
+            raise
+
+        found = [
+            file for file in self.index.sync().search(pattern)
+            if not any(ex in file for ex in exc)
+        ]
+
+        if not all and len(found) > 1:
+            self.log.warning(
+                "%d files matched pattern '%s'. Returning first match.", len(found), regex
+            )
+
+        return found if all else (found[0] if found else None)
+
+    @staticmethod
+    def findRegex(name):
+        """
+        Constructs the fuzzy regex used by find for a path-like name
+
+        Parameters
+        ----------
+        name : str
+            Path-like name, eg. "lut/.nc"
+
+        Returns
+        -------
+        str
+            Regex pattern
+        """
+        # Escape user input to avoid accidental regex issues
+        regex_parts = [f".*{re.escape(part)}.*" for part in name.split("/")]
+        return "/".join(regex_parts)
+
+    def find(self, name, *args, **kwargs):
+        """
+        Smart search for a file based on partial path structure
+
+        Parameters
+        ----------
+        name : str
+            Path-like name to construct fuzzy regex search
+        *args, **kwargs : forwarded to match()
+
+        Returns
+        -------
+        str or list or None
+            Matched file(s)
+        """
+        return self.match(self.findRegex(name), *args, **kwargs)
+
+    def query(self, specs):
+        """
+        Answers many find, match and ifin queries in a single pass over the index
+
+        Parameters
+        ----------
+        specs : dict
+            Query names mapped to a dict of key-word arguments for one of the query
+            functions, eg. {"luts": {"find": "lut/.nc", "all": True}}. Each dict must
+            set one of "find", "match" or "ifin" and may set "all" and "exc"
+
+        Returns
+        -------
+        dict
+            The query names mapped to their results, the same as calling the
+            respective function
+        """
+        tests = {}
+        queries = {}
+        for name, spec in specs.items():
+            spec = dict(spec)
+            if "ifin" in spec:
+                value = spec.pop("ifin")
+                key = ("in", value)
+                test = lambda file, value=value: value in file
+            else:
+                if "find" in spec:
+                    regex = self.findRegex(spec.pop("find"))
+                elif "match" in spec:
+                    regex = spec.pop("match")
+                else:
+                    raise AttributeError(f"Query {name!r} must set one of find, match or ifin")
+
+                pattern = re.compile(regex)
+                key = ("re", pattern.pattern, pattern.flags)
+                test = pattern.search
+
+            tests[key] = test
+            queries[name] = (key, spec)
+
+        found = self.index.sync().batch(tests)
+
+        results = {}
+        for name, (key, spec) in queries.items():
+            exc = spec.get("exc", [])
+            if isinstance(exc, str):
+                exc = [exc]
+
+            files = [file for file in found[key] if not any(ex in file for ex in exc)]
+
+            if spec.get("all", False):
+                results[name] = files
+            else:
+                if len(files) > 1:
+                    self.log.warning(
+                        "%d files matched query '%s'. Returning first match.", len(files), name
+                    )
+                results[name] = files[0] if files else None
+
+        return results
+
+    def load(self, *, path=None, ifin=None, find=None, match=None, **kwargs):
+        """
+        Loads a file based on one of several matching strategies
+        Only the first provided method is used
+
+        Parameters
+        ----------
+        path : str
+            Direct path to a file (absolute or relative to self.path)
+        ifin : str
+            Substring match against available files
+        find : str
+            Smart path-style fuzzy match
+        match : str
+            Regex match
+
+        Returns
+        -------
+        any
+            Loaded object from subclass's _load method
+        """
+        file = None
+        if path is not None:
+            file = path
+        elif ifin is not None:
+            file = self.ifin(ifin)
+        elif find is not None:
+            file = self.find(find)
+        elif match is not None:
+            file = self.match(match)
+        else:
+            raise AttributeError("One of the key-word arguments must be set")
+
+        if file is None:
+            raise FileNotFoundError("Cannot find file to load")
+
+        if not (p := Path(file)).exists():
+            p = self.path / file
+            if not p.exists():
+                raise FileNotFoundError("Cannot find file to load, attempted: %s", file)
+
+        if self.cache is not None:
+            if (data := self.cache.get(p)) is not None:
+                self.log.debug("Returning from cache: %s", p)
+                return data
+
+            self.log.debug("Loading file: %s", p)
+            data = self._load(p)
+            if data is not None:
+                self.cache.put(p, data)
+
+            return data
+
+        self.log.debug("Returning from load: %s", p)
+        return self._load(p, **kwargs)
+
+    def _load(self, file, **kwargs):
+        raise NotImplementedError("Subclass must define this function")
+
+    async def arun(self, func, *args, **kwargs):
+        """
+        Runs a blocking function on the shared WD executor, coalescing duplicate
+        in-flight calls of the same function with the same arguments
+
+        Parameters
+        ----------
+        func : function
+            Blocking function to call
+        *args, **kwargs
+            Passed to the function
+
+        Returns
+        -------
+        any
+            Return of the function
+        """
+        key = (func, repr(args), repr(sorted(kwargs.items())))
+        return await self.runner.run(key, func, *args, **kwargs)
+
+    async def aifin(self, *args, **kwargs):
+        """
+        Asynchronous ifin, see FileFinder.ifin
+        """
+        return await self.arun(self.ifin, *args, **kwargs)
+
+    async def amatch(self, *args, **kwargs):
+        """
+        Asynchronous match, see FileFinder.match
+        """
+        return await self.arun(self.match, *args, **kwargs)
+
+    async def afind(self, *args, **kwargs):
+        """
+        Asynchronous find, see FileFinder.find
+        """
+        return await self.arun(self.find, *args, **kwargs)
+
+    async def aquery(self, *args, **kwargs):
+        """
+        Asynchronous query, see FileFinder.query
+        """
+        return await self.arun(self.query, *args, **kwargs)
+
+    async def aload(self, **kwargs):
+        """
+        Asynchronous load, see FileFinder.load. Concurrent loads of the same file
+        share one read
+        """
+        return await self.arun(self.load, **kwargs)
+
+    async def agetTree(self, *args, **kwargs):
+        """
+        Asynchronous getTree, see FileFinder.getTree
+        """
+        return await self.arun(self.getTree, *args, **kwargs)
+
+    def update(self, delta):
+        """
+        Called by a Watcher with the changes to this finder's directory. The index
+        already applies the changes, so subclasses only need to override this to
+        refresh attributes derived from the files
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to this finder's path
+        """
+
+
+class Config(FileFinder):
+    extensions = [".json"]
+    patterns = {
+        # Presolve
+        r"(.*_h2o.json)": "Presolve configuration produced by apply_oe",
+        r"(.*_h2o.json.tmpl)": "Presolve configuration template for developer purposes",
+        r"(.*_h2o_tpl.json)": "MODTRAN template configuration for the presolve run",
+        # Full
+        r"(.*_isofit.json)": "ISOFIT main configuration",
+        r"(.*_isofit.json.tmpl)": "ISOFIT main configuration template for developer purposes",
+        r"(.*_modtran_tpl.json)": "MODTRAN template configuration for ISOFIT",
+    }
+
+    _load = Loaders.json
+
+
+class Data(FileFinder):
+    extensions = [".mat", ".txt"]
+    patterns = {
+        r"(channelized_uncertainty.txt)": None,
+        r"(model_discrepancy.mat)": None,
+        r"(surface.mat)": None,
+        r"(wavelengths.txt)": None,
+    }
+
+    def _load(self, file, **kwargs):
+        if file.suffix == ".csv":
+            return Loaders.csv(file, **kwargs)
+
+
+class LUT(FileFinder):
+    extensions = [".nc"]
+    patterns = {
+        r"(6S.lut.nc)": "LUT produced by the SixS radiative transfer model for sRTMnet",
+        r"(lut.nc)": "Look-Up-Table for the radiative transfer model",
+        r"(sRTMnet.predicts.nc)": "Output predicts of sRTMnet",
+    }
+
+    _load = Loaders.lut
+
+    lut_regex = r"(\w+)-(\d*\.?\d+)_?"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def parseLutFiles(self, ext):
+        """
+        Parses LUT_*.{ext} file names for the LUT grid
+
+        Parameters
+        ----------
+        ext : str
+            File extension to retrieve:
+                sixs    = inp
+                modtran = json
+
+        Returns
+        -------
+        data : dict
+            Quantities to a set of their LUT values parsed from the file names
+        """
+        data = {}
+        for file in self.path.glob(f"*.{ext}"):
+            matches = re.findall(self.lut_regex, file.stem[4:])  # [4:] skips LUT_
+            for name, value in matches:
+                quant = data.setdefault(name, set())
+                quant.add(float(value))
+
+        return data
+
+    @cached_property
+    def sixs(self):
+        return self.parseLutFiles("inp")
+
+    @cached_property
+    def modtran(self):
+        return self.parseLutFiles("json")
+
+
+class Input(FileFinder):
+    extensions = [""]
+
+    _load = Loaders.envi
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        for file in self.files:
+            if not self.census.exists(Path(file).with_suffix(".hdr")):
+                raise FileNotFoundError(f"Missing .hdr file for {file}")
+
+
+class Output(FileFinder):
+    extensions = [""]
+    patterns = {
+        # Presolve
+        r"(.*_subs_atm)": None,
+        r"(.*_subs_h2o)": None,
+        r"(.*_subs_rfl)": None,
+        r"(.*_subs_state)": None,
+        r"(.*_subs_uncert)": None,
+        # Full
+        r"(.*_atm_interp)": None,
+        r"(.*_rfl)": "Reflectance",
+        r"(.*_lbl)": None,
+        r"(.*_uncert)": None,
+    }
+    _load = Loaders.envi
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.parseProducts()
+
+        for file in self.files:
+            if not self.census.exists(Path(file).with_suffix(".hdr")):
+                raise FileNotFoundError(f"Missing .hdr file for {file}")
+
+    def parseProducts(self):
+        """
+        Parses the product name and the products available from the files
+        """
+        files = self.files
+
+        self.name = None
+        for file in files:
+            if "subs" in file:
+                self.h2o = True
+            elif file.endswith("_rfl"):
+                self.name = file[:-4]
+
+        if self.name is None:
+            self.log.warning(
+                "Could not find the full reflectance product and therefore could not parse the name. This may have downstream effects"
+            )
+
+        self.products = {file.replace(f"{self.name}_", ""): file for file in files}
+
+    def update(self, delta):
+        """
+        Re-parses the products when files are added or removed
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to this finder's path
+        """
+        if delta.added or delta.removed:
+            self.parseProducts()
+
+    def __getattr__(self, key):
+        if key in self.products:
+            return self.products[key]
+        return super().__getattr__(key)
+
+    def open_all(self, products=None, chunks=None):
+        """
+        Opens the products of this output as a single lazy Dataset with one variable
+        per product sharing the y and x dimensions. Only headers are parsed, via the
+        header cache, no data is read until a variable is accessed
+
+        Products whose spatial shape differs from the first product, such as the
+        presolve superpixel products, are skipped. Products whose bands differ from
+        every previously added product receive their own band dimension named
+        [product]_band, along with their band coordinates, eg. uncert_band and
+        uncert_wavelength
+
+        Parameters
+        ----------
+        products : list[str], default=None
+            Products to open, eg. ["rfl", "uncert"]. Defaults to every product with
+            the reflectance product first
+        chunks : int | dict | str, default=None
+            Passed to Loaders.envi to load as dask arrays. Chunks of a renamed band
+            dimension are given by the original "band" key. Products are opened from
+            the ENVI directly, bypassing the Zarr cache so that nothing is converted
+            up front
+
+        Returns
+        -------
+        xr.Dataset
+        """
+        if products is None:
+            products = sorted(self.products, key=lambda product: product != "rfl")
+
+        data = {}
+        bands = {}
+        shape = None
+        for product in products:
+            if (file := self.products.get(product)) is None:
+                self.log.error(f"Product does not exist: {product}")
+                continue
+
+            file = self.path / file
+            header = EnviHeader.read(file.with_suffix(".hdr"))
+
+            if shape is None:
+                shape = header.shape[1:]
+            elif header.shape[1:] != shape:
+                self.log.debug(f"Skipping {product}, its shape {header.shape[1:]} does not match {shape}")
+                continue
+
+            da = Loaders.envi(file, chunks=chunks, cache=False)
+            if isinstance(da, xr.Dataset):
+                da = da.band_data
+
+            # Reuse the band dimension of a previous product if the bands match
+            coords = da.band.coords
+            for dim, other in bands.items():
+                if coords.to_dataset().identical(other):
+                    break
+            else:
+                dim = "band" if not bands else f"{product}_band"
+                bands[dim] = coords.to_dataset()
+
+            if dim != "band":
+                names = {name: f"{product}_{name}" for name in coords if name != "band"}
+                da = da.rename({**names, "band": dim})
+
+            data[product] = da
+
+        ds = xr.Dataset(data)
+        ds.coords["y"] = range(ds.sizes.get("y", 0))
+        ds.coords["x"] = range(ds.sizes.get("x", 0))
+        ds.attrs = {"name": self.name or "", "path": str(self.path)}
+
+        return ds
+
+    def rgb(self, r=60, g=40, b=30):
+        """
+        Returns the RGB data of the RFL product
+
+        Parameters
+        ----------
+        r : int, default=60
+            Red band
+        g : int, default=40
+            Green band
+        b : int, default=30
+            Blue band
+
+        Returns
+        -------
+        xr.DataArray
+        """
+        if not (file := self.find("rfl", exc="subs")):
+            self.log.error(
+                "Could not find the full reflectance product, does it exist?"
+            )
+            return
+
+        # Retrieve the RGB subset, reading only these bands
+        rgb = Loaders.bands(self.path / file, [r, g, b]).transpose("y", "x", "band")
+        rgb /= rgb.max(["x", "y"])  # Brightens image
+
+        # Convert to pixel coords for easier plotting
+        rgb["x"] = range(rgb.x.size)
+        rgb["y"] = range(rgb.y.size)
+
+        return rgb
+
+
+class Container:
+    """
+    Subclasses must contain the attributes:
+
+    data : list
+        Must be in the form of [(label[str], data[any])]
+    dataclass : dict
+        Must be in the form of {label[str]: dataclass}
 
     The dataclass must have the bool attribute 'enabled' to check when iterating over
-    the data
+    the data. Subclasses backed by a LogStore override __iter__ instead
+
+    Additionally, subclasses may define the 'yields' attribute to control which
+    variable is yielded during iter:
+        "item"  = Yield the (label, data) pair [default]
+        "label" = Yields the label string only
+        "data"  = Yields only the data
+    By default, "item" is yielded
+    """
+    yields = "item"
+
+    def __iter__(self):
+        """
+        Iterates over the "data" attribute, yielding if that dataclass is enabled
+        """
+        for item in self.data:
+            label, data = item
+            if self.dataclass[label].enabled:
+                yield locals()[self.yields]
+
+    def __getattr__(self, label):
+        return self[label]
+
+    def __getitem__(self, label):
+        return self.dataclass.get(label)
+
+    def toggle(self, *labels, state):
+        """
+        Toggles dataclasses' enabled state
+
+        Parameters
+        ----------
+        *labels : str
+            Labels of the dataclasses to toggle
+        state : bool
+            Enabled state
+        """
+        for label in labels:
+            if label in self.dataclass:
+                self.dataclass[label].enabled = state
+            else:
+                self.log.error(f"Label not found: {label!r}")
+
+    def enable(self, *args, **kwargs):
+        """
+        Toggles dataclasses' enabled state to True
+        """
+        self.toggle(*args, **kwargs, state=True)
+
+    def disable(self, *args, **kwargs):
+        """
+        Toggles dataclasses' enabled state to False
+        """
+        self.toggle(*args, **kwargs, state=False)
+
+    def reset(self):
+        """
+        Resets the "lines" attribute of each dataclass to an empty list
+        """
+        for label, dataclass in self.dataclass.items():
+            if hasattr(dataclass, "lines"):
+                dataclass.lines = []
+
+
+@dataclass
+class Marker:
+    enabled: bool
+    regex: Pattern
+    format: str = None
+
+
+class Markers(Container):
+    """
+    Markers of interest in an ISOFIT log. Each line of the LogStore records the id of
+    the marker its message matched, or -1
+
+    Ids index `labels`, which start as the keys of `dataclass`. Markers with a format
+    add a label per distinct formatted match, eg. "Resampling {name}", and `parents`
+    maps every id back to the key of its marker
+    """
+    def __init__(self, store):
+        """
+        Parameters
+        ----------
+        store : LogStore
+            Store of the parsed lines
+        """
+        self.store = store
+        self.dataclass = {
+            "Presolve Start": Marker(
+                enabled = True,
+                regex = re.compile(r"Run ISOFIT initial guess"),
+            ),
+            "Full Solution Start": Marker(
+                enabled = True,
+                regex = re.compile(r"Running ISOFIT with full LUT"),
+            ),
+            "Inversions Start": Marker(
+                enabled = True,
+                regex = re.compile(r"Beginning \d+ inversions"),
+            ),
+            "Inversions End": Marker(
+                enabled = False,
+                regex = re.compile(r"Analytical line inversions complete"),
+            ),
+            "Analytical Start": Marker(
+                enabled = True,
+                regex = re.compile(r"Analytical line inference"),
+            ),
+            "Analytical End": Marker(
+                enabled = False,
+                regex = re.compile(r"Analytical line inversions complete .*"),
+            ),
+            "LUT Creation Start": Marker(
+                enabled = True,
+                regex = re.compile(r"Initializing LUT file"),
+            ),
+            "Loading LUT": Marker(
+                enabled = True,
+                regex = re.compile(r"Loading LUT into memory"),
+            ),
+            "LUT Loaded": Marker(
+                enabled = True,
+                regex = re.compile(r"LUTs fully loaded"),
+            ),
+            "Interpolators Built": Marker(
+                enabled = True,
+                regex = re.compile(r"Interpolators built"),
+            ),
+            "Sims Start": Marker(
+                enabled = True,
+                regex = re.compile(r"Executing parallel simulations"),
+            ),
+            "Sims End": Marker(
+                enabled = True,
+                regex = re.compile(r"100.00% simulations complete"),
+            ),
+            "Flushing": Marker(
+                enabled = True,
+                regex = re.compile(r"Flushing"),
+            ),
+            "Predicting sRTMnet": Marker(
+                enabled = True,
+                regex = re.compile(r"Loading and predicting with emulator"),
+            ),
+            "Resampling Parallel": Marker(
+                enabled = True,
+                regex = re.compile(r"Executing resamples in parallel"),
+            ),
+            "Resampling Finished": Marker(
+                enabled = True,
+                regex = re.compile(r"Resampling finished"),
+            ),
+            "Resampling": Marker(
+                enabled = True,
+                format = "Resampling {name}",
+                regex = re.compile(r"Resampling (?P<name>.*)"),
+            ),
+        }
+        self.labels = list(self.dataclass)
+        self.parents = list(self.dataclass)
+        self.ids = {label: i for i, label in enumerate(self.labels)}
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.compile()
+
+    def compile(self):
+        """
+        Buckets the markers by the first characters of their literal prefixes so that
+        check() only runs the regexes of markers a message could match. The bucket key
+        length is that of the shortest prefix. Markers without a literal prefix are
+        checked against every message
+        """
+        prefixes = {
+            label: literalPrefix(f"^{marker.regex.pattern}").encode()
+            for label, marker in self.dataclass.items()
+        }
+        self.width = min(filter(None, map(len, prefixes.values())), default=0)
+
+        self.always = []
+        self.buckets = defaultdict(list)
+        for i, (label, prefix) in enumerate(prefixes.items()):
+            if self.width and len(prefix) >= self.width:
+                self.buckets[prefix[:self.width]].append(i)
+            else:
+                self.always.append(i)
+
+        # Candidates in the order of the dataclass, so the first marker still wins
+        self.buckets = {
+            key: sorted(ids + self.always)
+            for key, ids in self.buckets.items()
+        }
+        self.markers = list(self.dataclass.items())
+
+    def __iter__(self):
+        """
+        Iterates over the lines that matched an enabled marker
+
+        Yields
+        ------
+        label : str
+            Label of the marker
+        row : int
+            Row of the line in the store
+        """
+        markers = self.store["marker"]
+        for row in self.rows().tolist():
+            yield self.labels[markers[row]], row
+
+    def check(self, message):
+        """
+        Checks if a message matches one of the markers of interest. Messages whose
+        first characters are not the prefix of any marker cost a single lookup
+
+        Parameters
+        ----------
+        message : bytes | str
+            Log message
+
+        Returns
+        -------
+        int
+            Id of the matched marker, or of its formatted label. -1 if none matched
+        """
+        if isinstance(message, str):
+            message = message.encode()
+
+        candidates = self.buckets.get(message[:self.width], self.always)
+        if not candidates:
+            return -1
+
+        text = message.decode(errors="replace")
+        for i in candidates:
+            label, marker = self.markers[i]
+            if (match := marker.regex.match(text)):
+                data = match.groupdict()
+                if data and marker.format:
+                    return self.label(marker.format.format(**data), label)
+                return i
+
+        return -1
+
+    def label(self, label, parent):
+        """
+        Retrieves the id of a formatted label, adding it if it is new
+
+        Parameters
+        ----------
+        label : str
+            Formatted label, eg. "Resampling H2O"
+        parent : str
+            Key of the marker that produced the label
+
+        Returns
+        -------
+        int
+        """
+        if (i := self.ids.get(label)) is None:
+            i = self.ids[label] = len(self.labels)
+            self.labels.append(label)
+            self.parents.append(parent)
+
+        return i
+
+    def enabled(self):
+        """
+        Retrieves the marker ids that belong to enabled markers
+
+        Returns
+        -------
+        np.ndarray
+        """
+        return np.array([
+            i for i, parent in enumerate(self.parents)
+            if self.dataclass[parent].enabled
+        ], dtype=np.int16)
+
+    def mask(self, start=0):
+        """
+        Creates a mask of the lines that matched an enabled marker
+
+        Parameters
+        ----------
+        start : int, default=0
+            First row to mask, such as the first of newly parsed rows
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask over the rows of the store from `start`
+        """
+        return np.isin(self.store["marker"][start:], self.enabled())
+
+    def rows(self):
+        """
+        Retrieves the rows of the store that matched an enabled marker
+
+        Returns
+        -------
+        np.ndarray
+            Row indices
+        """
+        return np.flatnonzero(self.mask())
+
+
+@dataclass
+class Level:
+    enabled: bool
+
+
+class Levels(Container):
+    """
+    Log levels of an ISOFIT log. Each line of the LogStore records the code of its
+    level, which indexes `labels`. Levels not known beforehand are added as they are
+    encountered
+    """
+    def __init__(self, store):
+        """
+        Parameters
+        ----------
+        store : LogStore
+            Store of the parsed lines
+        """
+        self.store = store
+        self.dataclass = {
+            "DEBUG": Level(enabled=True),
+            "INFO": Level(enabled=True),
+            "WARNING": Level(enabled=True),
+            "ERROR": Level(enabled=True),
+        }
+        self.labels = list(self.dataclass)
+        self.codes = {label: code for code, label in enumerate(self.labels)}
+        self.formats = {
+            "timestamps": True,
+            "extra padding": True, # Adds +1 to the level padding in build()
+        }
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+    def __iter__(self):
+        """
+        Iterates over the rows of the store whose level is enabled
+        """
+        yield from self.rows().tolist()
+
+    def toggle(self, *labels, state):
+        """
+        Overrides the inherited toggle function to check for "formats" keys first then
+        call super()
+
+        Parameters
+        ----------
+        labels : str | list[str]
+            Labels of the dataclasses or formats to toggle
+        state : bool
+            Enabled state
+        """
+        labels = set(labels)
+        formats = labels - set(self.dataclass)
+        for label in formats:
+            if label in self.formats:
+                self.formats[label] = state
+
+        super().toggle(*(labels - formats), state=state)
+
+    def code(self, label):
+        """
+        Retrieves the code of a level, adding the level if it is new
+
+        Parameters
+        ----------
+        label : str
+            Level label, eg. "INFO"
+
+        Returns
+        -------
+        int
+        """
+        if (code := self.codes.get(label)) is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+            self.dataclass[label] = Level(enabled=True)
+
+        return code
+
+    def counts(self):
+        """
+        Counts the lines of each level
+
+        Returns
+        -------
+        dict
+            {label: count}
+        """
+        counts = np.bincount(self.store["level"], minlength=len(self.labels))
+        return dict(zip(self.labels, counts.tolist()))
+
+    def mask(self, start=0):
+        """
+        Creates a mask of the lines whose level is enabled
+
+        Parameters
+        ----------
+        start : int, default=0
+            First row to mask, such as the first of newly parsed rows
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask over the rows of the store from `start`
+        """
+        enabled = np.array([level.enabled for level in self.dataclass.values()], dtype=bool)
+        return enabled[self.store["level"][start:]]
+
+    def rows(self):
+        """
+        Retrieves the rows of the store whose level is enabled
+
+        Returns
+        -------
+        np.ndarray
+            Row indices
+        """
+        return np.flatnonzero(self.mask())
+
+    def build(self, rows=None):
+        """
+        Builds the filtered lines into a list of tuples to be used for writing.
+        Timestamps can be disabled by one of:
+
+            self.formats["timestamps"] = False
+            self.disable("timestamps")
+
+        Parameters
+        ----------
+        rows : np.ndarray, default=None
+            Rows of the store to build, such as a window of self.rows(). Defaults to
+            every enabled row
+
+        Returns
+        -------
+        lines : list[tuple[str, str, str]]
+            Returns a list of 3-pair tuples of strings in the form:
+                (timestamp, padded level, log message)
+            Timestamp will be an empty string if it is not enabled
+            The level is right-padded with whitespace to the length of the longest log
+            level (eg. "warning", "debug  ")
+        """
+        if rows is None:
+            rows = self.rows()
 
-    Additionally, subclasses may define the 'yields' attribute to control which
-    variable is yielded during iter:
-        "item"  = Yield the (label, data) pair [default]
-        "label" = Yields the label string only
-        "data"  = Yields only the data
-    By default, "item" is yielded
+        # Get the amount of padding needed to make level labels be equal
+        counts = self.counts()
+        levels = [label
+            for label, level in self.dataclass.items()
+            if level.enabled and counts[label]
+        ]
+
+        if not levels:
+            self.log.warning("No lines were retrieved. This may be caused either by too strict filters or the log being empty")
+            return []
+
+        padding = max(map(len, levels)) + self.formats["extra padding"]
+
+        labels = [label.ljust(padding) for label in self.labels]
+        codes = self.store["level"][rows]
+
+        timestamps = [""] * len(rows)
+        if self.formats["timestamps"]:
+            extra = " " * self.formats["extra padding"]
+            timestamps = [ts + extra for ts in self.store.timestamps(rows)]
+
+        messages = self.store.messages(rows)
+
+        return [
+            (ts, labels[code], message)
+            for ts, code, message in zip(timestamps, codes.tolist(), messages)
+        ]
+
+
+class LogStore:
     """
-    yields = "item"
+    Columnar store of the lines of a log file. Each column is a NumPy array with a
+    row per log line:
+        time    - int64 seconds since the epoch
+        level   - uint8 level code, see Levels
+        marker  - int16 marker id or -1, see Markers
+        source  - int64 byte offset of the source in the file or -1, followed by its
+                  uint16 length in `slength`. Sources longer than `limit` bytes
+                  are truncated to it
+        start   - int64 byte offset of the message in the file
+        end     - int64 byte offset of the end of the message, including any
+                  continuation lines
+
+    Sources and messages are read back from the file on demand
+    """
+    columns = {
+        "time": np.int64,
+        "level": np.uint8,
+        "marker": np.int16,
+        "source": np.int64,
+        "slength": np.uint16,
+        "start": np.int64,
+        "end": np.int64,
+    }
 
-    def __iter__(self):
+    # Maximum number of unused bytes between two ranges to read them together
+    gap = 64 * 1024
+
+    # Maximum length of a source, the largest value of the slength column
+    limit = np.iinfo(np.uint16).max
+
+    def __init__(self, file):
         """
-        Iterates over the "data" attribute, yielding if that dataclass is enabled
+        Parameters
+        ----------
+        file : str
+            Path to the log file
         """
-        for item in self.data:
-            label, data = item
-            if self.dataclass[label].enabled:
-                yield locals()[self.yields]
+        self.file = file
+        self.clear()
 
-    def __getattr__(self, label):
-        return self[label]
+    def __len__(self):
+        return self.size
 
-    def __getitem__(self, label):
-        return self.dataclass.get(label)
+    def __getitem__(self, column):
+        """
+        Retrieves the filled view of a column
+        """
+        return self.arrays[column][:self.size]
 
-    def toggle(self, *labels, state):
+    def clear(self):
         """
-        Toggles dataclasses' enabled state
+        Removes every row
+        """
+        self.size = 0
+        self.arrays = {
+            name: np.empty(0, dtype=dtype)
+            for name, dtype in self.columns.items()
+        }
+
+    def extend(self, **columns):
+        """
+        Appends rows, growing the arrays geometrically
 
         Parameters
         ----------
-        *labels : str
-            Labels of the dataclasses to toggle
-        state : bool
-            Enabled state
+        **columns : list
+            Values of each column, all of equal length
         """
-        for label in labels:
-            if label in self.dataclass:
-                self.dataclass[label].enabled = state
-            else:
-                self.log.error(f"Label not found: {label!r}")
+        count = len(columns["start"])
+        if not count:
+            return
 
-    def enable(self, *args, **kwargs):
+        size = self.size + count
+        capacity = self.arrays["start"].size
+        if size > capacity:
+            capacity = max(size, capacity * 2, 1024)
+            for name, array in self.arrays.items():
+                grown = np.empty(capacity, dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.arrays[name] = grown
+
+        for name, values in columns.items():
+            self.arrays[name][self.size:size] = values
+
+        self.size = size
+
+    def read(self, starts, ends, gap=None):
         """
-        Toggles dataclasses' enabled state to True
+        Reads byte ranges of the file. Ranges closer than `gap` bytes are merged into
+        one read rather than seeking between them, so that a sparse selection of
+        rows, such as a filtered view, only reads the bytes near its rows
+
+        Parameters
+        ----------
+        starts : np.ndarray
+            Start offsets
+        ends : np.ndarray
+            End offsets
+        gap : int, default=None
+            Maximum number of unused bytes between two ranges to read them together.
+            Defaults to the class attribute `gap`
+
+        Returns
+        -------
+        list[str]
+            Decoded text of each range
         """
-        self.toggle(*args, **kwargs, state=True)
+        if not len(starts):
+            return []
 
-    def disable(self, *args, **kwargs):
+        gap = self.gap if gap is None else gap
+
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.maximum(np.asarray(ends, dtype=np.int64), starts)
+
+        order = np.argsort(starts, kind="stable")
+        first = starts[order]
+
+        # A new run begins where a range starts past the gap after every previous end
+        reach = np.maximum.accumulate(ends[order])
+        breaks = np.flatnonzero(first[1:] > reach[:-1] + gap) + 1
+        runs = np.split(np.arange(order.size), breaks)
+
+        texts = [None] * order.size
+        with open(self.file, "rb") as f:
+            for run in runs:
+                offset = int(first[run[0]])
+                f.seek(offset)
+                data = f.read(int(reach[run[-1]]) - offset)
+
+                for i in order[run].tolist():
+                    texts[i] = data[int(starts[i]) - offset:int(ends[i]) - offset].decode(errors="replace")
+
+        return texts
+
+    def messages(self, rows):
         """
-        Toggles dataclasses' enabled state to False
+        Reads the messages of rows
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Row indices
+
+        Returns
+        -------
+        list[str]
         """
-        self.toggle(*args, **kwargs, state=False)
+        return self.read(self["start"][rows], self["end"][rows])
 
-    def reset(self):
+    def sources(self, rows):
         """
-        Resets the "lines" attribute of each dataclass to an empty list
+        Reads the sources of rows
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Row indices
+
+        Returns
+        -------
+        list[str]
+            Empty strings for lines without a source
         """
-        for label, dataclass in self.dataclass.items():
-            if hasattr(dataclass, "lines"):
-                dataclass.lines = []
+        starts = self["source"][rows]
+        found = starts >= 0
 
+        sources = [""] * len(starts)
+        read = self.read(starts[found], starts[found] + self["slength"][rows][found])
+        for i, source in zip(np.flatnonzero(found).tolist(), read):
+            sources[i] = source
 
-@dataclass
-class Marker:
-    enabled: bool
-    regex: Pattern
-    format: str = None
-    lines: List[dict] = field(default_factory=list)
+        return sources
 
+    def timestamps(self, rows):
+        """
+        Formats the times of rows as they are written in ISOFIT logs
 
-class Markers(Container):
-    def __init__(self):
-        self.data = []
-        self.dataclass = {
-            "Presolve Start": Marker(
-                enabled = True,
-                regex = re.compile(r"Run ISOFIT initial guess"),
-            ),
-            "Full Solution Start": Marker(
-                enabled = True,
-                regex = re.compile(r"Running ISOFIT with full LUT"),
-            ),
-            "Inversions Start": Marker(
-                enabled = True,
-                regex = re.compile(r"Beginning \d+ inversions"),
-            ),
-            "Inversions End": Marker(
-                enabled = False,
-                regex = re.compile(r"Analytical line inversions complete"),
-            ),
-            "Analytical Start": Marker(
-                enabled = True,
-                regex = re.compile(r"Analytical line inference"),
-            ),
-            "Analytical End": Marker(
-                enabled = False,
-                regex = re.compile(r"Analytical line inversions complete .*"),
-            ),
-            "LUT Creation Start": Marker(
-                enabled = True,
-                regex = re.compile(r"Initializing LUT file"),
-            ),
-            "Loading LUT": Marker(
-                enabled = True,
-                regex = re.compile(r"Loading LUT into memory"),
-            ),
-            "LUT Loaded": Marker(
-                enabled = True,
-                regex = re.compile(r"LUTs fully loaded"),
-            ),
-            "Interpolators Built": Marker(
-                enabled = True,
-                regex = re.compile(r"Interpolators built"),
-            ),
-            "Sims Start": Marker(
-                enabled = True,
-                regex = re.compile(r"Executing parallel simulations"),
-            ),
-            "Sims End": Marker(
-                enabled = True,
-                regex = re.compile(r"100.00% simulations complete"),
-            ),
-            "Flushing": Marker(
-                enabled = True,
-                regex = re.compile(r"Flushing"),
-            ),
-            "Predicting sRTMnet": Marker(
-                enabled = True,
-                regex = re.compile(r"Loading and predicting with emulator"),
-            ),
-            "Resampling Parallel": Marker(
-                enabled = True,
-                regex = re.compile(r"Executing resamples in parallel"),
-            ),
-            "Resampling Finished": Marker(
-                enabled = True,
-                regex = re.compile(r"Resampling finished"),
-            ),
-            "Resampling": Marker(
-                enabled = True,
-                format = "Resampling {name}",
-                regex = re.compile(r"Resampling (?P<name>.*)"),
-            ),
-        }
+        Parameters
+        ----------
+        rows : np.ndarray
+            Row indices
 
-        self.log = logging.getLogger(self.__class__.__name__)
+        Returns
+        -------
+        list[str]
+            Timestamps in the form %Y-%m-%d,%H:%M:%S
+        """
+        times = self["time"][rows].astype("datetime64[s]")
+        if not times.size:
+            return []
+
+        return np.char.replace(np.datetime_as_string(times), "T", ",").tolist()
 
-    def check(self, line):
+    def row(self, row, levels=None, markers=None):
         """
-        Checks if the line's message matches one of the markers of interest and, if so,
-        appends it to that marker's match list
+        Reconstructs a single line as a dict
+
+        Parameters
+        ----------
+        row : int
+            Row index
+        levels : Levels, default=None
+            Levels to resolve the level label
+        markers : Markers, default=None
+            Markers to resolve the marker label
+
+        Returns
+        -------
+        dict
         """
-        for label, marker in self.dataclass.items():
-            if (match := marker.regex.match(line["message"])):
-                # data = match.groupdict()
-                # if data and marker.format:
-                #     label = marker.format.format(**data)
+        rows = np.array([row])
+        code, marker = int(self["level"][row]), int(self["marker"][row])
+
+        return {
+            "level": levels.labels[code] if levels else code,
+            "timestamp": self.timestamps(rows)[0],
+            "source": self.sources(rows)[0] or None,
+            "message": self.messages(rows)[0],
+            "marker": (markers.labels[marker] if markers else marker) if marker >= 0 else None,
+        }
 
-                marker.lines.append(line)
-                self.data.append((label, line))
 
-                # No need to check the other markers
-                break
+class Logs(FileFinder):
+    extensions = [".log"]
+    patterns = {r"(.*)": "ISOFIT log file"}
 
+    # Regex to detect the two types of ISOFIT log messages:
+    # - "[level]:[timestamp] || [source] | [message]"
+    # - "[level]:[timestamp] ||| [message]"
+    logline = re.compile(
+        rb"(?P<level>[^:]+):"      # Match the log level (e.g., INFO), up to the colon
+        rb"(?P<timestamp>[^\s|]+)" # Match the timestamp, up to the first pipe, excluding the space
+        rb"\s*\|{2,3}\s*"          # Match either || or ||| with optional surrounding spaces
+        rb"(?:(?P<source>[^\s|]+)" # Optionally match the source, excluding the space
+        rb"\s*\|\s*)?"             # Followed by a single pipe and optional spaces
+        rb"(?P<message>.+)"        # Match the rest of the line as the message
+    )
 
-@dataclass
-class Level:
-    enabled: bool
-    lines: List[dict] = field(default_factory=list)
+    # Seconds to wait between polls when following a file that has no new lines
+    interval = 1
 
+    # Maximum bytes read and parsed at a time
+    chunk = 4 * 1024**2
 
-class Levels(Container):
-    yields = "data"
+    def __init__(self, file):
+        self.file = file
 
-    def __init__(self):
-        self.data = []
-        self.dataclass = {
-            "DEBUG": Level(enabled=True),
-            "INFO": Level(enabled=True),
-            "WARNING": Level(enabled=True),
-            "ERROR": Level(enabled=True),
-        }
-        self.formats = {
-            "timestamps": True,
-            "extra padding": True, # Adds +1 to the level padding in build()
-        }
+        self.store = LogStore(file)
+        self.levels = Levels(self.store)
+        self.markers = Markers(self.store)
+
+        # Set when watchdog reports a modification of the file
+        self.modified = threading.Event()
+        self.observer = None
+
+        # Held while the store is modified, one chunk at a time, so that readers on
+        # other threads such as a viewer never see a partially extended store
+        self.lock = threading.Lock()
 
         self.log = logging.getLogger(self.__class__.__name__)
 
-    def toggle(self, *labels, state):
+        # Number of times the parsed content was cleared, see update
+        self.resets = -1
+        self.clear()
+
+    def __len__(self):
+        return len(self.store)
+
+    def clear(self):
         """
-        Overrides the inherited toggle function to check for "formats" keys first then
-        call super()
+        Resets the parsed content and rewinds to the start of the file
+        """
+        self.store.clear()
+        self.resets += 1
+
+        # Seconds since the epoch of the first line
+        self.t0 = None
+
+        # Read position of the file
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+
+    def _load(self, file, flush=False):
+        """
+        Reads the complete lines appended to the file since the previous call, in
+        chunks of at most `chunk` bytes so that only one chunk is in memory at a
+        time. If the file was replaced (eg. rotated) or truncated, the parsed content
+        is cleared and the file is read from the start
 
         Parameters
         ----------
-        labels : str | list[str]
-            Labels of the dataclasses or formats to toggle
-        state : bool
-            Enabled state
+        file : str
+            Path to the log file
+        flush : bool, default=False
+            Also yield the trailing partial line, such as the last line of a finished
+            log that does not end with a newline
+
+        Yields
+        ------
+        offset : int
+            Offset in the file of the data
+        data : bytes
+            Complete lines of the chunk. A trailing partial line is carried forward to
+            the next chunk, or held back until it is completed
         """
-        labels = set(labels)
-        formats = labels - set(self.dataclass)
-        for label in formats:
-            if label in self.formats:
-                self.formats[label] = state
+        try:
+            f = open(file, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            stat = os.fstat(f.fileno())
+
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                if self.inode is not None:
+                    self.log.info(f"Log file was replaced or truncated, rereading: {file}")
+                self.clear()
+                self.inode = stat.st_ino
+
+            f.seek(self.offset)
+            while self.offset < stat.st_size:
+                data = f.read(min(self.chunk, stat.st_size - self.offset))
+                if not data:
+                    break
 
-        super().toggle(*(labels - formats), state=state)
+                offset = self.offset - len(self.partial)
+                self.offset += len(data)
+
+                data = self.partial + data
+                end = data.rfind(b"\n") + 1
+                self.partial = data[end:]
+
+                yield offset, data[:end]
 
-    def add(self, line):
+            if flush and self.partial:
+                offset = self.offset - len(self.partial)
+                data, self.partial = self.partial, b""
+
+                yield offset, data
+
+    def parse(self, data, offset=0):
         """
-        Adds a line line dict to the appropriate dataclass and data attribute
+        Parses lines of an ISOFIT log into the columns of the store. Lines that do
+        not match the log format are continuations of the previous message
 
         Parameters
         ----------
-        line : dict
-            Log line to add
+        data : bytes
+            Complete lines of the log file
+        offset : int, default=0
+            Offset of the data in the file
+
+        Returns
+        -------
+        range
+            Rows of the newly parsed lines
         """
-        level = line["level"]
-        self.dataclass[level].lines.append(line)
-        self.data.append((level, line))
+        columns = {name: [] for name in LogStore.columns}
+        time, level, marker, source, slength, start, end = columns.values()
 
-    def build(self):
+        # Timestamps are converted in bulk after the loop
+        stamps = time
+
+        first = len(self.store)
+        for line in data.splitlines(keepends=True):
+            text = line.rstrip()
+            stripped = text.lstrip()
+            begin = offset + len(text) - len(stripped)
+            offset += len(line)
+
+            if match := self.logline.match(stripped):
+                stamps.append(match["timestamp"])
+
+                level.append(self.levels.code(match["level"].decode(errors="replace")))
+                marker.append(self.markers.check(match["message"]))
+
+                if match["source"] is not None:
+                    source.append(begin + match.start("source"))
+                    slength.append(min(len(match["source"]), LogStore.limit))
+                else:
+                    source.append(-1)
+                    slength.append(0)
+
+                start.append(begin + match.start("message"))
+                end.append(begin + len(stripped))
+
+            elif stripped:
+                # Continuation of the previous message
+                if end:
+                    end[-1] = begin + len(stripped)
+                elif len(self.store):
+                    self.store.arrays["end"][len(self.store) - 1] = begin + len(stripped)
+
+        columns["time"] = self.parseTimestamps(stamps)
+
+        self.store.extend(**columns)
+
+        if self.t0 is None and len(self.store):
+            self.t0 = int(self.store["time"][0])
+
+        return range(first, len(self.store))
+
+    @staticmethod
+    def parseTimestamps(stamps):
         """
-        Builds the filtered contents dict into a list of tuples to be used for writing.
-        Timestamps can be disabled by one of:
+        Converts ISOFIT timestamps (%Y-%m-%d,%H:%M:%S) to seconds since the epoch in
+        bulk. Each unique timestamp is converted once by slicing the fixed-width
+        fields into integer arrays. Timestamps not in this format, or with fields out
+        of range such as 02-31, fall back to strptime, and ones that cannot be parsed
+        take the time of the previous line
 
-            self.formats["timestamps"] = False
-            self.disable("timestamps")
+        Parameters
+        ----------
+        stamps : list[bytes]
+            Timestamps to convert
 
         Returns
         -------
-        lines : list[tuple[str, str, str]]
-            Returns a list of 3-pair tuples of strings in the form:
-                (timestamp, padded level, log message)
-            Timestamp will be an empty string if it is not enabled
-            The level is right-padded with whitespace to the length of the longest log
-            level (eg. "warning", "debug  ")
+        np.ndarray
+            int64 seconds since the epoch
         """
-        # Get the amount of padding needed to make level labels be equal
-        levels = [label
-            for label, level in self.dataclass.items()
-            if level.enabled and level.lines
-        ]
+        if not stamps:
+            return np.empty(0, dtype=np.int64)
 
-        if not levels:
-            self.log.warning("No lines were retrieved. This may be caused either by too strict filters or the log being empty")
-            return []
+        # Lines written within the same second share a timestamp
+        unique, inverse = np.unique(np.array(stamps), return_inverse=True)
 
-        padding = len(max(levels)) + self.formats["extra padding"]
+        times = np.zeros(unique.size, dtype=np.int64)
+        valid = np.char.str_len(unique) == 19
 
-        lines = []
-        for line in self:
-            level = line["level"].ljust(padding)
+        if valid.any():
+            chars = np.frombuffer(unique[valid].astype("S19").tobytes(), dtype=np.uint8).reshape(-1, 19)
 
-            ts = ""
-            if self.formats["timestamps"]:
-                ts = line["timestamp"] + self.formats["extra padding"]
+            digits = chars.astype(np.int64) - ord("0")
+            columns = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
 
-            lines.append([ts, level, line["message"]])
+            ok = (
+                (digits[:, columns] >= 0).all(1) & (digits[:, columns] <= 9).all(1)
+                & (chars[:, [4, 7]] == ord("-")).all(1)
+                & (chars[:, 10] == ord(","))
+                & (chars[:, [13, 16]] == ord(":")).all(1)
+            )
 
-        return lines
+            field = lambda i, n: digits[:, i:i+n] @ (10 ** np.arange(n - 1, -1, -1))
+            year, month, day = field(0, 4), field(5, 2), field(8, 2)
+            hour, minute, second = field(11, 2), field(14, 2), field(17, 2)
 
+            # Invalid dates such as 02-31 would otherwise roll over into the next month
+            leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+            days = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(month - 1, 0, 11)]
+            days += leap & (month == 2)
 
-class Logs(FileFinder):
-    extensions = [".log"]
-    patterns = {r"(.*)": "ISOFIT log file"}
+            ok &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= days)
+            ok &= (hour <= 23) & (minute <= 59) & (second <= 61)
 
-    # Regex to detect the two types of ISOFIT log messages:
-    # - "[level]:[timestamp] || [source] | [message]"
-    # - "[level]:[timestamp] ||| [message]"
-    logline = re.compile(
-        r"(?P<level>[^:]+):"      # Match the log level (e.g., INFO), up to the colon
-        r"(?P<timestamp>[^\s|]+)" # Match the timestamp, up to the first pipe, excluding the space
-        r"\s*\|{2,3}\s*"          # Match either || or ||| with optional surrounding spaces
-        r"(?:(?P<source>[^\s|]+)" # Optionally match the source, excluding the space
-        r"\s*\|\s*)?"             # Followed by a single pipe and optional spaces
-        r"(?P<message>.+)"        # Match the rest of the line as the message
-    )
+            dates = (
+                (year - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+                + (month - 1).astype("timedelta64[M]")
+            ).astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
 
-    # Base datetime to use for converting the relative timedeltas to a datetime
-    base_dt = dtt.fromisocalendar(1, 1, 1)
+            seconds = dates.astype(np.int64) * 86400 + hour * 3600 + minute * 60 + second
 
-    def __init__(self, file):
-        self.file = file
+            index = np.flatnonzero(valid)
+            times[index[ok]] = seconds[ok]
+            valid[index[~ok]] = False
 
-        self.levels = Levels()
-        self.markers = Markers()
+        missing = np.zeros(unique.size, dtype=bool)
+        for i in np.flatnonzero(~valid).tolist():
+            try:
+                parsed = dtt.strptime(unique[i].decode(errors="replace"), '%Y-%m-%d,%H:%M:%S')
+                times[i] = (parsed - dtt(1970, 1, 1)) // timedelta(seconds=1)
+            except ValueError:
+                missing[i] = True
 
-        self.t0 = None
+        times = times[inverse]
+        if missing.any():
+            # Forward fill from the previous line
+            missing = missing[inverse]
+            index = np.where(missing, 0, np.arange(times.size))
+            times = times[np.maximum.accumulate(index)]
 
-    def _load(self, file):
-        """
-        Streams lines from a growing text file, yielding each new line as soon as it is
-        written
+        return times
+
+    def update(self, flush=False):
         """
-        with open(file, "r") as f:
-            while True:
-                line = f.readline()
-                if line:
-                    yield line
-                else:
-                    yield None
+        Parses only the lines appended to the file since the last update
+
+        Parameters
+        ----------
+        flush : bool, default=False
+            Also parse a trailing line that has no newline yet, see _load
 
-    def parse(self, line, content=[]):
+        Returns
+        -------
+        range
+            Rows of the newly parsed lines. If the file was replaced or truncated,
+            the store is reloaded and every row is returned, so a range that starts
+            before the previous length of the store signals the reset
         """
-        Parses an ISOFIT log file into a dictionary of content that can be used to
-        filter and reconstruct lines into different formats
+        first = last = len(self.store)
+        resets = self.resets
+
+        chunks = self._load(self.file, flush)
+        while True:
+            # Reading the next chunk may also clear the store if the file was replaced
+            with self.lock:
+                if (chunk := next(chunks, None)) is None:
+                    break
+
+                offset, data = chunk
+                rows = self.parse(data, offset)
+
+            first = min(first, rows.start)
+            last = rows.stop
+
+        if self.resets != resets:
+            return range(0, len(self.store))
+
+        return range(first, last)
+
+    def lines(self, rows):
         """
-        line = line.strip()
+        Reconstructs parsed lines as dicts
 
-        if match := self.logline.match(line):
-            parsed = match.groupdict()
-            content.append(parsed)
+        Parameters
+        ----------
+        rows : iterable[int]
+            Rows of the store
 
-            parsed["datetime"] = dtt.strptime(parsed["timestamp"], '%Y-%m-%d,%H:%M:%S')
+        Returns
+        -------
+        list[dict]
+        """
+        return [self.store.row(row, self.levels, self.markers) for row in rows]
 
-            if not self.t0:
-                self.t0 = parsed["datetime"]
+    def watch(self):
+        """
+        Uses watchdog, if installed, to wake up stream() as soon as the file is
+        modified instead of waiting for the next poll
+        """
+        if Observer is None or self.observer:
+            return
 
-            parsed["timedelta"] = parsed["datetime"] - self.t0
-            parsed["relative_datetime"] = self.base_dt + parsed["timedelta"]
+        file = os.path.abspath(self.file)
 
-            self.levels.add(parsed)
-            self.markers.check(parsed)
-        else:
-            parsed = content[-1]
-            parsed["message"] += f"\n{line}"
+        class Handler:
+            def dispatch(_, event):
+                if os.fsdecode(event.src_path) == file:
+                    self.modified.set()
 
-        return parsed
+        try:
+            self.observer = Observer()
+            self.observer.schedule(Handler(), os.path.dirname(file))
+            self.observer.start()
+        except:
+            self.log.exception("Failed to watch the log file, falling back to polling")
+            self.observer = None
 
-    def stream(self):
+    def unwatch(self):
         """
-        Streams new lines as they come in. If multiple new lines are retrieved at once,
-        returns them as a group
+        Stops the watchdog observer
         """
-        self.levels.reset()
-        self.markers.reset()
-        lines = self._load(self.file)
+        if self.observer:
+            self.observer.stop()
+            self.observer = None
 
-        new = []
-        for line in lines:
-            if line:
-                self.parse(line, new)
-            else:
-                yield new
-                new = []
+    def stream(self, interval=None):
+        """
+        Follows the file, yielding the rows of each group of new lines as they are
+        written. Between reads, waits for the file to be modified or at most
+        `interval` seconds. Only the newly appended bytes are read and parsed
+
+        Parameters
+        ----------
+        interval : float, default=None
+            Maximum seconds between polls, defaults to the class attribute `interval`
+
+        Yields
+        ------
+        range
+            Rows of the newly parsed lines
+        """
+        interval = interval or self.interval
+
+        self.watch()
+        try:
+            while True:
+                self.modified.clear()
+                if (new := self.update()):
+                    yield new
+                else:
+                    self.modified.wait(interval)
+        finally:
+            self.unwatch()
 
     def read(self):
         """
-        Reads the entirety of the log file as it presently exists
+        Reads the log file up to its present end, parsing anything not yet parsed
+        including a last line without a newline
+
+        Returns
+        -------
+        range
+            Rows of the newly parsed lines
         """
-        return next(self.stream())
+        return self.update(flush=True)
 
 
 class Unknown(FileFinder):
@@ -1095,9 +4948,15 @@ class IsofitWD(FileFinder):
             class to instantiate on that directory. This enables finding multiple valid
             IsofitWD under a path. If set to False, will use the `Unknown` class
             instead which disables most functionality for the given directory
+        scan_cache : bool | str | ScanCache, default=None
+            Persist directory scans to disk so that reopening this directory only
+            rescans the subdirectories that changed, see ScanCache.create
+        cache : bool | int | LoadCache, default=True
+            Cache shared by the children for loaded objects, see LoadCache.create
         """
-        # This class should not be saving to cache because
-        # it defers loading to child classes which have their own cache
+        # This class should not be saving to cache because it defers loading to
+        # child classes, which share one cache so the budget applies to the whole WD
+        self.childCache = LoadCache.create(kwargs.pop("cache", True))
         kwargs["cache"] = False
 
         super().__init__(*args, **kwargs)
@@ -1110,24 +4969,146 @@ class IsofitWD(FileFinder):
 
         self.dirs = {}
 
-        unkn = []
-        dirs = [file.name for file in self.path.glob("*") if file.is_dir()]
-        for subdir in sorted(dirs):
-            for name, cls in self.classes.items():
-                if name in subdir:
-                    self.log.debug(f"Initializing {subdir} with class {cls.__name__}")
-                    self.dirs[subdir] = cls(self.path / subdir)
-                    break
-            else:
-                unkn.append(subdir)
+        listing = self.census.ensure().listing()
+        dirs = [entry.name for entry in listing.entries if entry.isdir] if listing else []
 
-        alt = Unknown
+        self.alt = Unknown
         if recursive:
-            alt = IsofitWD
+            self.alt = IsofitWD
+
+        # Known classes first, then any undetermined directories
+        found = {subdir: self.detect(subdir, self.alt) for subdir in sorted(dirs)}
+        found = dict(sorted(found.items(), key=lambda item: item[1] is self.alt))
+
+        # The children are built from the census, which is already scanned, so this
+        # is in-memory work that does not benefit from threads
+        for subdir, cls in found.items():
+            self.dirs[subdir] = self.create(subdir, cls)
+
+        if self.scans:
+            self.scans.setFinders({
+                os.path.abspath(self.path / subdir): cls.__name__
+                for subdir, cls in found.items()
+            })
+
+    def create(self, subdir, cls):
+        """
+        Initializes a child FileFinder for a subdirectory, sharing this object's
+        census
+
+        Parameters
+        ----------
+        subdir : str
+            Name of the subdirectory
+        cls : FileFinder
+            Class to initialize
+
+        Returns
+        -------
+        FileFinder
+        """
+        self.log.debug(f"Initializing {subdir} with class {cls.__name__}")
+        return cls(self.path / subdir,
+            cache = self.childCache,
+            scan_cache = self.scans,
+            workers = self.workers,
+            census = self.census.view(subdir)
+        )
+
+    def update(self, delta):
+        """
+        Applies changes reported by a Watcher: adds child objects for new
+        subdirectories, removes deleted ones, and forwards the changes to the children
+
+        The children are never modified in place. A new dict is built and swapped in
+        with a single assignment so that readers iterating `dirs` on other threads,
+        such as queries on the WD executor, keep a consistent snapshot
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to this object's path
+        """
+        dirs = dict(self.dirs)
+
+        for path in delta.removed:
+            if path in dirs:
+                self.log.debug(f"Removing {path}")
+                del dirs[path]
+
+        # New subdirectories as well as ones that previously failed to initialize
+        new = {
+            path.split(os.sep)[0]
+            for path in delta.added + delta.modified
+        } - set(dirs)
+
+        for subdir in sorted(new):
+            if subdir not in self.census.listings:
+                continue
+
+            try:
+                dirs[subdir] = self.create(subdir, self.detect(subdir, self.alt))
+            except:
+                self.log.exception(f"Failed to initialize {subdir}, will retry on its next change")
+
+        # Maintain the known classes first ordering
+        dirs = dict(sorted(
+            dirs.items(),
+            key = lambda item: (isinstance(item[1], self.alt), item[0])
+        ))
+
+        self.dirs = dirs
+
+        for subdir, obj in dirs.items():
+            if changes := delta.within(subdir):
+                obj.update(changes)
+
+    def watch(self, callback=None, **kwargs):
+        """
+        Starts watching this directory for changes, see Watcher
+
+        Parameters
+        ----------
+        callback : function, default=None
+            Called with each Delta after this object has been updated
+        **kwargs : dict
+            Additional key-word arguments passed to Watcher
 
-        for subdir in unkn:
-            self.log.debug(f"Initializing {subdir} with class {alt.__class__.__name__}")
-            self.dirs[subdir] = alt(self.path / subdir)
+        Returns
+        -------
+        Watcher
+            The started watcher, call .stop() to end watching
+        """
+        return Watcher(self, callback, **kwargs).start()
+
+    def detect(self, subdir, alt=Unknown):
+        """
+        Determines the FileFinder class for a subdirectory. If a ScanCache is enabled,
+        the class detected when the directory was last scanned is reused
+
+        Parameters
+        ----------
+        subdir : str
+            Name of the subdirectory
+        alt : FileFinder, default=Unknown
+            Class to use if the directory type cannot be determined
+
+        Returns
+        -------
+        FileFinder
+            Class to initialize the subdirectory with
+        """
+        if self.scans:
+            name = self.scans.getFinder(os.path.abspath(self.path / subdir))
+            known = {cls.__name__: cls for cls in self.classes.values()}
+            if name in known:
+                return known[name]
+
+        for name, cls in self.classes.items():
+            if name in subdir:
+                return cls
+
+        return alt
 
     def __getattr__(self, key):
         # Auto reset to the current working directory if the object was initialized without an input
@@ -1163,9 +5144,25 @@ class IsofitWD(FileFinder):
         self : IsofitWD
             Re-initialized IsofitWD object
         """
+        # Release the threads of the previous census
+        if getattr(self, "census", None) is not None:
+            self.census.close()
+
         self.__init__(*args, **kwargs)
         return self
 
+    async def areset(self, *args, **kwargs):
+        """
+        Asynchronous reset, see IsofitWD.reset
+        """
+        return await self.arun(self.reset, *args, **kwargs)
+
+    async def agetSubtree(self, *args, **kwargs):
+        """
+        Asynchronous getSubtree, see IsofitWD.getSubtree
+        """
+        return await self.arun(self.getSubtree, *args, **kwargs)
+
     def subpath(self, path, parent=False):
         """
         Converts an absolute path to a relative path under self.path
@@ -1188,8 +5185,10 @@ class IsofitWD(FileFinder):
         if path.is_absolute():
             path = path.relative_to(self.path)
 
-        if not (file := self.path / path).exists():
-            raise FileNotFoundError(file)
+        # Check the census first, only rescanning if it may be out of date
+        if not self.census.exists(path):
+            if not self.census.refresh().exists(path):
+                raise FileNotFoundError(self.path / path)
 
         if parent:
             parent = "."
@@ -1204,7 +5203,8 @@ class IsofitWD(FileFinder):
     def info(self, file):
         """
         Overrides the inherited info function to pass the file to the correct child
-        object's info function
+        object's info function. The path is split lexically so that this does not
+        touch the filesystem
 
         Parameters
         ----------
@@ -1216,13 +5216,16 @@ class IsofitWD(FileFinder):
         any
             Returns the value if a regex key in the patterns dict matches the file name
         """
-        parent, subpath = self.subpath(file, parent=True)
+        path = Path(file)
+        if path.is_absolute():
+            path = path.relative_to(self.path)
 
-        if parent in self.dirs:
-            return self.dirs[parent].info(subpath.name)
+        parent, *rest = path.parts or (".",)
+        if rest and parent in self.dirs:
+            return self.dirs[parent].info(os.path.join(*rest))
         return super().info(file)
 
-    def getTree(self, info=False, **kwargs):
+    def getTree(self, info=False, *, depth=None, **kwargs):
         """
         Recursively finds the files under a directory as a dict tree
 
@@ -1234,6 +5237,9 @@ class IsofitWD(FileFinder):
         ----------
         info : bool, default=False
             Return the found files as objects with their respective info
+        depth : int, default=None
+            Maximum number of directory levels to descend. Directories beyond this are
+            returned as {name: None}. Defaults to no limit
 
         Returns
         -------
@@ -1242,22 +5248,300 @@ class IsofitWD(FileFinder):
         """
         tree = []
 
-        # First handle known subdirectories (mapped to handlers)
+        # First handle known subdirectories (mapped to handlers), built from the census
         for name, obj in self.dirs.items():
+            subtree = None
+            if depth != 1:
+                subtree = obj.getTree(info=info, depth=depth and depth - 1, **kwargs)
+
             if info:
                 name = FileInfo(name, self.info(name))
 
-            tree.append({name: obj.getTree(info=info, **kwargs)})
+            tree.append({name: subtree})
 
-        # Now scan the actual directory to catch unknown entries
-        try:
-            with os.scandir(self.path) as scan:
-                for path in scan:
-                    if (name := path.name) not in self.dirs:
-                        if info:
-                            name = FileInfo(name, self.info(name))
-                        tree.append(name)
-        except:
-            self.log.exception(f"Error reading path {path}")
+        # Now catch the unknown entries of the actual directory
+        if (listing := self.census.ensure().listing()) is None:
+            self.log.error(f"Error reading path {self.path}")
+            return tree
+
+        for entry in listing.entries:
+            if (name := entry.name) not in self.dirs:
+                if info:
+                    name = FileInfo(name, self.info(name))
+                tree.append(name)
 
         return tree
+
+    def getSubtree(self, path, info=False, depth=1):
+        """
+        Retrieves the tree under a single directory of the WD, such as when expanding
+        a directory of a lazily built tree
+
+        Parameters
+        ----------
+        path : str
+            Directory relative to self.path, "" or "." for the root
+        info : bool, default=False
+            Return the found files as objects with their respective info
+        depth : int, default=1
+            Maximum number of directory levels to descend, see getTree
+
+        Returns
+        -------
+        tree : list
+            Tree structure of the directory's contents, empty if the directory is not
+            handled by this WD
+        """
+        parts = Path(path).parts
+        if not parts or parts == (".",):
+            return self.getTree(info=info, depth=depth)
+
+        parent, *rest = parts
+        if (obj := self.dirs.get(parent)) is None:
+            return []
+
+        if isinstance(obj, IsofitWD):
+            return obj.getSubtree(os.path.join(*rest) if rest else "", info=info, depth=depth)
+
+        return obj.getTree(info=info, path=obj.path.joinpath(*rest), depth=depth)
+
+    def getNode(self, name, info=False):
+        """
+        Builds the getTree item of a single top-level entry. This enables updating a
+        tree after a change without rebuilding every other entry
+
+        Parameters
+        ----------
+        name : str
+            Name of the top-level entry
+        info : bool, default=False
+            Return the found files as objects with their respective info
+
+        Returns
+        -------
+        dict | str | FileInfo | None
+            {name: subtree} for a subdirectory, the name for a file, or None if the
+            entry does not exist
+        """
+        if not self.census.exists(name):
+            return
+
+        key = name
+        if info:
+            key = FileInfo(name, self.info(name))
+
+        if name in self.dirs:
+            return {key: self.dirs[name].getTree(info=info)}
+        return key
+
+
+class Watcher:
+    """
+    Watches an IsofitWD for changes while ISOFIT is still writing to it and applies
+    them incrementally to the census, the file indexes and the IsofitWD children
+
+    If the optional watchdog package is installed, inotify events mark the
+    directories to rescan. inotify does not see writes made by other hosts on
+    network filesystems such as NFS or Lustre, so the whole census is additionally
+    revalidated every `rescan` seconds. Otherwise, or if polling is requested, the
+    directory modification times are polled instead
+
+    Polling detects added and removed files. It does not detect files rewritten in
+    place, such as a growing log or an overwritten header, as that does not change
+    the modification time of their directory. Only inotify reports those as
+    modified. The Logs tab follows its log file itself and is unaffected
+    """
+    # Modes accepted by the [Cache] watch config key, mapped to the polling argument
+    modes = {
+        "auto": None,
+        "inotify": False,
+        "polling": True,
+    }
+
+    def __init__(self, wd, callback=None, interval=2, polling=None, rescan=30, loop=None):
+        """
+        Parameters
+        ----------
+        wd : IsofitWD
+            Working directory to watch
+        callback : function, default=None
+            Called with each Delta after the IsofitWD has been updated. This is called
+            from the watching thread, or on the event loop if one is given
+        interval : float, default=2
+            Seconds between polls, or between processing batches of inotify events
+        polling : bool | str, default=None
+            Force polling on or off. Defaults to polling only if watchdog is not
+            installed. Also accepts a mode name, see `modes`
+        rescan : float, default=30
+            Seconds between full revalidations of the census when using inotify.
+            Set to 0 to disable
+        loop : asyncio.AbstractEventLoop, default=None
+            Applies the changes and calls the callbacks on this event loop so that
+            they do not run concurrently with code on the loop
+        """
+        self.wd = wd
+        self.callbacks = [callback] if callback else []
+        self.interval = interval
+        self.rescan = rescan
+        self.loop = loop
+
+        if isinstance(polling, str):
+            if polling.strip().lower() not in self.modes:
+                raise ValueError(f"Unknown watch mode {polling!r}, must be one of {list(self.modes)}")
+            polling = self.modes[polling.strip().lower()]
+
+        if polling is None:
+            polling = Observer is None
+        elif not polling and Observer is None:
+            raise ImportError("The watchdog package is required for inotify watching")
+        self.polling = polling
+
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.census = None
+        self.observer = None
+        self.thread = None
+        self.stopEvent = threading.Event()
+
+        self.log = logging.getLogger(str(self))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} [{self.wd.path}]>"
+
+    def notify(self, delta):
+        """
+        Census subscriber, applies the changes directly or hands them to the event
+        loop
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to the IsofitWD path
+        """
+        if self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self.apply, delta)
+            except RuntimeError:
+                self.log.debug("Event loop is closed, dropping changes")
+        else:
+            self.apply(delta)
+
+    def apply(self, delta):
+        """
+        Updates the IsofitWD then calls the callbacks
+
+        Parameters
+        ----------
+        delta : Delta
+            Changes relative to the IsofitWD path
+        """
+        self.wd.update(delta)
+
+        for func in self.callbacks:
+            try:
+                func(delta)
+            except:
+                self.log.exception(f"Callback failed: {func}")
+
+    def dispatch(self, event):
+        """
+        Handler for watchdog events, marks the affected directories as dirty
+
+        Parameters
+        ----------
+        event : watchdog.events.FileSystemEvent
+            Event emitted by the watchdog observer
+        """
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+
+        with self.lock:
+            for path in (event.src_path, getattr(event, "dest_path", None)):
+                if path:
+                    path = os.path.abspath(os.fsdecode(path))
+                    self.dirty.add(os.path.dirname(path))
+                    if event.is_directory:
+                        self.dirty.add(path)
+
+    def poll(self):
+        """
+        Processes the pending changes once
+
+        Returns
+        -------
+        Delta | None
+            The changes if this processed inotify events
+        """
+        if self.polling:
+            self.census.refresh(force=True)
+            return
+
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+
+        if dirty:
+            return self.census.rescan(dirty)
+
+    def _run(self):
+        """
+        Polls until stopped
+        """
+        last = time.monotonic()
+        while not self.stopEvent.wait(self.interval):
+            try:
+                self.poll()
+
+                # Catch changes inotify cannot see, such as from other NFS clients
+                if not self.polling and self.rescan and time.monotonic() - last >= self.rescan:
+                    self.census.refresh(force=True)
+                    last = time.monotonic()
+            except:
+                self.log.exception("Failed to process changes")
+
+    def start(self):
+        """
+        Starts watching
+
+        Returns
+        -------
+        self : Watcher
+        """
+        # Keep the census being watched, the IsofitWD may be reset to a new one
+        self.census = self.wd.census
+        self.census.subscribe(self.notify)
+
+        if not self.polling:
+            self.observer = Observer()
+            self.observer.schedule(self, self.census.root, recursive=True)
+            self.observer.start()
+
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+        self.log.debug(f"Started watching using {'polling' if self.polling else 'inotify'}")
+
+        return self
+
+    def stop(self, timeout=5):
+        """
+        Stops watching and waits for the watching threads to finish
+
+        Parameters
+        ----------
+        timeout : float, default=5
+            Maximum seconds to wait for each thread
+        """
+        self.stopEvent.set()
+
+        if self.census is not None:
+            self.census.unsubscribe(self.notify)
+
+        if self.observer:
+            self.observer.stop()
+            self.observer.join(timeout)
+            self.observer = None
+
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+        self.thread = None
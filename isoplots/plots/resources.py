@@ -1,6 +1,7 @@
 import json
 import logging
 from datetime import datetime as dtt
+from datetime import timedelta
 from pathlib import Path
 
 import click
@@ -74,12 +75,13 @@ def annotate(fig, log, base_y=-0.07, step=-0.02, relative=False):
     logs = Logs(log)
     logs.read()
 
-    for i, (label, line) in enumerate(logs.markers):
+    for i, (label, row) in enumerate(logs.markers):
+        seconds = int(logs.store["time"][row])
         if relative:
-            ts = line["relative_datetime"]
+            ts = dtt.fromisocalendar(1, 1, 1) + timedelta(seconds=seconds - logs.t0)
         else:
-            # Convert to timestamp
-            ts = line["datetime"].timestamp() * 1000
+            # Convert the time as written in the log to a timestamp
+            ts = (dtt(1970, 1, 1) + timedelta(seconds=seconds)).timestamp() * 1000
 
         Logger.debug(f"Annotation added at {ts}: {label!r}")
 
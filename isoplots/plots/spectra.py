@@ -57,8 +57,8 @@ def findInterestingPixels(data, seed=None):
     for index in indices:
         pixel = flat.where(flat == sort[index], drop=True)
 
-        if pixel.size > 1:
-            pixel = pixel[0]
+        # Take the first match, which also reduces a single match to a scalar
+        pixel = pixel[0]
 
         pixels.append([int(pixel.x.data), int(pixel.y)])
 
@@ -78,7 +78,8 @@ def plotSpectra(ax, data, pixel, removeMin=True, hideX=False, annotate=None, nam
     pixel : list[int, int]
         X, Y pixel coordinates
     removeMin : bool, default=True
-        Removes the min values
+        Removes the min values if the data does not define a fill value, otherwise
+        the fill values are already masked when opened
     hideX : bool, default=False
         Hides the X axis label and ticks
     annotate : matplotlib ax
@@ -93,7 +94,7 @@ def plotSpectra(ax, data, pixel, removeMin=True, hideX=False, annotate=None, nam
     sel = dict(zip(['x', 'y'], pixel))
     data = data.isel(sel)
 
-    if removeMin:
+    if removeMin and "_FillValue" not in data.encoding:
         data = data.where(data != data.min(), np.nan)
 
     if annotate:
@@ -142,6 +143,26 @@ def plotSpectra(ax, data, pixel, removeMin=True, hideX=False, annotate=None, nam
         annotate.annotate(name, pixel, color=color, fontsize=16)
 
 
+def buildOverviews(file):
+    """
+    Builds the overview pyramid of a file if it does not exist yet
+
+    Parameters
+    ----------
+    file : str
+        Path to the ENVI file
+    """
+    # Only needed by --overviews, the reads themselves go through the envi backend
+    from isoplots.isonice.utils.wd import Overviews
+
+    overviews = Overviews(file)
+    if not overviews.levels():
+        try:
+            overviews.build()
+        except OSError:
+            Logger.exception(f"Failed to build overviews for {file}")
+
+
 def plot(file,
     output=None,
     title=None,
@@ -151,7 +172,8 @@ def plot(file,
     bands=(60, 40, 30),
     seed=None,
     terminal=False,
-    term_size=None
+    term_size=None,
+    overviews=False
 ):
     """\
     Plots the image of an ISOFIT reflectance file along with three interesting spectra
@@ -185,6 +207,9 @@ def plot(file,
         Limit the size of the images plotted to the terminal. Default allows plotext
         to assume appropriate sizes. This is the format of number of characters
         (width, height)
+    overviews : bool, default=False
+        Render the RGB image from a decimated overview level of the file, building
+        the overviews in the user cache directory first if they do not exist
 
     \b
     Notes
@@ -194,14 +219,27 @@ def plot(file,
     if terminal:
         Logger.warning("--terminal can only plot the spectra and not the RGB image, and --output will be disabled")
 
-    ds = xr.open_dataset(file, engine="rasterio")
-    da = ds.band_data
+    # Opened via the envi backend registered by isoplots, see EnviBackendEntrypoint
+    da = xr.open_dataarray(file, engine="envi")
+    da = da.assign_coords(x=np.arange(da.sizes["x"]), y=np.arange(da.sizes["y"]))
 
     if da.isnull().all():
         Logger.error("The dataset is fully NaN, please check inputs")
         return
 
-    rgb = da.sel(band=list(bands)).transpose("y", "x", "band")
+    size = None
+    if overviews:
+        size = 2048
+        buildOverviews(file)
+
+    # Read only the RGB bands from the file rather than the whole cube
+    rgb = xr.open_dataarray(file, engine="envi", overview=size)
+    rgb = rgb.sel(band=list(bands)).load().transpose("y", "x", "band")
+
+    # Full resolution pixel coords, in case an overview level was read
+    factor = rgb.attrs.get("factor", 1)
+    rgb["x"] = np.arange(rgb.x.size) * factor
+    rgb["y"] = np.arange(rgb.y.size) * factor
 
     lower, upper = 2, 98
     if brighten:
@@ -232,7 +270,7 @@ def plot(file,
 
         # Plot the RGB data as an image
         img = fig.add_subplot(grid[:, 0])
-        img.imshow(rgb)
+        img.imshow(rgb, extent=(-.5, da.x.size - .5, da.y.size - .5, -.5))
         img.set_title("RGB of RFL")
 
     # Now plot three spectras
@@ -273,6 +311,7 @@ def plot(file,
 @click.option("--bands", nargs=3, type=int, default=(60, 40, 30))
 @click.option("--terminal", is_flag=True)
 @click.option("-ts", "--term-size", nargs=2, type=int)
+@click.option("--overviews", is_flag=True)
 def cli(**kwargs):
     Logger.info("Plotting spectra")
 
@@ -0,0 +1,52 @@
+import pytest
+
+from isoplots.isonice.tabs import setup
+from isoplots.isonice.utils import wd
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    """
+    Sets the WD used by the Setup tab to a small working directory
+    """
+    (tmp_path / "output").mkdir()
+    (tmp_path / "output" / "a_rfl").touch()
+    (tmp_path / "output" / "a_rfl.hdr").write_text("ENVI\n")
+    (tmp_path / "output" / "a_uncert").touch()
+    (tmp_path / "output" / "a_uncert.hdr").write_text("ENVI\n")
+    (tmp_path / "notes.txt").touch()
+
+    root = wd.IsofitWD(tmp_path)
+    monkeypatch.setattr(setup, "WD", root)
+
+    return root
+
+
+def test_toNiceGUITree_lazy(root):
+    nodes = setup.toNiceGUITree()
+
+    assert len(nodes) == 1
+    output, notes = nodes[0]["children"]
+
+    # Only the first level is retrieved, directories are loaded when expanded
+    assert output["id"] == "./output"
+    assert output["loaded"] is False
+    assert output["children"] == [setup.placeholder("./output")]
+    assert notes == {"id": "./notes.txt", "label": "notes.txt", "desc": None}
+
+    children = setup.toNiceGUITree(root.getSubtree("output", info=True), path=output["id"], nodes=[])
+    assert [node["id"] for node in children] == ["./output/a_rfl", "./output/a_uncert"]
+    assert children[0]["desc"] == "Reflectance"
+
+
+def test_filterTree(root):
+    nodes, total = setup.filterTree("RFL")
+
+    assert total == 2
+    output, = nodes[0]["children"]
+    assert output["label"] == "output"
+    assert [node["id"] for node in output["children"]] == ["./output/a_rfl", "./output/a_rfl.hdr"]
+
+    nodes, total = setup.filterTree("a_", limit=1)
+    assert total == 4
+    assert len(nodes[0]["children"][0]["children"]) == 1
@@ -0,0 +1,885 @@
+import asyncio
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+import xarray as xr
+from spectral.io import envi
+
+from isoplots.isonice.utils import wd
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """
+    Registers the ENVI backend as engine="envi" if the package's entry point is not
+    installed
+    """
+    engines = xr.backends.plugins.list_engines()
+    if "envi" not in engines:
+        engines = {**engines, "envi": wd.EnviBackendEntrypoint()}
+        monkeypatch.setattr(xr.backends.plugins, "list_engines", lambda: engines)
+
+
+@pytest.fixture
+def cube(tmp_path):
+    """
+    Writes a small BIL ENVI product and returns its path without the extension
+    """
+    data = np.random.default_rng(0).random((20, 30, 8), dtype=np.float32)
+    metadata = {
+        "interleave": "bil",
+        "wavelength": list(np.linspace(400, 2500, 8)),
+        "fwhm": [10.0] * 8,
+    }
+    envi.save_image(str(tmp_path / "cube_rfl.hdr"), data, metadata=metadata, interleave="bil", ext="")
+
+    return tmp_path / "cube_rfl"
+
+
+@pytest.fixture(params=["bsq", "bil", "bip"])
+def interleaved(request, tmp_path):
+    """
+    Writes a small ENVI product in each interleave and returns its path without the
+    extension and the data as (band, y, x)
+    """
+    data = np.arange(7 * 11 * 13, dtype=np.float32).reshape(11, 13, 7)
+    metadata = {"interleave": request.param}
+    envi.save_image(str(tmp_path / "cube_rfl.hdr"), data, metadata=metadata, interleave=request.param, ext="")
+
+    return tmp_path / "cube_rfl", data.transpose(2, 0, 1)
+
+
+def test_estimateSize_lazy(cube):
+    lazy = xr.open_dataset(cube, engine=wd.EnviBackendEntrypoint)
+    loaded = xr.open_dataset(cube, engine=wd.EnviBackendEntrypoint).load()
+
+    cube = loaded.band_data.nbytes
+
+    # Only the coordinates of the lazy cube are in memory
+    assert wd.estimateSize(lazy) < cube / 10
+    assert wd.estimateSize(loaded) >= cube
+
+
+def test_overviews_sidecar(cube, tmp_path, monkeypatch):
+    monkeypatch.setattr(wd.Overviews, "minimum", 8)
+
+    overviews = wd.Overviews(cube, directory=tmp_path / "cache")
+    levels = overviews.build()
+
+    assert levels
+    assert overviews.path.parent == tmp_path / "cache"
+    assert overviews.levels() == levels
+
+    # Sidecars from older versions were written beside the products
+    (tmp_path / "cube_rfl.ovr").mkdir()
+
+    census = wd.Census(tmp_path)
+    census.ensure()
+    names = [entry.name for _, entry in census.walk()]
+
+    assert "cube_rfl" in names
+    assert not any(wd.isSidecar(name) for name in names)
+
+
+def test_ZarrCache(cube, tmp_path, monkeypatch):
+    pytest.importorskip("zarr")
+
+    cache = wd.ZarrCache(tmp_path / "zarr")
+
+    converted = []
+    convert = cache.convert
+    monkeypatch.setattr(cache, "convert", lambda *args: converted.append(args) or convert(*args))
+
+    source = xr.open_dataset(cube, engine=wd.EnviBackendEntrypoint).load()
+
+    # Converted on first access
+    ds = cache.open(cube)
+    assert len(converted) == 1
+    assert cache.store(cube.absolute()).exists()
+    np.testing.assert_array_equal(ds.band_data, source.band_data)
+
+    # Reopened from the store
+    ds = cache.open(cube)
+    assert len(converted) == 1
+    np.testing.assert_array_equal(ds.band_data, source.band_data)
+
+    # Reconverted once the source changes
+    stat = cube.stat()
+    os.utime(cube, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    ds = cache.open(cube)
+    assert len(converted) == 2
+    np.testing.assert_array_equal(ds.band_data, source.band_data)
+
+
+def test_Logs_chunks(tmp_path, monkeypatch):
+    file = tmp_path / "isofit.log"
+    file.write_text("".join(
+        f"INFO:2024-01-01,00:00:{i % 60:02} || isofit/core/module.py | Line {i}\n"
+        + ("Traceback line\n  continued\n" if i % 7 == 0 else "")
+        for i in range(500)
+    ))
+
+    whole = wd.Logs(file)
+    whole.read()
+
+    # Chunks far smaller than a line carry partial lines and continuations forward
+    monkeypatch.setattr(wd.Logs, "chunk", 37)
+    chunked = wd.Logs(file)
+    assert chunked.read() == range(500)
+
+    for column in wd.LogStore.columns:
+        np.testing.assert_array_equal(chunked.store[column], whole.store[column])
+
+    assert chunked.store.messages(np.array([7]))[0] == "Line 7\nTraceback line\n  continued"
+
+    # A finished log without a final newline still parses its last line
+    with open(file, "a") as f:
+        f.write("INFO:2024-01-01,00:01:00 || isofit/core/module.py | Last line")
+
+    assert chunked.update() == range(500, 500)
+    assert chunked.read() == range(500, 501)
+    assert chunked.store.messages(np.array([500])) == ["Last line"]
+
+    unfinished = wd.Logs(file)
+    assert unfinished.read() == range(501)
+
+    # The store is reloaded from the start when the file is replaced
+    file.write_text("INFO:2024-01-01,00:00:00 ||| Rotated\n")
+    assert chunked.update() == range(0, 1)
+    assert chunked.store.messages(np.array([0])) == ["Rotated"]
+
+    # Even if the new file has no complete line yet
+    file.write_text("")
+    assert chunked.update() == range(0, 0)
+    assert len(chunked) == 0
+
+
+def test_LogStore_read_sparse(tmp_path, monkeypatch):
+    file = tmp_path / "isofit.log"
+    file.write_text("".join(
+        f"INFO:2024-01-01,00:00:00 ||| Line {i:06}\n"
+        for i in range(100_000)
+    ))
+
+    logs = wd.Logs(file)
+    logs.read()
+
+    reads = []
+    class File:
+        def __init__(self, *args):
+            self.f = open(*args)
+        def __enter__(self):
+            return self
+        def __exit__(self, *args):
+            self.f.close()
+        def seek(self, offset):
+            self.f.seek(offset)
+        def read(self, size):
+            reads.append(size)
+            return self.f.read(size)
+
+    monkeypatch.setattr(wd, "open", File, raising=False)
+
+    # The first and last rows of a 4 MB file
+    rows = np.array([0, 1, len(logs) - 2, len(logs) - 1])
+    assert logs.store.messages(rows) == ["Line 000000", "Line 000001", "Line 099998", "Line 099999"]
+
+    assert len(reads) == 2
+    assert sum(reads) < 1024
+
+    # Unordered rows come back in the requested order
+    rows = np.array([99_999, 5, 50_000, 6])
+    assert logs.store.messages(rows) == ["Line 099999", "Line 000005", "Line 050000", "Line 000006"]
+
+
+def test_parseTimestamps():
+    stamps = [
+        b"2024-02-29,12:00:00", # Leap day
+        b"2023-02-29,12:00:00", # Not a leap year
+        b"2024-02-31,12:00:00",
+        b"2024-04-31,12:00:00",
+        b"2024-12-31,23:59:59",
+        b"2024-12-31,24:00:00",
+        b"2024-1-5,1:02:03",    # Not zero padded, parsed by the fallback
+    ]
+    times = wd.Logs.parseTimestamps(stamps)
+
+    epoch = lambda *args: int((wd.dtt(*args) - wd.dtt(1970, 1, 1)).total_seconds())
+    leap = epoch(2024, 2, 29, 12)
+    end = epoch(2024, 12, 31, 23, 59, 59)
+
+    # Invalid dates take the time of the previous line
+    assert times.tolist() == [leap, leap, leap, leap, end, end, epoch(2024, 1, 5, 1, 2, 3)]
+
+
+def test_LoadCache_resident(tmp_path):
+    cubes = []
+    for i in range(4):
+        data = np.zeros((64, 64, 128), dtype=np.float32) # 2 MB
+        envi.save_image(str(tmp_path / f"cube{i}.hdr"), data, metadata={"interleave": "bsq"}, ext="")
+        cubes.append(tmp_path / f"cube{i}")
+
+    cache = wd.LoadCache(budget=5 * 1024**2)
+    for cube in cubes:
+        ds = xr.open_dataset(cube, engine=wd.EnviBackendEntrypoint)
+        cache.put(cube, ds)
+
+        # Read into memory after it was cached
+        ds.band_data.values
+
+    assert cache.get(cubes[-1]) is not None
+    assert cache.size <= cache.budget
+    assert cache.evictions == 2
+    assert cubes[0] not in cache
+
+
+def test_IsofitWD_update_nested(tmp_path):
+    output = tmp_path / "sub" / "output"
+    output.mkdir(parents=True)
+    (tmp_path / "sub" / "config").mkdir()
+    for product in ("a_rfl", "a_uncert"):
+        (output / product).touch()
+        (output / f"{product}.hdr").write_text("ENVI\n")
+
+    root = wd.IsofitWD(tmp_path)
+    nested = root.dirs["sub"].dirs["output"]
+    assert sorted(nested.products) == ["rfl", "uncert"]
+
+    deltas = []
+    root.census.subscribe(deltas.append)
+
+    (output / "a_lbl").touch()
+    (output / "a_lbl.hdr").write_text("ENVI\n")
+    root.census.refresh(force=True)
+
+    for delta in deltas:
+        root.update(delta)
+
+    assert sorted(nested.products) == ["lbl", "rfl", "uncert"]
+
+
+def test_FileIndex_snapshot(tmp_path):
+    (tmp_path / "a_rfl").touch()
+
+    finder = wd.FileFinder(tmp_path, extensions=["*"])
+    index = finder.index.sync()
+
+    files, queries = index.snapshot
+    assert index.contains("rfl") == ["a_rfl"]
+
+    (tmp_path / "b_rfl").touch()
+    finder.index.refresh(force=True)
+
+    # Updates replace the snapshot, readers of the previous one are unaffected
+    assert files == ["a_rfl"]
+    assert queries == {("in", "rfl"): ["a_rfl"]}
+
+    assert index.contains("rfl") == ["a_rfl", "b_rfl"]
+    assert index.search(r"^b_") == ["b_rfl"]
+    assert index.batch({("in", "a_"): lambda file: "a_" in file}) == {("in", "a_"): ["a_rfl"]}
+
+
+def test_IsofitWD_getTree(tmp_path):
+    (tmp_path / "output").mkdir()
+    (tmp_path / "output" / "a_rfl").touch()
+    (tmp_path / "output" / "a_rfl.hdr").write_text("ENVI\n")
+    (tmp_path / "notes.txt").touch()
+
+    root = wd.IsofitWD(tmp_path)
+
+    assert root.getTree() == [{"output": ["a_rfl"]}, "notes.txt"]
+    assert root.getTree(depth=1) == [{"output": None}, "notes.txt"]
+
+
+def test_LogStore_long_source(tmp_path):
+    source = "isofit/" + "a" * 300 + ".py"
+
+    file = tmp_path / "isofit.log"
+    file.write_text(f"INFO:2024-01-01,00:00:00 || {source} | Message\n")
+
+    logs = wd.Logs(file)
+    logs.read()
+
+    assert logs.store.sources(np.array([0])) == [source]
+    assert logs.store.messages(np.array([0])) == ["Message"]
+
+
+def test_ScanCache_mtime(tmp_path, monkeypatch):
+    root = tmp_path / "wd"
+    (root / "a").mkdir(parents=True)
+    (root / "b").mkdir()
+    (root / "a" / "x.txt").write_text("x")
+    (root / "b" / "y.txt").write_text("y")
+
+    scans = wd.ScanCache(tmp_path / "cache" / "scans.sqlite")
+
+    scanned = []
+    scanDirectory = wd.scanDirectory
+    monkeypatch.setattr(wd, "scanDirectory", lambda path: scanned.append(path) or scanDirectory(path))
+
+    def names(census):
+        return sorted(os.path.join(subdir, entry.name) for subdir, entry in census.walk())
+
+    first = wd.Census(root, scans).ensure()
+    assert len(scanned) == 3
+
+    # Unchanged directories are read from the cache
+    scanned.clear()
+    assert names(wd.Census(root, scans).ensure()) == names(first)
+    assert scanned == []
+
+    # Only the directory whose modification time changed is rescanned
+    (root / "a" / "z.txt").write_text("z")
+    os.utime(root / "a", ns=(0, 10**9))
+
+    census = wd.Census(root, scans).ensure()
+    assert scanned == [str(root / "a")]
+    assert census.exists("a/z.txt")
+    assert census.exists("b/y.txt")
+
+    # Removed directories are dropped from the cache
+    (root / "b" / "y.txt").unlink()
+    (root / "b").rmdir()
+    os.utime(root, ns=(0, 10**9))
+
+    wd.Census(root, scans).ensure()
+    assert str(root / "b") not in scans.load(str(root))
+    assert str(root / "a") in scans.load(str(root))
+
+
+def test_Census_concurrent(tmp_path):
+    for i in range(5):
+        for j in range(4):
+            path = tmp_path / f"d{4 - i}" / f"s{j}"
+            path.mkdir(parents=True)
+            (path / f"f{j}.txt").write_text("f")
+
+    serial = wd.Census(tmp_path, workers=1).ensure()
+    concurrent = wd.Census(tmp_path, workers=8).ensure()
+
+    dirs = sorted(os.path.relpath(root, tmp_path) for root, *_ in os.walk(tmp_path) if root != str(tmp_path))
+
+    # Merged in sorted order regardless of when each scan completed
+    assert list(concurrent.listings) == [""] + dirs
+    assert concurrent.listings == serial.listings
+
+    finder = wd.FileFinder(tmp_path, extensions=["*"], workers=8)
+    assert finder.getTree() == wd.FileFinder(tmp_path, extensions=["*"], workers=1).getTree()
+    assert finder.getTree()[0] == {"d0": [{"s0": ["f0.txt"]}, {"s1": ["f1.txt"]}, {"s2": ["f2.txt"]}, {"s3": ["f3.txt"]}]}
+
+
+def test_Census_single_pass(tmp_path, monkeypatch):
+    for name in ("a_rfl", "a_uncert", "a_subs_rfl"):
+        (tmp_path / name).write_bytes(b"")
+        (tmp_path / f"{name}.hdr").write_text("ENVI\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b_lbl").write_bytes(b"")
+    (tmp_path / "sub" / "b_lbl.hdr").write_text("ENVI\n")
+
+    scanned = []
+    scanDirectory = wd.scanDirectory
+    monkeypatch.setattr(wd, "scanDirectory", lambda path: scanned.append(path) or scanDirectory(path))
+
+    output = wd.Output(tmp_path)
+    assert sorted(scanned) == [str(tmp_path), str(tmp_path / "sub")]
+
+    # Everything after construction is answered from the census in memory
+    def fail(*args, **kwargs):
+        raise AssertionError("The filesystem was accessed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "scandir", fail)
+        patch.setattr(os, "stat", fail)
+        patch.setattr(os, "walk", fail)
+
+        name = output.name
+        products = output.products
+        flat = output.getFlat()
+        sub = output.getFlat(tmp_path / "sub")
+        info = output.info("a_rfl")
+        tree = output.getTree(info=True)
+
+    assert name == "a"
+    assert products["rfl"] == "a_rfl"
+    assert flat == ["a_rfl", "a_subs_rfl", "a_uncert", "sub/b_lbl"]
+    assert sub == ["b_lbl"]
+    assert info == "Reflectance"
+    assert [file.info for file in tree if isinstance(file, wd.FileInfo)] == ["Reflectance", None, None]
+
+    # Products without a header are rejected
+    (tmp_path / "sub" / "c_rfl").write_bytes(b"")
+    with pytest.raises(FileNotFoundError):
+        wd.Output(tmp_path / "sub")
+
+
+def test_Census_deltas(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "x.txt").write_text("x")
+    (tmp_path / "a" / "y.txt").write_text("y")
+
+    census = wd.Census(tmp_path).ensure()
+    view = census.view("a")
+
+    deltas = []
+    census.subscribe(deltas.append)
+
+    (tmp_path / "a" / "z.txt").write_text("z")
+    (tmp_path / "a" / "y.txt").unlink()
+    (tmp_path / "a" / "x.txt").write_text("xx")
+    os.utime(tmp_path / "a", ns=(0, 10**9))
+
+    census.refresh(force=True)
+
+    assert len(deltas) == 1
+    assert deltas[0] == wd.Delta(added=["a/z.txt"], removed=["a/y.txt"], modified=["a/x.txt"])
+    assert deltas[0].relative(view) == wd.Delta(added=["z.txt"], removed=["y.txt"], modified=["x.txt"])
+    assert census.deltas[census.version] is deltas[0]
+
+    # Nothing changed
+    census.refresh(force=True)
+    assert len(deltas) == 1
+
+    census.unsubscribe(deltas.append)
+    (tmp_path / "a" / "x.txt").unlink()
+    census.rescan([str(tmp_path / "a")])
+    assert len(deltas) == 1
+
+
+def test_Watcher_polling(tmp_path):
+    (tmp_path / "output").mkdir()
+    (tmp_path / "output" / "a_rfl").touch()
+    (tmp_path / "output" / "a_rfl.hdr").write_text("ENVI\n")
+
+    root = wd.IsofitWD(tmp_path)
+
+    deltas = []
+    watcher = wd.Watcher(root, callback=deltas.append, interval=60, polling=True).start()
+    try:
+        (tmp_path / "output" / "a_uncert").touch()
+        (tmp_path / "output" / "a_uncert.hdr").write_text("ENVI\n")
+        os.utime(tmp_path / "output", ns=(0, 10**9))
+
+        watcher.poll()
+    finally:
+        watcher.stop()
+
+    assert deltas == [wd.Delta(added=["output/a_uncert", "output/a_uncert.hdr"])]
+    assert root.output.products == {"rfl": "a_rfl", "uncert": "a_uncert"}
+    assert "a_uncert" in root.output.files
+
+
+@pytest.mark.parametrize("cls", [wd.Config, wd.Data, wd.LUT, wd.Output])
+def test_Classifier(cls):
+    names = [
+        "emit_h2o.json", "emit_h2o.json.tmpl", "emit_isofit.json", "emit_modtran_tpl.json",
+        "surface.mat", "wavelengths.txt", "6S.lut.nc", "lut.nc", "sRTMnet.predicts.nc",
+        "emit_subs_rfl", "emit_rfl", "emit_subs_uncert", "emit_uncert", "emit_atm_interp",
+        "unrelated", "", "line\nbreak_rfl",
+    ]
+
+    def sequential(name):
+        for pattern, value in cls.patterns.items():
+            if re.search(pattern, name):
+                return value
+
+    classifier = wd.Classifier(cls.patterns)
+    assert classifier.sequential is None
+
+    for name in names:
+        assert classifier.classify(name) == sequential(name), name
+
+
+def test_Classifier_fallback():
+    patterns = {r"(?i)^a": "a", r"(b)\1": "bb", r"c": "c"}
+
+    classifier = wd.Classifier(patterns)
+    assert classifier.regex is None
+
+    assert classifier.classify("Abb") == "a"
+    assert classifier.classify("xbb") == "bb"
+    assert classifier.classify("xbc") == "c"
+    assert classifier.classify("x") is None
+
+
+def test_IsofitWD_getSubtree(tmp_path):
+    (tmp_path / "output").mkdir()
+    (tmp_path / "output" / "a_rfl").touch()
+    (tmp_path / "output" / "a_rfl.hdr").write_text("ENVI\n")
+    (tmp_path / "data" / "deep").mkdir(parents=True)
+    (tmp_path / "data" / "deep" / "surface.mat").touch()
+    (tmp_path / "runs" / "b" / "output").mkdir(parents=True)
+    (tmp_path / "runs" / "b" / "output" / "b_rfl").touch()
+    (tmp_path / "runs" / "b" / "output" / "b_rfl.hdr").write_text("ENVI\n")
+
+    root = wd.IsofitWD(tmp_path)
+
+    assert root.getSubtree("") == root.getTree(depth=1)
+    assert root.getSubtree("output") == ["a_rfl"]
+    assert root.getSubtree("data") == [{"deep": None}]
+    assert root.getSubtree("data/deep") == ["surface.mat"]
+    assert root.getSubtree("runs/b") == [{"output": None}]
+    assert root.getSubtree("runs/b/output") == ["b_rfl"]
+    assert root.getSubtree("missing") == []
+
+    # Expanding every directory gives the full tree
+    assert root.getSubtree("data", depth=None) == [{"deep": ["surface.mat"]}]
+    assert root.getNode("output") == {"output": ["a_rfl"]}
+    assert root.getNode("missing") is None
+
+
+def test_FileFinder_async(tmp_path):
+    (tmp_path / "emit_isofit.json").write_text(json.dumps({"a": 1}))
+    (tmp_path / "emit_h2o.json").write_text(json.dumps({"b": 2}))
+
+    config = wd.Config(tmp_path)
+    config.runner = wd.AsyncRunner()
+
+    async def main():
+        return await asyncio.gather(
+            config.afind("isofit"),
+            config.aifin(".json", all=True),
+            config.amatch(r"^emit_h2o"),
+            config.aload(find="isofit"),
+        )
+
+    try:
+        assert asyncio.run(main()) == [
+            config.find("isofit"),
+            config.ifin(".json", all=True),
+            config.match(r"^emit_h2o"),
+            config.load(find="isofit"),
+        ]
+    finally:
+        config.runner.shutdown()
+
+
+def test_AsyncRunner():
+    runner = wd.AsyncRunner(workers=1)
+    release = threading.Event()
+
+    calls = []
+    def slow(value):
+        calls.append(value)
+        release.wait(5)
+        return value
+
+    async def main():
+        # Duplicate requests share one call
+        first = asyncio.create_task(runner.run("a", slow, 1))
+        second = asyncio.create_task(runner.run("a", slow, 1))
+
+        # Queued behind the first on the single worker
+        queued = asyncio.create_task(runner.run("b", slow, 2))
+        await asyncio.sleep(0.1)
+
+        # Cancelling one caller leaves the shared call for the other
+        first.cancel()
+        # Cancelling the only caller of a call that has not started cancels it
+        queued.cancel()
+        await asyncio.sleep(0.1)
+
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+        return await second
+
+    try:
+        assert asyncio.run(main()) == 1
+        assert calls == [1]
+        assert runner.inflight == {}
+    finally:
+        runner.shutdown()
+
+
+def test_FileFinder_query(tmp_path, monkeypatch):
+    for file in ("config/a_isofit.json", "config/a_h2o.json", "lut/lut.nc", "lut/6S.lut.nc", "output/a_rfl", "output/a_subs_rfl", "output/a_rfl.hdr"):
+        (tmp_path / file).parent.mkdir(exist_ok=True)
+        (tmp_path / file).touch()
+
+    finder = wd.FileFinder(tmp_path, extensions=["*"])
+
+    specs = {
+        "configs": {"find": "config/.json", "all": True},
+        "lut": {"find": "lut/.nc"},
+        "spectra": {"ifin": "rfl", "all": True, "exc": ["hdr", "subs"]},
+        "anchored": {"match": r"^output/a_", "all": True, "exc": "hdr"},
+        "none": {"ifin": "missing"},
+    }
+
+    # Every query is answered by one pass over the index
+    passes = []
+    batch = finder.index.batch
+    monkeypatch.setattr(finder.index, "batch", lambda tests: passes.append(tests) or batch(tests))
+
+    results = finder.query(specs)
+    assert len(passes) == 1
+
+    assert results == {
+        "configs": finder.find("config/.json", all=True),
+        "lut": finder.find("lut/.nc"),
+        "spectra": finder.ifin("rfl", all=True, exc=["hdr", "subs"]),
+        "anchored": finder.match(r"^output/a_", all=True, exc="hdr"),
+        "none": finder.ifin("missing"),
+    }
+    assert results["spectra"] == ["output/a_rfl"]
+
+    with pytest.raises(AttributeError):
+        finder.query({"bad": {"all": True}})
+
+
+def test_EnviBackendArray_indexing(interleaved):
+    path, data = interleaved
+
+    ds = xr.open_dataset(path, engine=wd.EnviBackendEntrypoint)
+    var = ds.band_data
+    assert var.dims == ("band", "y", "x")
+
+    selections = [
+        ({"band": 3, "y": 5, "x": 7}, data[3, 5, 7]),
+        ({"band": [1, 5, 2]}, data[[1, 5, 2]]),
+        ({"y": slice(2, 10, 3), "x": [0, 4, 12]}, data[:, 2:10:3][:, :, [0, 4, 12]]),
+        ({"band": slice(None, None, -1), "y": 4}, data[::-1, 4]),
+        ({"band": [6, 0], "x": slice(3, 4)}, data[[6, 0], :, 3:4]),
+    ]
+    for selection, expected in selections:
+        np.testing.assert_array_equal(var.isel(selection).values, expected, err_msg=str(selection))
+
+    # Vectorized indexing of individual pixels
+    pixels = var.isel(y=xr.DataArray([1, 9], dims="pixel"), x=xr.DataArray([12, 0], dims="pixel"))
+    np.testing.assert_array_equal(pixels.values, data[:, [1, 9], [12, 0]])
+
+    np.testing.assert_array_equal(var.values, data)
+
+
+def test_preferredChunks(interleaved, monkeypatch):
+    path, data = interleaved
+
+    # Small enough to split the 7 x 11 x 13 float32 cube
+    monkeypatch.setattr(wd.EnviBackendEntrypoint, "chunk_size", 400)
+
+    ds = xr.open_dataset(path, engine=wd.EnviBackendEntrypoint, chunks={})
+    var = ds.band_data
+
+    expected = {
+        # Whole bands of 7 lines
+        "bsq": {"band": 1, "y": 7, "x": 13},
+        # Whole lines, each 7 * 13 * 4 = 364 bytes
+        "bil": {"band": 7, "y": 1, "x": 13},
+        # Whole lines too, only split into pixels if a line exceeds the size
+        "bip": {"band": 7, "y": 1, "x": 13},
+    }[ds.attrs["interleave"]]
+
+    assert var.encoding["preferred_chunks"] == expected
+    assert {dim: sizes[0] for dim, sizes in zip(var.dims, var.chunks)} == expected
+    np.testing.assert_array_equal(var.values, data)
+
+    # Blocks of whole pixels, each 7 * 4 = 28 bytes
+    array = wd.EnviBackendArray(path, np.float32, 0, (7, 11, 13), "bip")
+    assert array.preferredChunks(100) == {"band": 7, "y": 1, "x": 3}
+
+
+def test_readBands(interleaved, monkeypatch):
+    path, data = interleaved
+
+    array, *_ = wd.EnviBackendEntrypoint.parse(path)
+
+    bands = [5, 0, 3, 3, 6]
+    expected = data[bands]
+
+    np.testing.assert_array_equal(array.readBands(bands), expected)
+
+    # Small buffers and gaps split the reads into several blocks and runs
+    np.testing.assert_array_equal(array.readBands(bands, buffer=64, gap=0), expected)
+
+    # Whole band selections are routed through readBands
+    calls = []
+    readBands = wd.EnviBackendArray.readBands
+    monkeypatch.setattr(wd.EnviBackendArray, "readBands", lambda self, bands: calls.append(bands) or readBands(self, bands))
+
+    ds = xr.open_dataset(path, engine=wd.EnviBackendEntrypoint)
+    np.testing.assert_array_equal(ds.band_data.isel(band=bands).values, expected)
+    assert calls == [sorted(set(bands))]
+
+
+def test_readBands_byteorder(tmp_path):
+    data = np.arange(4 * 3 * 5, dtype=np.float32).reshape(3, 5, 4)
+    envi.save_image(str(tmp_path / "cube_rfl.hdr"), data, interleave="bil", byteorder=1, ext="")
+
+    array, *_ = wd.EnviBackendEntrypoint.parse(tmp_path / "cube_rfl")
+    bands = array.readBands([2, 1])
+
+    assert bands.dtype.isnative
+    np.testing.assert_array_equal(bands, data.transpose(2, 0, 1)[[2, 1]])
+
+
+def test_EnviHeader_cache(cube, monkeypatch):
+    monkeypatch.setattr(wd.EnviHeader, "cache", OrderedDict())
+
+    parsed = []
+    parse = wd.EnviHeader.parse
+    monkeypatch.setattr(wd.EnviHeader, "parse", lambda path: parsed.append(path) or parse(path))
+
+    hdr = cube.with_suffix(".hdr")
+
+    header = wd.EnviHeader.read(hdr)
+    assert header.shape == (8, 20, 30)
+    assert header.interleave == "bil"
+    assert header.metadata == envi.read_envi_header(str(hdr))
+    np.testing.assert_array_equal(header.wavelength, np.linspace(400, 2500, 8))
+
+    # Cached until the header is modified
+    assert wd.EnviHeader.read(hdr) is header
+    assert len(parsed) == 1
+
+    hdr.write_text(hdr.read_text().replace("bil", "bsq"))
+    os.utime(hdr, ns=(0, 10**9))
+
+    assert wd.EnviHeader.read(hdr).interleave == "bsq"
+    assert len(parsed) == 2
+
+    # The least recently used headers are dropped past the limit
+    monkeypatch.setattr(wd.EnviHeader, "limit", 1)
+    other = hdr.with_name("other.hdr")
+    other.write_text(hdr.read_text())
+    cube.rename(other.with_suffix(""))
+
+    wd.EnviHeader.read(other)
+    assert list(wd.EnviHeader.cache) == [str(other)]
+
+
+def test_Loaders_window(cube):
+    full = xr.open_dataset(cube, engine=wd.EnviBackendEntrypoint).band_data.load()
+
+    # (x0, y0, width, height) clipped to the 30 x 20 extent
+    data = wd.Loaders.envi(cube, window=(25, -2, 10, 5), bands=[2, 7])
+
+    assert data.dims == ("band", "y", "x")
+    assert list(data.band) == [2, 7]
+    np.testing.assert_array_equal(data.x, np.arange(25, 30))
+    np.testing.assert_array_equal(data.y, np.arange(0, 3))
+    np.testing.assert_array_equal(data.wavelength, full.wavelength.sel(band=[2, 7]))
+    np.testing.assert_array_equal(data.values, full.sel(band=[2, 7]).values[:, 0:3, 25:30])
+
+    # Either may be given alone
+    data = wd.Loaders.envi(cube.with_suffix(".hdr"), window=(3, 4, 2, 2))
+    np.testing.assert_array_equal(data.values, full.values[:, 4:6, 3:5])
+
+    data = wd.Loaders.envi(cube, bands=[8, 1])
+    assert data.shape == (2, 20, 30)
+    np.testing.assert_array_equal(data.values, full.sel(band=[8, 1]).values)
+
+
+def test_Output_open_all(tmp_path, engine, monkeypatch):
+    rng = np.random.default_rng(0)
+    wavelength = {"wavelength": list(np.linspace(400, 2500, 6)), "fwhm": [10.0] * 6}
+
+    def write(name, bands, rows=10, metadata={}):
+        data = rng.random((rows, 12, bands), dtype=np.float32)
+        envi.save_image(str(tmp_path / f"{name}.hdr"), data, metadata=metadata, interleave="bil", ext="")
+        return data.transpose(2, 0, 1)
+
+    rfl = write("a_rfl", 6, metadata=wavelength)
+    uncert = write("a_uncert", 6, metadata=wavelength)
+    lbl = write("a_lbl", 1)
+    write("a_subs_rfl", 6, rows=2, metadata=wavelength)
+
+    reads = []
+    getitem = wd.EnviBackendArray._getitem
+    monkeypatch.setattr(wd.EnviBackendArray, "_getitem", lambda self, key: reads.append(key) or getitem(self, key))
+
+    output = wd.Output(tmp_path)
+    ds = output.open_all()
+
+    # Nothing is read until accessed
+    assert reads == []
+
+    # Products of a different shape are skipped
+    assert sorted(ds) == ["lbl", "rfl", "uncert"]
+    assert ds.sizes["y"] == 10 and ds.sizes["x"] == 12
+
+    # Matching bands share the band dimension, others receive their own
+    assert ds.rfl.dims == ds.uncert.dims == ("band", "y", "x")
+    assert ds.lbl.dims == ("lbl_band", "y", "x")
+    np.testing.assert_array_equal(ds.wavelength, wavelength["wavelength"])
+
+    np.testing.assert_array_equal(ds.rfl, rfl)
+    np.testing.assert_array_equal(ds.uncert, uncert)
+    np.testing.assert_array_equal(ds.lbl, lbl)
+
+    assert list(output.open_all(["uncert", "missing"])) == ["uncert"]
+
+
+def test_guess_can_open(cube, tmp_path, engine):
+    backend = wd.EnviBackendEntrypoint()
+
+    assert backend.guess_can_open(cube)
+    assert backend.guess_can_open(str(cube))
+    assert backend.guess_can_open(cube.with_suffix(".hdr"))
+    assert backend.guess_can_open(cube.with_suffix(".img"))
+
+    (tmp_path / "notes.txt").write_text("ENVI is not a header")
+    (tmp_path / "other").write_text("not ENVI")
+    (tmp_path / "other.hdr").write_text("not ENVI")
+
+    assert not backend.guess_can_open(tmp_path / "notes.txt")
+    assert not backend.guess_can_open(tmp_path / "other")
+    assert not backend.guess_can_open(tmp_path / "missing")
+    assert not backend.guess_can_open(tmp_path / "lut.nc")
+    assert not backend.guess_can_open(b"ENVI")
+
+    # Selected without an engine
+    ds = xr.open_dataset(cube)
+    assert ds.band_data.shape == (8, 20, 30)
+
+
+def test_Markers_check():
+    markers = wd.Markers(None)
+
+    def sequential(message):
+        for i, (label, marker) in enumerate(markers.dataclass.items()):
+            if marker.regex.match(message) and not marker.format:
+                return i
+
+    messages = [
+        "Run ISOFIT initial guess",
+        "Beginning 1000 inversions",
+        "Analytical line inference",
+        "Analytical line inversions complete in 10s",
+        "100.00% simulations complete",
+        "50.00% simulations complete",
+        "Flushing",
+        "Resampling finished",
+        "LUTs fully loaded",
+        "Loading LUT into memory",
+        "Something else entirely",
+        "Ru",
+        "",
+    ]
+    for message in messages:
+        expected = sequential(message)
+        assert markers.check(message) == (-1 if expected is None else expected), message
+        assert markers.check(message.encode()) == markers.check(message)
+
+    # Formatted markers add a label per distinct match
+    h2o = markers.check("Resampling H2O")
+    assert markers.labels[h2o] == "Resampling H2O"
+    assert markers.parents[h2o] == "Resampling"
+    assert markers.check(b"Resampling H2O") == h2o
+    assert markers.check("Resampling AOT") == h2o + 1
+
+    # Markers without a literal prefix are checked against every message
+    markers.dataclass["Flushing"].regex = re.compile(r".*Flushing")
+    markers.compile()
+
+    assert markers.labels[markers.check("Now Flushing")] == "Flushing"
+    assert markers.labels[markers.check("Flushing")] == "Flushing"
+    assert markers.labels[markers.check("Run ISOFIT initial guess")] == "Presolve Start"